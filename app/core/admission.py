@@ -0,0 +1,255 @@
+"""
+Адаптивный контроль допуска запросов (admission control) и сброс нагрузки.
+
+Запросы делятся на классы: auth (вход, регистрация), write (изменения), read (чтение).
+Для каждого класса считаются выполняющиеся запросы и EWMA задержки до начала ответа.
+Предел одновременных запросов класса подстраивается по AIMD: пока задержка выше цели,
+предел уменьшается вдвое (не ниже минимума), иначе растёт на единицу до максимума.
+
+Основные эндпоинты досок и задач — высокий приоритет: при превышении предела
+они ждут в очереди (до ADMISSION_QUEUE_TIMEOUT_SECONDS). Низкоприоритетные
+(поиск, статистика, логи, экспорт/импорт) сразу получают 503 с Retry-After,
+как только предел исчерпан или задержка класса выше цели.
+
+Состояние изменяется только из цикла событий, поэтому блокировки не нужны.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+
+# Низкоприоритетные маршруты: первыми отбрасываются под нагрузкой
+LOW_PRIORITY_PREFIXES = ("/search", "/stats", "/logs", "/export", "/import", "/jobs", "/archive", "/users/public")
+
+# Служебные пути вне контроля допуска
+EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json")
+
+# Вес нового замера в EWMA задержки
+EWMA_ALPHA = 0.2
+
+# Замер старше этого не считается признаком перегрузки (иначе при сброшенном
+# низкоприоритетном трафике и без других запросов EWMA не обновлялась бы никогда)
+LATENCY_STALE_SECONDS = 5.0
+
+# Не чаще чем раз в столько секунд предел уменьшается повторно (даём очереди рассосаться)
+DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class AdmissionClass:
+    """Класс запросов: адаптивный предел одновременных запросов и очередь ожидания"""
+    
+    def __init__(self, name: str, target_latency: float, max_in_flight: int, min_in_flight: int = 1):
+        self.name = name
+        self.target_latency = target_latency
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.latency = 0.0  # EWMA, сек
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._last_observed = 0.0
+        self.stats = {"admitted": 0, "waited": 0, "shed": 0, "timeouts": 0}
+    
+    @property
+    def overloaded(self) -> bool:
+        return self.latency > self.target_latency and time.monotonic() - self._last_observed < LATENCY_STALE_SECONDS
+    
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+    
+    async def acquire(self, high_priority: bool, queue_timeout: float, max_queue: int) -> bool:
+        """Занять место; False — запрос нужно отклонить"""
+        if not high_priority and self.overloaded:
+            self.stats["shed"] += 1
+            return False
+        
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return True
+        
+        if not high_priority or len(self._waiters) >= max_queue:
+            self.stats["shed"] += 1
+            return False
+        
+        # Место передаётся ожидающему в release(): in_flight увеличивается там же
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["waited"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return True  # Место выдано одновременно с таймаутом
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            self.stats["timeouts"] += 1
+            return False
+        except asyncio.CancelledError:
+            # Клиент отключился: вернуть выданное место или покинуть очередь
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+        self.stats["admitted"] += 1
+        return True
+    
+    def release(self, latency: Optional[float]) -> None:
+        """Освободить место; latency — задержка до начала ответа (None — не измерена)"""
+        self.in_flight -= 1
+        if latency is not None:
+            self._observe(latency)
+        
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+    
+    def _observe(self, latency: float) -> None:
+        self.latency = latency if self.latency == 0.0 else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        now = time.monotonic()
+        self._last_observed = now
+        if self.overloaded:
+            if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                self.limit = max(float(self.min_in_flight), self.limit / 2)
+                self._last_decrease = now
+        elif self.limit < self.max_in_flight:
+            self.limit = min(float(self.max_in_flight), self.limit + 1)
+    
+    def info(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "limit": int(self.limit),
+            "waiting": len(self._waiters),
+            "latency_ms": round(self.latency * 1000, 1),
+            "target_ms": round(self.target_latency * 1000, 1),
+            **self.stats,
+        }
+
+
+class AdmissionController:
+    """Набор классов запросов и параметры очереди"""
+    
+    def __init__(
+        self,
+        classes: Optional[Dict[str, AdmissionClass]] = None,
+        queue_timeout: Optional[float] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.classes = classes or {
+            "auth": AdmissionClass(
+                "auth", settings.ADMISSION_AUTH_TARGET_MS / 1000, settings.ADMISSION_AUTH_MAX_IN_FLIGHT
+            ),
+            "write": AdmissionClass(
+                "write", settings.ADMISSION_WRITE_TARGET_MS / 1000, settings.ADMISSION_WRITE_MAX_IN_FLIGHT
+            ),
+            "read": AdmissionClass(
+                "read", settings.ADMISSION_READ_TARGET_MS / 1000, settings.ADMISSION_READ_MAX_IN_FLIGHT
+            ),
+        }
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self.max_queue = settings.ADMISSION_MAX_QUEUE if max_queue is None else max_queue
+    
+    @staticmethod
+    def classify(method: str, path: str) -> str:
+        if path.startswith("/auth/"):
+            return "auth"
+        if method in ("GET", "HEAD"):
+            return "read"
+        return "write"
+    
+    @staticmethod
+    def is_high_priority(path: str) -> bool:
+        return not path.startswith(LOW_PRIORITY_PREFIXES)
+    
+    def info(self) -> Dict:
+        return {name: admission_class.info() for name, admission_class in self.classes.items()}
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: допуск запроса по классу и приоритету, 503 при перегрузке"""
+    
+    def __init__(self, app, controller: Optional[AdmissionController] = None, enabled: Optional[bool] = None):
+        self.app = app
+        self.controller = controller or admission
+        self.enabled = settings.ADMISSION_ENABLED if enabled is None else enabled
+    
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS" \
+                or scope["path"] == "/" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+        
+        controller = self.controller
+        admission_class = controller.classes[controller.classify(scope["method"], scope["path"])]
+        admitted = await admission_class.acquire(
+            controller.is_high_priority(scope["path"]), controller.queue_timeout, controller.max_queue
+        )
+        if not admitted:
+            await _send_overloaded(send, admission_class)
+            return
+        
+        # Задержка считается до начала ответа: потоковые ответы (экспорт) не искажают замер
+        start = time.monotonic()
+        latency = None
+        
+        async def timed_send(message):
+            nonlocal latency
+            if message["type"] == "http.response.start" and latency is None:
+                latency = time.monotonic() - start
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            admission_class.release(latency)
+
+
+class SheddingMiddleware:
+    """
+    Только сброс низкоприоритетных запросов при перегрузке класса, без занятия места в нём.
+    Для подзапросов POST /batch: место в классе уже занял сам батч, второе его подзапросы
+    ждали бы в очереди за самим батчем.
+    """
+    
+    def __init__(self, app, controller: Optional[AdmissionController] = None, enabled: Optional[bool] = None):
+        self.app = app
+        self.controller = controller or admission
+        self.enabled = settings.ADMISSION_ENABLED if enabled is None else enabled
+    
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if self.enabled and not controller.is_high_priority(scope["path"]):
+            admission_class = controller.classes[controller.classify(scope["method"], scope["path"])]
+            if admission_class.overloaded:
+                admission_class.stats["shed"] += 1
+                await _send_overloaded(send, admission_class)
+                return
+        await self.app(scope, receive, send)
+
+
+async def _send_overloaded(send, admission_class: AdmissionClass) -> None:
+    """503 с подсказкой, когда повторить"""
+    body = json.dumps({"detail": "Service is overloaded, please retry later"}).encode()
+    retry_after = max(1, round(admission_class.latency * 2))
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,154 @@
+"""
+Выполнение подзапросов POST /batch внутри процесса, без HTTP.
+
+Подзапрос передаётся в роутер приложения как обычный ASGI-запрос: работают те же
+обработчики, зависимости и проверки доступа. Каждый подзапрос списывает свою стоимость
+из ведра вызывающего (RateLimitMiddleware) и, если он низкоприоритетный, отклоняется
+при перегрузке его класса (SheddingMiddleware). Место в классе допуска и идемпотентность
+относятся к самому запросу /batch.
+Владелец токена и сессия БД передаются через scope["state"] и подхватываются
+зависимостями get_current_principal / get_current_user_id / get_db;
+флаг IN_BATCH_STATE в нём же не даёт выполнить /batch внутри батча.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from app.core.admission import SheddingMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+
+# Методы, подзапросы с которыми не меняют данные и могут выполняться параллельно
+READ_METHODS = ("GET", "HEAD")
+
+# Заголовки подзапроса, которые клиент может передать (остальные игнорируются)
+FORWARDED_HEADERS = ("if-match", "accept")
+
+# Ключ scope["state"], которым помечены подзапросы батча
+IN_BATCH_STATE = "in_batch"
+
+
+def request_path(path: str) -> str:
+    """Путь подзапроса так, как его увидит роутер: без query string, с декодированными %XX"""
+    return unquote(path.partition("?")[0])
+
+
+class SubResponse:
+    """Ответ подзапроса, собранный из ASGI-сообщений"""
+    
+    __slots__ = ("status", "headers", "body")
+    
+    def __init__(self):
+        self.status = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = b""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in self.headers
+            if name.lower() != b"content-length"
+        }
+        body: Any = None
+        if self.body:
+            if headers.get("content-type", "").startswith("application/json"):
+                body = json.loads(self.body)
+            else:
+                body = self.body.decode("utf-8", errors="replace")
+        return {"status": self.status, "headers": headers, "body": body}
+
+
+class BatchDispatcher:
+    """
+    Выполняет подзапросы через роутер приложения с его обработчиками исключений.
+    Повторяет внутреннюю часть стека FastAPI: ExceptionMiddleware и AsyncExitStackMiddleware
+    (закрывает зависимости-генераторы, например get_db).
+    """
+    
+    def __init__(self, app):
+        # Обработчики 500/Exception относятся к ServerErrorMiddleware — необработанную
+        # ошибку подзапроса превращает в 500 сам dispatch
+        handlers = {
+            key: handler for key, handler in app.exception_handlers.items()
+            if key not in (500, Exception)
+        }
+        self.app = app
+        self.handler = RateLimitMiddleware(
+            SheddingMiddleware(ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=handlers))
+        )
+    
+    async def dispatch(
+        self,
+        parent_scope: Dict,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        state: Optional[Dict] = None
+    ) -> SubResponse:
+        raw_path, _, query = path.partition("?")
+        payload = b"" if body is None else json.dumps(body).encode()
+        
+        request_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+            if name.lower() in FORWARDED_HEADERS
+        ]
+        # Токен подзапроса — токен самого /batch (нужен зависимостям, читающим заголовок)
+        request_headers += [
+            (name, value) for name, value in parent_scope["headers"] if name == b"authorization"
+        ]
+        if payload:
+            request_headers += [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ]
+        
+        scope = {
+            "type": "http",
+            "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+            "http_version": parent_scope.get("http_version", "1.1"),
+            "method": method,
+            "scheme": parent_scope.get("scheme", "http"),
+            "server": parent_scope.get("server"),
+            "client": parent_scope.get("client"),
+            "root_path": parent_scope.get("root_path", ""),
+            "path": request_path(path),
+            "raw_path": raw_path.encode(),
+            "query_string": query.encode(),
+            "headers": request_headers,
+            "app": self.app,
+            "state": {**(state or {}), IN_BATCH_STATE: True},
+        }
+        
+        received = False
+        
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            return {"type": "http.disconnect"}
+        
+        response = SubResponse()
+        chunks: List[bytes] = []
+        
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+        
+        try:
+            await self.handler(scope, receive, send)
+        except Exception:
+            # Как ServerErrorMiddleware: ошибка одного подзапроса не прерывает батч
+            response.status = 500
+            response.headers = [(b"content-type", b"application/json")]
+            chunks = [b'{"detail":"Internal Server Error"}']
+        
+        response.body = b"".join(chunks)
+        return response
@@ -0,0 +1,41 @@
+"""
+Кэш приложения с подключаемыми бэкендами.
+
+CACHE_BACKEND:
+    memory — LRU + TTL в памяти процесса (по умолчанию)
+    sqlite — общий для процессов файл SQLite (CACHE_URL — путь к файлу)
+    redis  — Redis-совместимый сервер (CACHE_URL — redis://host:port/db)
+
+Использование:
+    from app.core.cache import cache
+    stats = cache.get_or_set("stats:dashboard", compute, ttl=30, tags=("stats",))
+    cache.invalidate_tags("stats")
+"""
+from app.core.config import settings
+from app.core.cache.base import CacheBackend, CacheMetrics
+from app.core.cache.memory import MemoryCache
+from app.core.cache.sqlite import SQLiteCache
+from app.core.cache.redis import RedisCache
+
+
+def create_cache(backend: str = None, url: str = None) -> CacheBackend:
+    """Создать бэкенд кэша по настройкам"""
+    backend = backend or settings.CACHE_BACKEND
+    url = url if url is not None else settings.CACHE_URL
+    
+    if backend == "memory":
+        return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.CACHE_DEFAULT_TTL)
+    if backend == "sqlite":
+        return SQLiteCache(
+            url or "./cache.db",
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            default_ttl=settings.CACHE_DEFAULT_TTL
+        )
+    if backend == "redis":
+        return RedisCache(url or "redis://localhost:6379/0", default_ttl=settings.CACHE_DEFAULT_TTL)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+cache = create_cache()
+
+__all__ = ["cache", "create_cache", "CacheBackend", "CacheMetrics", "MemoryCache", "SQLiteCache", "RedisCache"]
@@ -0,0 +1,180 @@
+"""
+Базовый класс бэкенда кэша.
+
+Бэкенды реализуют хранение сырых строк (_get_raw/_set_raw/_delete_raw/_incr/_clear),
+а сериализация, теги и метрики реализованы здесь.
+Инвалидация по тегу — это увеличение версии тега: запись хранит версии своих тегов
+на момент сохранения и считается промахом, если хотя бы одна версия устарела.
+Значения должны сериализоваться в JSON.
+"""
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+TAG_PREFIX = "tag:"
+VALUE_PREFIX = "val:"
+
+
+class CacheMetrics:
+    """Счётчики попаданий, промахов, вытеснений и ошибок бэкенда"""
+    
+    FIELDS = ("hits", "misses", "sets", "deletes", "invalidations", "evictions", "errors")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {field: 0 for field in self.FIELDS}
+    
+    def incr(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[field] += amount
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = round(counters["hits"] / lookups, 4) if lookups else None
+        return counters
+
+
+class CacheBackend:
+    """Кэш с TTL и инвалидацией по тегам"""
+    
+    name = "base"
+    
+    def __init__(self, default_ttl: Optional[float] = None):
+        self.default_ttl = default_ttl
+        self.metrics = CacheMetrics()
+    
+    # --- Примитивы бэкенда ---
+    
+    def _get_raw(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+    
+    def _set_raw(self, key: str, value: str, ttl: Optional[float]) -> None:
+        raise NotImplementedError
+    
+    def _delete_raw(self, key: str) -> None:
+        raise NotImplementedError
+    
+    def _incr(self, key: str) -> int:
+        raise NotImplementedError
+    
+    def _clear(self) -> None:
+        raise NotImplementedError
+    
+    def _size(self) -> Optional[int]:
+        return None
+    
+    # --- Публичный интерфейс ---
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Получить значение или default при промахе"""
+        try:
+            raw = self._get_raw(VALUE_PREFIX + key)
+            if raw is not None:
+                entry = json.loads(raw)
+                if self._tags_valid(entry.get("t", {})):
+                    self.metrics.incr("hits")
+                    return entry["v"]
+                self._delete_raw(VALUE_PREFIX + key)
+        except Exception:
+            # Недоступный кэш не должен ломать запрос — считаем промахом
+            self.metrics.incr("errors")
+        self.metrics.incr("misses")
+        return default
+    
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        versions: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Сохранить значение на ttl секунд (None — default_ttl) с тегами.
+        versions — версии тегов, прочитанные до вычисления значения (см. get_or_set);
+        без них берутся текущие.
+        """
+        try:
+            if versions is None:
+                versions = {tag: self._tag_version(tag) for tag in tags}
+            raw = json.dumps({"v": value, "t": versions}, default=str, separators=(",", ":"))
+            self._set_raw(VALUE_PREFIX + key, raw, ttl if ttl is not None else self.default_ttl)
+            self.metrics.incr("sets")
+        except Exception:
+            self.metrics.incr("errors")
+    
+    def delete(self, key: str) -> None:
+        try:
+            self._delete_raw(VALUE_PREFIX + key)
+            self.metrics.incr("deletes")
+        except Exception:
+            self.metrics.incr("errors")
+    
+    def invalidate_tags(self, *tags: str) -> None:
+        """Сделать недействительными все записи с любым из тегов"""
+        for tag in tags:
+            try:
+                self._incr(TAG_PREFIX + tag)
+                self.metrics.incr("invalidations")
+            except Exception:
+                self.metrics.incr("errors")
+    
+    def clear(self) -> None:
+        try:
+            self._clear()
+        except Exception:
+            self.metrics.incr("errors")
+    
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        Получить значение из кэша или вычислить и сохранить.
+        Версии тегов читаются до compute(): инвалидация во время вычисления
+        делает сохранённое значение устаревшим, а не свежим на весь TTL.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            versions = self.tag_versions(tags)
+            value = compute()
+            if versions is not None:
+                self.set(key, value, ttl=ttl, tags=tags, versions=versions)
+        return value
+    
+    def tag_versions(self, tags: Iterable[str]) -> Optional[Dict[str, int]]:
+        """
+        Текущие версии тегов — снимок для set(versions=...), снятый до чтения данных из БД.
+        None — кэш недоступен (значение не сохраняется).
+        """
+        try:
+            return {tag: self._tag_version(tag) for tag in tags}
+        except Exception:
+            self.metrics.incr("errors")
+            return None
+    
+    def info(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        info = {"backend": self.name, **self.metrics.snapshot()}
+        try:
+            size = self._size()
+        except Exception:
+            size = None
+        if size is not None:
+            info["entries"] = size
+        return info
+    
+    # --- Теги ---
+    
+    def _tag_version(self, tag: str) -> int:
+        raw = self._get_raw(TAG_PREFIX + tag)
+        return int(raw) if raw is not None else 0
+    
+    def _tags_valid(self, versions: Dict[str, int]) -> bool:
+        return all(self._tag_version(tag) == version for tag, version in versions.items())
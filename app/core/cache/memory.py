@@ -0,0 +1,66 @@
+"""
+Кэш в памяти процесса: ограниченный размер (LRU) и TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.cache.base import CacheBackend, TAG_PREFIX
+
+
+class MemoryCache(CacheBackend):
+    """Ограниченный LRU-кэш с TTL в памяти процесса"""
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int = 10000, default_ttl: Optional[float] = None):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._tags = {}  # Версии тегов хранятся отдельно и не вытесняются
+    
+    def _get_raw(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key.startswith(TAG_PREFIX):
+                version = self._tags.get(key)
+                return None if version is None else str(version)
+            
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def _set_raw(self, key: str, value: str, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.metrics.incr("evictions", evicted)
+    
+    def _delete_raw(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def _incr(self, key: str) -> int:
+        with self._lock:
+            self._tags[key] = self._tags.get(key, 0) + 1
+            return self._tags[key]
+    
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def _size(self) -> int:
+        return len(self._entries)
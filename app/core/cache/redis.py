@@ -0,0 +1,139 @@
+"""
+Кэш в Redis (или совместимом сервере: KeyDB, Valkey, Dragonfly) по протоколу RESP.
+Минимальный клиент без внешних зависимостей; соединение на поток.
+"""
+import socket
+import threading
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from app.core.cache.base import CacheBackend
+
+
+class RedisError(Exception):
+    """Ошибка, возвращённая сервером"""
+
+
+class RedisCache(CacheBackend):
+    """Общий кэш для нескольких процессов и машин"""
+    
+    name = "redis"
+    
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "tms:",
+        default_ttl: Optional[float] = None,
+        socket_timeout: float = 1.0
+    ):
+        super().__init__(default_ttl)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+    
+    # --- Протокол RESP ---
+    
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        stream = sock.makefile("rwb")
+        self._local.sock, self._local.stream = sock, stream
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.database:
+            self._call("SELECT", str(self.database))
+    
+    def _disconnect(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = self._local.stream = None
+    
+    def _call(self, *args: str):
+        stream = self._local.stream
+        parts: List[bytes] = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        stream.write(b"".join(parts))
+        stream.flush()
+        return self._read_reply(stream)
+    
+    def _read_reply(self, stream):
+        line = stream.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = stream.read(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            count = int(payload)
+            return None if count == -1 else [self._read_reply(stream) for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+    
+    def execute(self, *args: str):
+        """Выполнить команду; при обрыве соединения — одна повторная попытка"""
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "stream", None) is None:
+                    self._connect()
+                return self._call(*args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt:
+                    raise
+    
+    # --- Примитивы бэкенда ---
+    
+    def _get_raw(self, key: str) -> Optional[str]:
+        return self.execute("GET", self.prefix + key)
+    
+    def _set_raw(self, key: str, value: str, ttl: Optional[float]) -> None:
+        if ttl is not None:
+            self.execute("SET", self.prefix + key, value, "PX", str(max(int(ttl * 1000), 1)))
+        else:
+            self.execute("SET", self.prefix + key, value)
+    
+    def _delete_raw(self, key: str) -> None:
+        self.execute("DEL", self.prefix + key)
+    
+    def _incr(self, key: str) -> int:
+        return self.execute("INCR", self.prefix + key)
+    
+    def _clear(self) -> None:
+        cursor = "0"
+        pattern = self.prefix + "val:*"
+        while True:
+            cursor, keys = self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", "500")
+            if keys:
+                self.execute("DEL", *keys)
+            if cursor == "0":
+                break
+    
+    def info(self):
+        info = super().info()
+        try:
+            stats = self.execute("INFO", "stats") or ""
+            for line in stats.splitlines():
+                if line.startswith("evicted_keys:"):
+                    info["server_evictions"] = int(line.split(":", 1)[1])
+        except Exception:
+            pass
+        return info
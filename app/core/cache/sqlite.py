@@ -0,0 +1,112 @@
+"""
+Кэш в файле SQLite, общий для нескольких процессов-воркеров на одной машине.
+Вытеснение сверх max_entries — LRU по accessed_at: попадание обновляет время обращения,
+но не чаще раза в TOUCH_INTERVAL секунд, чтобы чтения не превращались в запись на каждый GET.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from app.core.cache.base import CacheBackend, TAG_PREFIX
+
+# Как часто (в записях) удалять просроченные и лишние записи
+PURGE_EVERY = 500
+# Минимальный интервал (сек) между обновлениями accessed_at одной записи
+TOUCH_INTERVAL = 1.0
+
+
+class SQLiteCache(CacheBackend):
+    """Общий кэш процессов в отдельном файле SQLite (WAL)"""
+    
+    name = "sqlite"
+    
+    def __init__(self, path: str, max_entries: int = 100000, default_ttl: Optional[float] = None):
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение на поток (sqlite3-соединения нельзя делить между потоками)"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+    
+    def _get_raw(self, key: str) -> Optional[str]:
+        db = self._connection()
+        row = db.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            return None
+        # Теги не вытесняются — время обращения к ним не нужно
+        if not key.startswith(TAG_PREFIX) and now - accessed_at >= TOUCH_INTERVAL:
+            db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+    
+    def _set_raw(self, key: str, value: str, ttl: Optional[float]) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl if ttl is not None else None, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY == 0
+        if purge:
+            self._purge()
+    
+    def _delete_raw(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def _incr(self, key: str) -> int:
+        db = self._connection()
+        return int(db.execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, '1', NULL, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+            "RETURNING value",
+            (key, time.time())
+        ).fetchone()[0])
+    
+    def _clear(self) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key NOT LIKE 'tag:%'")
+    
+    def _size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    
+    def _purge(self) -> None:
+        """Удалить просроченные записи и самые старые сверх max_entries (теги не трогаем)"""
+        db = self._connection()
+        expired = db.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        ).rowcount
+        overflow = db.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache WHERE key NOT LIKE 'tag:%'"
+            " ORDER BY accessed_at LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?))",
+            (self.max_entries,)
+        ).rowcount
+        if expired + overflow:
+            self.metrics.incr("evictions", expired + overflow)
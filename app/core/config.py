@@ -9,11 +9,81 @@ class Settings(BaseSettings):
     """Настройки приложения"""
     
     DATABASE_URL: str = "sqlite:///./app.db"
+    DATABASE_BUSY_TIMEOUT_SECONDS: float = 20.0  # Ожидание блокировки SQLite для обычных транзакций
+    DATABASE_WRITE_BUSY_TIMEOUT_MS: int = 200  # Для BEGIN IMMEDIATE в write_transaction: дальше — повтор
+    DATABASE_WRITE_RETRIES: int = 8
+    DATABASE_WRITE_RETRY_BASE_MS: float = 10.0  # База экспоненциальной задержки между повторами
+    DATABASE_WRITE_RETRY_MAX_MS: float = 1000.0
+    
+    # Групповой коммит смены статуса/приоритета задач (app/core/group_commit.py)
+    GROUP_COMMIT_ENABLED: bool = True
+    GROUP_COMMIT_MAX_BATCH: int = 100  # Операций в одной транзакции
+    GROUP_COMMIT_MAX_DELAY_MS: float = 5.0  # Сколько пачка добирает операции после первой
+    GROUP_COMMIT_WAIT_SECONDS: float = 30.0  # Сколько запрос ждёт коммита своей пачки, потом 503
     JWT_SECRET: str
-    JWT_EXPIRE_MINUTES: int = 1440
+    JWT_EXPIRE_MINUTES: int = 15  # Срок access-токена; продлевается через POST /auth/refresh
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_SYNC_SECONDS: float = 5.0  # Как часто подтягивать отзывы из token_revocations (другие процессы)
+    REVOCATION_FILTER_CAPACITY: int = 100000  # Расчётное число отозванных токенов для блум-фильтра
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Размер кэша проверенных JWT
+    GUEST_TOKEN_EXPIRE_MINUTES: int = 1440  # Срок гостевой сессии (без записи в БД)
+    
+    # Хэширование паролей
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # Потоков для bcrypt (отдельно от пула обработчиков)
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # Сколько операций может ждать; сверх этого — 503
     ADMIN_EMAIL: str = "admin@example.com"
     ADMIN_PASSWORD: str = "admin123"
     
+    # Фоновые задания
+    JOB_WORKERS: int = 1  # Потоков-воркеров внутри приложения (0 - только отдельный воркер `python -m app.worker`)
+    JOB_POLL_INTERVAL: float = 1.0  # Пауза между опросами пустой очереди, сек
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 5.0  # Базовая задержка экспоненциального backoff
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600  # Через сколько без продления аренды задание возвращается в очередь
+    JOB_HEARTBEAT_SECONDS: float = 30.0  # Как часто воркер продлевает аренду выполняемого задания
+    
+    # Архив задач (app/services/archive_service.py)
+    ARCHIVE_DONE_AFTER_DAYS: int = 90  # Выполненные задачи старше этого уходят в архив (0 - не переносить)
+    ARCHIVE_SWEEP_INTERVAL_SECONDS: int = 3600  # Как часто воркер ставит задание переноса
+    ARCHIVE_BATCH_SIZE: int = 1000  # Задач в одной транзакции переноса
+    
+    # Idempotency-Key
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # Сколько хранить ответ для повторов
+    IDEMPOTENCY_MAX_KEYS: int = 10000  # Размер хранилища (вытеснение LRU)
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1048576  # Ответы больше этого размера не сохраняются
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0  # Сколько дубликат ждёт завершения исходного запроса
+    
+    # Микро-кэш публичных досок (GET /boards/public*)
+    PUBLIC_CACHE_TTL_SECONDS: float = 2.0  # Сколько результат считается свежим
+    PUBLIC_CACHE_STALE_SECONDS: float = 30.0  # Сколько ещё отдаётся устаревший результат, пока идёт обновление
+    
+    # Кэш приложения (app/core/cache)
+    CACHE_BACKEND: str = "memory"  # memory, sqlite, redis
+    CACHE_URL: str = ""  # Путь к файлу SQLite или redis://host:port/db
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_DEFAULT_TTL: float = 300.0  # TTL по умолчанию, сек
+    
+    # Ограничение частоты запросов (app/core/ratelimit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory, sqlite (общий для воркеров)
+    RATE_LIMIT_URL: str = ""  # Путь к файлу SQLite
+    RATE_LIMIT_PER_SECOND: float = 20.0  # Пополнение ведра пользователя/IP
+    RATE_LIMIT_BURST: float = 100.0  # Ёмкость ведра (допустимый всплеск)
+    RATE_LIMIT_AUTH_PER_SECOND: float = 0.5  # Вход и регистрация — отдельное строгое ведро
+    RATE_LIMIT_AUTH_BURST: float = 20.0
+    
+    # Контроль допуска и сброс нагрузки (app/core/admission.py)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_READ_TARGET_MS: float = 250.0  # Целевая задержка класса (EWMA до начала ответа)
+    ADMISSION_WRITE_TARGET_MS: float = 500.0
+    ADMISSION_AUTH_TARGET_MS: float = 1500.0  # Вход включает bcrypt
+    ADMISSION_READ_MAX_IN_FLIGHT: int = 64  # Верхняя граница адаптивного предела одновременных запросов
+    ADMISSION_WRITE_MAX_IN_FLIGHT: int = 16  # SQLite допускает одного писателя — больше только копит ожидание блокировки
+    ADMISSION_AUTH_MAX_IN_FLIGHT: int = 16
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0  # Сколько приоритетный запрос ждёт места, потом 503
+    ADMISSION_MAX_QUEUE: int = 200
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=True,
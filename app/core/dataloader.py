@@ -0,0 +1,47 @@
+"""
+Пакетная загрузка связанных объектов в пределах запроса (DataLoader).
+
+Обработчик сначала регистрирует все нужные ключи (prime), затем читает значения (get):
+первое чтение загружает все зарегистрированные ключи одним вызовом batch_fn,
+поэтому число запросов к БД не зависит от длины списка.
+Загруженные значения запоминаются в экземпляре; экземпляр создаётся на один запрос.
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class DataLoader:
+    """Пакетный загрузчик: batch_fn(keys) -> {key: value} (отсутствующие ключи — None)"""
+    
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]]):
+        self.batch_fn = batch_fn
+        self._loaded: Dict[Hashable, Any] = {}
+        self._pending: Dict[Hashable, None] = {}  # Упорядоченное множество ключей
+        self.batches = 0
+    
+    def prime(self, keys: Iterable[Optional[Hashable]]) -> None:
+        """Зарегистрировать ключи для следующей пачки (None пропускаются)"""
+        for key in keys:
+            if key is not None and key not in self._loaded:
+                self._pending[key] = None
+    
+    def get(self, key: Optional[Hashable]) -> Any:
+        """Значение по ключу; при необходимости загружает всю накопленную пачку"""
+        if key is None:
+            return None
+        if key not in self._loaded:
+            self._pending[key] = None
+            self._dispatch()
+        return self._loaded[key]
+    
+    def load_many(self, keys: Iterable[Optional[Hashable]]) -> List[Any]:
+        keys = list(keys)
+        self.prime(keys)
+        return [self.get(key) for key in keys]
+    
+    def _dispatch(self) -> None:
+        keys = list(self._pending)
+        self._pending.clear()
+        loaded = self.batch_fn(keys)
+        self.batches += 1
+        for key in keys:
+            self._loaded[key] = loaded.get(key)
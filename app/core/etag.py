@@ -0,0 +1,50 @@
+"""
+Оптимистичные блокировки: ETag из версии записи и заголовок If-Match.
+
+Колонка version задачи и доски увеличивается каждым изменением.
+Клиент передаёт полученный ETag в If-Match; UPDATE выполняется с условием
+version = <ожидаемая>, и если запись успели изменить, ответ — 412 с актуальным ETag.
+Блокировки не удерживаются: конфликт обнаруживается в момент записи.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def make_etag(version: int) -> str:
+    """ETag для версии записи"""
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Ожидаемая версия из If-Match; None — заголовка нет или "*" (подходит любая версия).
+    Слабый или нераспознанный ETag не совпадает ни с одной версией (RFC 9110) — 412.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    
+    value = if_match.strip()
+    if len(value) > 2 and value[0] == value[-1] == '"' and value[1:-1].isdigit():
+        return int(value[1:-1])
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="If-Match does not match the current version"
+    )
+
+
+def raise_for_version(current_version: Optional[int], detail: str) -> None:
+    """
+    UPDATE с условием по версии не затронул строк:
+    записи нет — 404 (detail), версия устарела — 412 с актуальным ETag.
+    """
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail
+        )
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource was modified by another request",
+        headers={"ETag": make_etag(current_version)}
+    )
@@ -0,0 +1,203 @@
+"""
+Групповой коммит мелких записей (group commit).
+
+Параллельные запросы передают операцию записи (функцию от сессии) в очередь;
+отдельный поток собирает операции за GROUP_COMMIT_MAX_DELAY_MS (не больше
+GROUP_COMMIT_MAX_BATCH) и выполняет их в одной транзакции записи.
+Каждая операция — в своей точке сохранения (SAVEPOINT): ошибка одной (404,
+нарушение ограничения) не откатывает остальные. Вызывающий получает результат
+только после коммита всей пачки, так что на пачку приходится один fsync.
+Не дождавшись очереди за GROUP_COMMIT_WAIT_SECONDS, вызывающий отменяет операцию
+и получает 503; операция, которую пачка уже взяла в работу, не отменяется — её ждут.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class _PendingWrite:
+    """Операция в очереди и её результат"""
+    
+    __slots__ = ("op", "done", "result", "error", "state")
+    
+    QUEUED, RUNNING, CANCELLED = "queued", "running", "cancelled"
+    
+    def __init__(self, op: Callable[[Session], object]):
+        self.op = op
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.state = self.QUEUED
+
+
+class GroupCommitter:
+    """Очередь операций записи с выполнением пачками в фоновом потоке"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        name: str = "group-commit"
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch or settings.GROUP_COMMIT_MAX_BATCH
+        self.max_delay = max_delay if max_delay is not None else settings.GROUP_COMMIT_MAX_DELAY_MS / 1000
+        self.enabled = settings.GROUP_COMMIT_ENABLED if enabled is None else enabled
+        self.name = name
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._state_lock = threading.Lock()  # Переходы queued -> running / cancelled
+        self.stats = {"batches": 0, "operations": 0, "max_batch_size": 0, "failed_batches": 0, "cancelled": 0}
+    
+    def execute(self, db: Session, op: Callable[[Session], T]) -> T:
+        """
+        Выполнить операцию записи и дождаться коммита.
+        Если групповой коммит выключен — сразу, в сессии запроса.
+        """
+        if not self.enabled:
+            from app.database import run_write_transaction
+            
+            def work():
+                result = op(db)
+                db.commit()
+                return result
+            
+            return run_write_transaction(db, work)
+        
+        self._ensure_started()
+        pending = _PendingWrite(op)
+        self._queue.put(pending)
+        if not pending.done.wait(settings.GROUP_COMMIT_WAIT_SECONDS):
+            if self._transition(pending, _PendingWrite.CANCELLED):
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Write queue is overloaded, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            # Пачка уже выполняет операцию: ответ 503 привёл бы к повтору применённой записи
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+    
+    def _transition(self, pending: _PendingWrite, state: str) -> bool:
+        """Перевести операцию из очереди в state; False — она уже взята в работу или отменена"""
+        with self._state_lock:
+            if pending.state != _PendingWrite.QUEUED:
+                return False
+            pending.state = state
+            if state == _PendingWrite.CANCELLED:
+                self.stats["cancelled"] += 1
+            return True
+    
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Дописать поставленные операции и остановить поток"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+    
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            # Добираем операции, пришедшие за max_delay после первой
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+            
+            self._run_batch(batch)
+            if stopping:
+                return
+    
+    def _run_batch(self, batch: List[_PendingWrite]) -> None:
+        from app.database import is_busy_error, run_write_transaction
+        
+        # Операции, отменённые вызывающим по таймауту, пропускаются
+        batch = [pending for pending in batch if self._transition(pending, _PendingWrite.RUNNING)]
+        if not batch:
+            return
+        
+        db = self.session_factory()
+        try:
+            def work():
+                # Повтор после SQLITE_BUSY выполняет пачку заново: результаты собираются каждый раз
+                outcomes = []
+                for pending in batch:
+                    savepoint = db.begin_nested()
+                    try:
+                        outcomes.append((pending, pending.op(db), None))
+                        savepoint.commit()
+                    except OperationalError as e:
+                        if is_busy_error(e):
+                            raise
+                        savepoint.rollback()
+                        outcomes.append((pending, None, e))
+                    except Exception as e:
+                        savepoint.rollback()
+                        outcomes.append((pending, None, e))
+                db.commit()
+                return outcomes
+            
+            outcomes = run_write_transaction(db, work)
+        except BaseException as e:
+            self.stats["failed_batches"] += 1
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            if not isinstance(e, Exception):
+                raise
+            return
+        finally:
+            db.close()
+        
+        self.stats["batches"] += 1
+        self.stats["operations"] += len(batch)
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+        for pending, result, error in outcomes:
+            pending.result = result
+            pending.error = error
+            pending.done.set()
+    
+    def info(self) -> Dict:
+        batches = self.stats["batches"]
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "avg_batch_size": round(self.stats["operations"] / batches, 2) if batches else 0.0,
+            **self.stats,
+        }
@@ -0,0 +1,248 @@
+"""
+Поддержка заголовка Idempotency-Key для изменяющих запросов.
+
+Первый запрос с ключом выполняется, его ответ сохраняется в хранилище (TTL + LRU).
+Повтор с тем же ключом получает сохранённый ответ без повторного выполнения обработчика,
+а дубликат, пришедший во время выполнения исходного запроса, ждёт его завершения.
+Ключ действует в пределах пользователя (sub проверенного токена, а не сам токен —
+повтор после обновления токена тоже распознаётся), метода и пути.
+Тело запроса не буферизуется: отпечаток считается по мере чтения (потоковый /import).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+
+# Заголовки ответа, которые сохраняются для повтора (остальные пересчитываются)
+STORED_HEADERS = (b"content-type", b"location", b"etag")
+
+
+class IdempotencyEntry:
+    """Запись хранилища: запрос в процессе выполнения или сохранённый ответ"""
+    
+    __slots__ = ("fingerprint", "expires_at", "done", "status", "headers", "body")
+    
+    def __init__(self, fingerprint: Optional[str], expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = asyncio.Event()
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = b""
+    
+    @property
+    def completed(self) -> bool:
+        return self.status is not None
+
+
+class IdempotencyStore:
+    """Хранилище ответов в памяти процесса с TTL и вытеснением LRU"""
+    
+    def __init__(self, max_keys: int, ttl_seconds: int):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, IdempotencyEntry]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[IdempotencyEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.completed and entry.expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def begin(self, key: str, fingerprint: Optional[str] = None) -> IdempotencyEntry:
+        """Зарегистрировать выполняющийся запрос (отпечаток известен после чтения тела)"""
+        entry = IdempotencyEntry(fingerprint, time.monotonic() + self.ttl_seconds)
+        self._entries[key] = entry
+        self._evict()
+        return entry
+    
+    def complete(self, entry: IdempotencyEntry, fingerprint: str, status: int, headers, body: bytes) -> None:
+        """Сохранить ответ и разбудить ожидающие дубликаты"""
+        entry.fingerprint = fingerprint
+        entry.status = status
+        entry.headers = headers
+        entry.body = body
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        entry.done.set()
+    
+    def discard(self, key: str, entry: IdempotencyEntry) -> None:
+        """Забыть ключ (ответ не сохраняется) и разбудить ожидающие дубликаты"""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+    
+    def _evict(self) -> None:
+        # Выполняющиеся запросы не вытесняются, иначе дубликат выполнится повторно
+        while len(self._entries) > self.max_keys:
+            for key, entry in self._entries.items():
+                if entry.completed:
+                    del self._entries[key]
+                    break
+            else:
+                return
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware обработки Idempotency-Key"""
+    
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or IdempotencyStore(settings.IDEMPOTENCY_MAX_KEYS, settings.IDEMPOTENCY_TTL_SECONDS)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        
+        headers: Dict[bytes, bytes] = dict(scope["headers"])
+        idempotency_key = headers.get(b"idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+        
+        subject = _subject(headers.get(b"authorization"))
+        if subject is None:
+            # Недействительный токен: запрос всё равно получит 401, сохранять нечего
+            await self.app(scope, receive, send)
+            return
+        
+        key = hashlib.sha256(b"\0".join([
+            subject.encode(),
+            scope["method"].encode(),
+            scope["path"].encode(),
+            idempotency_key,
+        ])).hexdigest()
+        body = _BodyHasher(receive, scope.get("query_string", b""))
+        
+        entry = self.store.get(key)
+        if entry is not None and not entry.completed:
+            # Исходный запрос ещё выполняется — ждём его результата
+            try:
+                await asyncio.wait_for(entry.done.wait(), settings.IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                await _send_error(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            entry = self.store.get(key)
+        
+        if entry is not None:
+            if entry.fingerprint != await body.drain():
+                await _send_error(send, 422, "Idempotency-Key was already used with a different request")
+                return
+            await _replay(entry, send)
+            return
+        
+        entry = self.store.begin(key)
+        captured = {"status": None, "headers": [], "body": bytearray(), "storable": True}
+        
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [
+                    (name, value) for name, value in message.get("headers", []) if name.lower() in STORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and captured["storable"]:
+                captured["body"] += message.get("body", b"")
+                if len(captured["body"]) > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    captured["storable"] = False
+                    captured["body"] = bytearray()
+            await send(message)
+        
+        stored = False
+        try:
+            await self.app(scope, body.receive, capture_send)
+            status = captured["status"]
+            # Ошибки сервера не сохраняются: повтор должен выполнить запрос заново
+            if status is not None and status < 500 and captured["storable"]:
+                fingerprint = await body.drain()
+                if fingerprint is not None:
+                    self.store.complete(entry, fingerprint, status, captured["headers"], bytes(captured["body"]))
+                    stored = True
+        finally:
+            if not stored:
+                self.store.discard(key, entry)
+
+
+def _subject(authorization: Optional[bytes]) -> Optional[str]:
+    """Владелец запроса: sub проверенного access-токена, "" — без токена, None — токен недействителен"""
+    from app.core.security import verify_token_claims
+    
+    if not authorization:
+        return ""
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        sub, _ = verify_token_claims(token.strip())
+    except HTTPException:
+        return None
+    return str(sub)
+
+
+class _BodyHasher:
+    """
+    Передаёт тело запроса приложению без буферизации и считает его отпечаток (SHA-256
+    query string и тела). drain() дочитывает непрочитанный остаток и возвращает отпечаток
+    (None, если клиент отключился, не отправив тело целиком).
+    """
+    
+    def __init__(self, receive, query_string: bytes):
+        self._receive = receive
+        self._hash = hashlib.sha256(query_string + b"\0")
+        self._finished = False
+        self._disconnected = False
+    
+    async def receive(self):
+        message = await self._receive()
+        if message["type"] == "http.request":
+            self._hash.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                self._finished = True
+        elif message["type"] == "http.disconnect":
+            self._disconnected = True
+        return message
+    
+    async def drain(self) -> Optional[str]:
+        while not self._finished and not self._disconnected:
+            await self.receive()
+        return self._hash.hexdigest() if self._finished else None
+
+
+async def _replay(entry: IdempotencyEntry, send) -> None:
+    """Отправить сохранённый ответ"""
+    headers = list(entry.headers) + [
+        (b"content-length", str(len(entry.body)).encode()),
+        (b"idempotent-replayed", b"true"),
+    ]
+    await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+    await send({"type": "http.response.body", "body": entry.body})
+
+
+async def _send_error(send, status: int, detail: str) -> None:
+    """Ответ с ошибкой в формате HTTPException"""
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,22 @@
+"""
+Параметр include: связанные данные, которые клиент просит встроить в ответ списка
+(например, include=summary или include=assignee,creator).
+"""
+from typing import Iterable, Optional, Set
+
+from fastapi import HTTPException, status
+
+
+def parse_include(include: Optional[str], allowed: Iterable[str]) -> Set[str]:
+    """Разобрать include через запятую; неизвестное значение — 400"""
+    if not include:
+        return set()
+    
+    requested = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    return requested
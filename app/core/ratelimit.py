@@ -0,0 +1,279 @@
+"""
+Ограничение частоты запросов (token bucket).
+
+Ключ ведра — пользователь из JWT (sub) или IP клиента для анонимных запросов.
+Каждый маршрут списывает из ведра свою «стоимость» (RATE_LIMIT_RULES):
+дорогие эндпоинты (поиск, статистика, экспорт) стоят больше обычных.
+Эндпоинты входа и регистрации используют отдельное, более строгое ведро.
+
+RATE_LIMIT_BACKEND:
+    memory — ведра в памяти процесса (по умолчанию, один воркер и тесты)
+    sqlite — общий для воркеров файл SQLite (RATE_LIMIT_URL — путь к файлу)
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class BucketLimit(NamedTuple):
+    """Параметры ведра: пополнение (токенов в секунду) и ёмкость (допустимый всплеск)"""
+    rate: float
+    capacity: float
+
+
+class RouteRule(NamedTuple):
+    """Стоимость запроса к маршруту: метод (None — любой), префикс пути, стоимость, ведро"""
+    method: Optional[str]
+    prefix: str
+    cost: float
+    bucket: str = "api"
+
+
+# Правила проверяются по порядку, первое совпадение определяет стоимость; остальные маршруты стоят 1
+RATE_LIMIT_RULES = (
+    RouteRule("POST", "/auth/login", 1, "auth"),
+    RouteRule("POST", "/auth/register", 1, "auth"),
+    RouteRule("POST", "/auth/guest", 1, "auth"),
+    RouteRule("POST", "/auth/refresh", 1, "auth"),
+    RouteRule(None, "/search", 5),
+    RouteRule("GET", "/tasks/accessible", 3),
+    RouteRule(None, "/stats/", 3),
+    RouteRule("GET", "/boards/stats", 3),
+    RouteRule(None, "/export", 10),
+    RouteRule("POST", "/import", 20),
+    RouteRule("POST", "/batch", 10),
+    RouteRule("POST", "/archive", 10),
+)
+
+# Служебные пути без ограничения
+EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json")
+
+
+class BucketState(NamedTuple):
+    """Результат списания: разрешён ли запрос, остаток и через сколько секунд повторять"""
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+def _take(tokens: float, updated: float, now: float, cost: float, limit: BucketLimit) -> Tuple[float, BucketState]:
+    """Пополнить ведро за прошедшее время и попытаться списать cost"""
+    tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+    if tokens >= cost:
+        return tokens - cost, BucketState(True, tokens - cost, 0.0)
+    return tokens, BucketState(False, tokens, (cost - tokens) / limit.rate)
+
+
+class RateLimitBackend:
+    """Хранилище вёдер"""
+    
+    name = "base"
+    blocking = False  # Обращение к хранилищу блокирует поток (выполняется в пуле потоков)
+    
+    def take(self, key: str, cost: float, limit: BucketLimit) -> BucketState:
+        raise NotImplementedError
+    
+    def info(self) -> Dict:
+        return {"backend": self.name}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Вёдра в памяти процесса; давно не использованные вытесняются (LRU)"""
+    
+    name = "memory"
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+    
+    def take(self, key: str, cost: float, limit: BucketLimit) -> BucketState:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens, state = _take(tokens, updated, now, cost, limit)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return state
+    
+    def info(self) -> Dict:
+        return {"backend": self.name, "buckets": len(self._buckets)}
+
+
+# Как часто (в списаниях) удалять из SQLite давно не использованные вёдра
+PURGE_EVERY = 1000
+PURGE_IDLE_SECONDS = 3600
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Вёдра в общем файле SQLite: лимит действует на все процессы-воркеры машины.
+    Чтение и запись ведра — одна транзакция BEGIN IMMEDIATE.
+    """
+    
+    name = "sqlite"
+    blocking = True
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение на поток (sqlite3-соединения нельзя делить между потоками)"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+    
+    def take(self, key: str, cost: float, limit: BucketLimit) -> BucketState:
+        # Время стены: вёдра общие для процессов, monotonic у каждого свой
+        now = time.time()
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row is not None else (limit.capacity, now)
+            tokens, state = _take(tokens, updated, now, cost, limit)
+            db.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            db.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - PURGE_IDLE_SECONDS,))
+        return state
+    
+    def info(self) -> Dict:
+        buckets = self._connection().execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
+        return {"backend": self.name, "buckets": buckets}
+
+
+def create_rate_limit_backend(backend: str = None, url: str = None) -> RateLimitBackend:
+    """Создать хранилище вёдер по настройкам"""
+    backend = backend or settings.RATE_LIMIT_BACKEND
+    url = url if url is not None else settings.RATE_LIMIT_URL
+    
+    if backend == "memory":
+        return MemoryRateLimitBackend()
+    if backend == "sqlite":
+        return SQLiteRateLimitBackend(url or "./ratelimit.db")
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+# Общее хранилище вёдер процесса: его используют middleware приложения и подзапросы POST /batch
+rate_limit_backend = create_rate_limit_backend()
+
+
+def default_limits() -> Dict[str, BucketLimit]:
+    return {
+        "api": BucketLimit(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST),
+        "auth": BucketLimit(settings.RATE_LIMIT_AUTH_PER_SECOND, settings.RATE_LIMIT_AUTH_BURST),
+    }
+
+
+def route_cost(method: str, path: str) -> Tuple[float, str]:
+    """Стоимость запроса и имя ведра"""
+    for rule in RATE_LIMIT_RULES:
+        if (rule.method is None or rule.method == method) and path.startswith(rule.prefix):
+            return rule.cost, rule.bucket
+    return 1.0, "api"
+
+
+def client_identity(scope) -> str:
+    """Пользователь из JWT или IP клиента (нет токена или он недействителен)"""
+    from app.core.security import verify_token_claims
+    
+    authorization = dict(scope["headers"]).get(b"authorization", b"")
+    if authorization[:7].lower() == b"bearer ":
+        try:
+            sub, _ = verify_token_claims(authorization[7:].decode("latin-1").strip())
+            return f"user:{sub}"
+        except HTTPException:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: списание из ведра до обработчика, 429 с Retry-After при исчерпании"""
+    
+    def __init__(
+        self,
+        app,
+        backend: Optional[RateLimitBackend] = None,
+        limits: Optional[Dict[str, BucketLimit]] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.app = app
+        self.backend = backend or rate_limit_backend
+        self.limits = limits or default_limits()
+        self.enabled = settings.RATE_LIMIT_ENABLED if enabled is None else enabled
+    
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS" \
+                or scope["path"] == "/" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+        
+        cost, bucket = route_cost(scope["method"], scope["path"])
+        limit = self.limits[bucket]
+        key = f"{bucket}:{client_identity(scope)}"
+        cost = min(cost, limit.capacity)  # Иначе запрос не прошёл бы никогда
+        
+        if self.backend.blocking:
+            state = await run_in_threadpool(self.backend.take, key, cost, limit)
+        else:
+            state = self.backend.take(key, cost, limit)
+        
+        limit_headers = [
+            (b"x-ratelimit-limit", str(int(limit.capacity)).encode()),
+            (b"x-ratelimit-remaining", str(int(state.remaining)).encode()),
+        ]
+        if not state.allowed:
+            body = json.dumps({"detail": "Too many requests"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(state.retry_after))).encode()),
+                ] + limit_headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + limit_headers}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
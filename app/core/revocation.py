@@ -0,0 +1,117 @@
+"""
+Структура отзыва токенов в памяти процесса.
+
+Отозванные jti хранятся в блум-фильтре и точном словаре jti -> exp:
+почти все проверки (токен не отозван) заканчиваются на фильтре без обращения к словарю.
+Позиции битов считаются из встроенного hash() строки — он кэшируется в самом объекте str,
+поэтому проверка не создаёт новых объектов и не хэширует токен заново.
+Отзыв всех токенов пользователя — словарь sub -> момент отзыва (токены с iat раньше него недействительны).
+"""
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, Tuple
+
+_MASK32 = 0xFFFFFFFF
+
+
+class RevocationFilter:
+    """Блум-фильтр + точное множество отозванных jti и отзыв по пользователю"""
+    
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._lock = threading.Lock()
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._exact: Dict[str, float] = {}  # jti -> exp
+        self._users: Dict[Any, float] = {}  # sub -> момент отзыва
+        self.stats = {"filter_passes": 0, "false_positives": 0}
+    
+    def _set_bits(self, bits: bytearray, jti: str) -> None:
+        h = hash(jti)
+        h1, h2 = h & _MASK32, ((h >> 32) & _MASK32) | 1
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % self.num_bits
+            bits[position >> 3] |= 1 << (position & 7)
+    
+    def _might_contain(self, jti: str) -> bool:
+        bits = self._bits
+        num_bits = self.num_bits
+        h = hash(jti)
+        h1, h2 = h & _MASK32, ((h >> 32) & _MASK32) | 1
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+    
+    def add(self, jti: str, exp: float) -> None:
+        """Отозвать токен по jti (хранится до exp)"""
+        with self._lock:
+            self._set_bits(self._bits, jti)
+            self._exact[jti] = exp
+    
+    def add_user(self, sub: Any, revoked_at: float) -> None:
+        """Отозвать все токены пользователя, выданные раньше revoked_at"""
+        with self._lock:
+            self._users[sub] = max(revoked_at, self._users.get(sub, 0.0))
+    
+    def is_revoked(self, jti: str, sub: Any, iat: float) -> bool:
+        """Горячий путь: O(1), без блокировок"""
+        if self._users:
+            revoked_at = self._users.get(sub)
+            if revoked_at is not None and iat < revoked_at:
+                return True
+        if not self._exact or not self._might_contain(jti):
+            return False
+        self.stats["filter_passes"] += 1
+        if jti in self._exact:
+            return True
+        self.stats["false_positives"] += 1
+        return False
+    
+    def rebuild(
+        self,
+        tokens: Iterable[Tuple[str, float]],
+        users: Iterable[Tuple[Any, float]],
+        user_ttl: float
+    ) -> None:
+        """
+        Пересобрать структуру (блум-фильтр не умеет удалять — так из него уходят истёкшие jti).
+        Отзывы пользователей старше user_ttl (максимального срока жизни токена) отбрасываются.
+        Новые биты и словари подменяются целиком.
+        """
+        now = time.time()
+        users_since = now - user_ttl
+        bits = bytearray(len(self._bits))
+        exact: Dict[str, float] = {}
+        for jti, exp in tokens:
+            if exp > now:
+                self._set_bits(bits, jti)
+                exact[jti] = exp
+        revoked_users: Dict[Any, float] = {}
+        for sub, revoked_at in users:
+            if revoked_at > users_since:
+                revoked_users[sub] = max(revoked_at, revoked_users.get(sub, 0.0))
+        
+        with self._lock:
+            # Отзывы, добавленные во время пересборки, не теряются
+            for jti, exp in self._exact.items():
+                if jti not in exact and exp > now:
+                    self._set_bits(bits, jti)
+                    exact[jti] = exp
+            for sub, revoked_at in self._users.items():
+                if revoked_at > users_since:
+                    revoked_users[sub] = max(revoked_at, revoked_users.get(sub, 0.0))
+            self._bits, self._exact, self._users = bits, exact, revoked_users
+    
+    def info(self) -> Dict[str, Any]:
+        return {
+            "revoked_tokens": len(self._exact),
+            "revoked_users": len(self._users),
+            "filter_bits": self.num_bits,
+            "filter_hashes": self.num_hashes,
+            **self.stats,
+        }
@@ -1,17 +1,29 @@
 """
 Модуль безопасности для работы с JWT токенами и паролями.
 """
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 import jwt
 
 from app.core.config import settings
+from app.core.revocation import RevocationFilter
 
 # Контекст для хэширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# При изменении параметров (схема, bcrypt rounds) старые хэши обновляются при входе
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+
+# Значение claim "type" у refresh-токенов (у access-токенов claim отсутствует)
+REFRESH_TOKEN_TYPE = "refresh"
 
 # HTTP Bearer схема для извлечения токена из заголовка
 # auto_error=False позволяет обрабатывать ошибки вручную
@@ -28,8 +40,71 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; второй элемент — новый хэш, если текущий устарел"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Отдельный ограниченный пул потоков для bcrypt.
+    Хэширование не занимает общий пул обработчиков запросов; если в пуле и очереди
+    нет места, запрос сразу получает 503 вместо ожидания.
+    """
+    
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.stats = {"completed": 0, "rejected": 0, "in_flight": 0, "total_ms": 0.0, "max_ms": 0.0}
+    
+    async def run(self, func: Callable, *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        
+        with self._lock:
+            self.stats["in_flight"] += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._slots.release()
+            with self._lock:
+                self.stats["in_flight"] -= 1
+                self.stats["completed"] += 1
+                self.stats["total_ms"] += elapsed_ms
+                self.stats["max_ms"] = max(self.stats["max_ms"], elapsed_ms)
+    
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update_password, plain_password, hashed_password)
+    
+    def info(self) -> Dict[str, Any]:
+        """Метрики: время включает ожидание в очереди пула"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_ms"] = round(stats["total_ms"] / stats["completed"], 2) if stats["completed"] else None
+        stats["total_ms"] = round(stats["total_ms"], 2)
+        stats["max_ms"] = round(stats["max_ms"], 2)
+        return {"workers": self.workers, "capacity": self.capacity, **stats}
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Создание JWT токена"""
+    """Создание JWT токена (короткоживущий access-токен, продлевается через refresh-токен)"""
     to_encode = data.copy()
     
     if expires_delta:
@@ -37,12 +112,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # iat с долями секунды: токен, выданный сразу после отзыва пользователя, не считается отозванным
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
     
     return encoded_jwt
 
 
+def create_refresh_token(user_id: int) -> str:
+    """Создание refresh-токена (принимается только эндпоинтом /auth/refresh)"""
+    return create_access_token(
+        data={"sub": user_id, "type": REFRESH_TOKEN_TYPE},
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+
 def decode_access_token(token: str) -> dict:
     """Декодирование JWT токена"""
     try:
@@ -60,23 +144,184 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-def get_current_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> int:
-    """Получение ID текущего пользователя из токена"""
+def decode_refresh_token(token: str) -> dict:
+    """Декодирование refresh-токена"""
+    payload = decode_access_token(token)
+    if payload.get("type") != REFRESH_TOKEN_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    return payload
+
+
+def token_jti(payload: dict, token: str) -> str:
+    """jti токена; для токенов, выданных до появления jti, — хэш самого токена"""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Кэш проверенных токенов: sha256(токен) -> (sub, exp, iat, role, jti).
+    Повторная проверка горячего токена — поиск в словаре вместо jwt.decode.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tokens: "OrderedDict[bytes, Tuple[Any, float, float, Optional[str], str]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+    
+    @staticmethod
+    def token_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, key: bytes) -> Optional[Tuple[Any, float, float, Optional[str], str]]:
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._tokens.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+    
+    def put(self, key: bytes, entry: Tuple[Any, float, float, Optional[str], str]) -> None:
+        with self._lock:
+            self._tokens[key] = entry
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def discard(self, key: bytes) -> None:
+        with self._lock:
+            self._tokens.pop(key, None)
+    
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._tokens), **self.stats}
+
+
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+# Отозванные токены и пользователи; наполняется из таблицы token_revocations (token_service)
+revocations = RevocationFilter(settings.REVOCATION_FILTER_CAPACITY)
+
+
+def verify_token_claims(token: str) -> Tuple[Any, Optional[str]]:
+    """
+    Проверить access-токен и вернуть (sub, role).
+    Подпись проверяется один раз, дальше — по кэшу с учётом exp и отзыва.
+    """
+    key = VerifiedTokenCache.token_key(token)
+    entry = verified_tokens.get(key)
+    if entry is None:
+        payload = decode_access_token(token)
+        sub = payload.get("sub")
+        if sub is None or payload.get("type") == REFRESH_TOKEN_TYPE:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials"
+            )
+        entry = (sub, float(payload["exp"]), float(payload.get("iat", 0)), payload.get("role"), token_jti(payload, token))
+        verified_tokens.put(key, entry)
+    
+    sub, exp, iat, role, jti = entry
+    if exp <= time.time():
+        verified_tokens.discard(key)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired"
+        )
+    if revocations.is_revoked(jti, sub, iat):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    
+    return sub, role
+
+
+def verify_token(token: str) -> Any:
+    """Проверить токен и вернуть sub"""
+    return verify_token_claims(token)[0]
+
+
+# Гостевые сессии: подписанный токен с sub "guest:<uuid>" и role "guest", без записи в users
+GUEST_SUBJECT_PREFIX = "guest:"
+
+
+def is_guest_subject(sub: Any) -> bool:
+    """sub принадлежит гостевой сессии без записи в БД"""
+    return isinstance(sub, str) and sub.startswith(GUEST_SUBJECT_PREFIX)
+
+
+def create_guest_token() -> str:
+    """Выдать токен гостевой сессии"""
+    return create_access_token(
+        data={"sub": f"{GUEST_SUBJECT_PREFIX}{uuid.uuid4().hex}", "role": "guest"},
+        expires_delta=timedelta(minutes=settings.GUEST_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+class Principal:
+    """Владелец токена: пользователь из БД или гостевая сессия"""
+    
+    __slots__ = ("subject", "role")
+    
+    def __init__(self, subject: Any, role: Optional[str] = None):
+        self.subject = subject
+        self.role = role
+    
+    @property
+    def is_guest(self) -> bool:
+        return is_guest_subject(self.subject)
+    
+    @property
+    def user_id(self) -> Optional[int]:
+        return None if self.is_guest else self.subject
+
+
+def _require_credentials(credentials: Optional[HTTPAuthorizationCredentials]) -> str:
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return credentials.credentials
+
+
+def _batch_principal(request: Request) -> Optional[Principal]:
+    """Владелец токена, уже проверенного запросом POST /batch (общий для его подзапросов)"""
+    return request.scope.get("state", {}).get("principal")
+
+
+def get_current_principal(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Principal:
+    """Владелец токена без обращения к БД (для эндпоинтов, доступных гостевым сессиям)"""
+    principal = _batch_principal(request)
+    if principal is not None:
+        return principal
+    sub, role = verify_token_claims(_require_credentials(credentials))
+    return Principal(sub, role)
+
+
+def get_current_user_id(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> int:
+    """Получение ID текущего пользователя из токена"""
+    principal = _batch_principal(request)
+    user_id = principal.subject if principal is not None else verify_token(_require_credentials(credentials))
     
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    user_id: int = payload.get("sub")
-    
-    if user_id is None:
+    if is_guest_subject(user_id):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Guest sessions are read-only. Register via POST /auth/guest/upgrade to continue"
         )
     
     return user_id
@@ -118,6 +363,10 @@ def check_board_access(board, user_id: int, user_role: str, action: str = "read"
     if user_role == "admin":
         return True
     
+    # Гостевая сессия без записи в БД — участников не проверяем
+    if is_guest_subject(user_id):
+        return _check_guest_access(board, action)
+    
     # Владелец доски (автор) имеет полный доступ
     if board.created_by == user_id:
         return True
@@ -152,17 +401,7 @@ def check_board_access(board, user_id: int, user_role: str, action: str = "read"
     
     # Гости могут только просматривать публичные доски
     if user_role == "guest":
-        if action != "read":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Guests can only view public boards"
-            )
-        if not board.public:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="This board is private. Guests can only view public boards"
-            )
-        return True
+        return _check_guest_access(board, action)
     
     # Все пользователи могут читать публичные доски
     if action == "read" and board.public:
@@ -173,3 +412,45 @@ def check_board_access(board, user_id: int, user_role: str, action: str = "read"
         status_code=status.HTTP_403_FORBIDDEN,
         detail="Access denied. You are not a member of this board"
     )
+
+
+def _check_guest_access(board, action: str) -> bool:
+    """Гости могут только просматривать публичные доски"""
+    if action != "read":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Guests can only view public boards"
+        )
+    if not board.public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This board is private. Guests can only view public boards"
+        )
+    return True
+
+
+def get_principal_role(principal: Principal, db=None) -> str:
+    """
+    Роль владельца токена.
+    Для гостевой сессии — guest без обращения к БД, иначе роль пользователя из users.
+    """
+    if principal.is_guest:
+        return "guest"
+    
+    from app.services import user_service
+    
+    user = user_service.get_user_by_id(db, principal.user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user.role
+
+
+def check_principal_board_access(board, principal: Principal, action: str = "read", db=None):
+    """
+    Проверка прав доступа к доске для владельца токена.
+    Гостевые сессии проверяются без обращения к БД.
+    """
+    return check_board_access(board, principal.subject, get_principal_role(principal, db), action, db)
@@ -0,0 +1,120 @@
+"""
+Объединение одинаковых конкурентных запросов (singleflight) с коротким микро-кэшем.
+
+Одновременные запросы с одним ключом ждут одно вычисление.
+Результат хранится ttl секунд; ещё stale секунд отдаётся устаревший результат,
+а обновление идёт в фоне одним потоком (stale-while-revalidate).
+Инвалидация по тегам действует в пределах процесса — между процессами
+расхождение ограничено ttl + stale.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class _Entry:
+    __slots__ = ("value", "created_at", "tags")
+    
+    def __init__(self, value: Any, tags: Tuple[str, ...]):
+        self.value = value
+        self.created_at = time.monotonic()
+        self.tags = tags
+
+
+class SingleFlightCache:
+    """Кэш с объединением конкурентных вычислений и stale-while-revalidate"""
+    
+    def __init__(self, ttl: float, stale: float = 0.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._generations: Dict[str, int] = {}  # Версия тега растёт при каждой инвалидации
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0}
+    
+    def get(self, key: Hashable, compute: Callable[[], Any], tags: Iterable[str] = ()) -> Any:
+        """
+        Получить значение по ключу, вычислив его при необходимости.
+        Исключение вычисления получают все ожидающие, но оно не кэшируется.
+        """
+        tags = tuple(tags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.created_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry.value
+                if age < self.ttl + self.stale:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if key not in self._in_flight:
+                        future = self._start(key, tags)
+                        threading.Thread(
+                            target=self._run, args=(key, compute, tags, future), daemon=True
+                        ).start()
+                    return entry.value
+                del self._entries[key]
+            
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                self.stats["misses"] += 1
+                future = self._start(key, tags)
+                leader = True
+        
+        if leader:
+            self._run(key, compute, tags, future)
+        return future.result()
+    
+    def invalidate(self, *tags: str) -> None:
+        """Удалить записи с любым из тегов; идущие вычисления не попадут в кэш"""
+        targets: Set[str] = set(tags)
+        with self._lock:
+            for tag in targets:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in [key for key, entry in self._entries.items() if targets.intersection(entry.tags)]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = {tag: version + 1 for tag, version in self._generations.items()}
+            self._entries.clear()
+    
+    def _start(self, key: Hashable, tags: Tuple[str, ...]) -> Future:
+        future: Future = Future()
+        future.generations = tuple(self._generations.get(tag, 0) for tag in tags)
+        self._in_flight[key] = future
+        return future
+    
+    def _run(self, key: Hashable, compute: Callable[[], Any], tags: Tuple[str, ...], future: Future) -> None:
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            return
+        
+        with self._lock:
+            self._in_flight.pop(key, None)
+            # Если за время вычисления тег инвалидировали, результат мог устареть — не кэшируем
+            current = tuple(self._generations.get(tag, 0) for tag in tags)
+            if current == future.generations:
+                self._entries[key] = _Entry(value, tags)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+    
+    def info(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        with self._lock:
+            return {"entries": len(self._entries), "in_flight": len(self._in_flight), **self.stats}
@@ -2,23 +2,105 @@
 Конфигурация базы данных.
 Подключение к SQLite через SQLAlchemy.
 """
+import functools
+import random
+import threading
+import time
+from typing import Callable, Dict, TypeVar
+
+from fastapi import HTTPException, Request, status
 from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.pool import StaticPool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.util import identity_key
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
+
+class WriteMetrics:
+    """Счётчики транзакций записи: ожидание блокировки, SQLITE_BUSY и повторы"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "transactions": 0,
+            "busy_errors": 0,
+            "retries": 0,
+            "failures": 0,
+            "lock_waits": 0,
+        }
+        self.lock_wait_seconds = 0.0
+        self.max_lock_wait_seconds = 0.0
+    
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+    
+    def observe_lock_wait(self, seconds: float) -> None:
+        # Захват свободной блокировки занимает микросекунды; дольше — ждали другого писателя
+        if seconds < 0.001:
+            return
+        with self._lock:
+            self.counters["lock_waits"] += 1
+            self.lock_wait_seconds += seconds
+            self.max_lock_wait_seconds = max(self.max_lock_wait_seconds, seconds)
+    
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "lock_wait_seconds": round(self.lock_wait_seconds, 3),
+                "max_lock_wait_seconds": round(self.max_lock_wait_seconds, 3),
+            }
+
+
+write_metrics = WriteMetrics()
+
+# Операторы, не требующие транзакции записи (по первому слову)
+READ_STATEMENTS = frozenset(("SELECT", "WITH", "PRAGMA", "EXPLAIN"))
+
+
+def _begin_immediate(conn) -> None:
+    start = time.perf_counter()
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    write_metrics.observe_lock_wait(time.perf_counter() - start)
+
+
+def _set_busy_timeout(conn, busy_timeout_ms: int) -> None:
+    if conn.info.get("busy_timeout_ms") != busy_timeout_ms:
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+        conn.info["busy_timeout_ms"] = busy_timeout_ms
+
+
+def _begin_write(conn) -> None:
+    """
+    Начать запись в уже открытой транзакции сессии (проверки доступа в роутере):
+    её BEGIN отложен до первой записи, так что BEGIN IMMEDIATE выполняется сразу, без COMMIT.
+    Соединение, уже начавшее запись, и не-SQLite движки не затрагиваются.
+    """
+    if conn.info.get("lazy_begin"):
+        conn.info["lazy_begin"] = False
+        _set_busy_timeout(conn, settings.DATABASE_WRITE_BUSY_TIMEOUT_MS)
+        _begin_immediate(conn)
+
+
 # Создание движка базы данных с оптимизацией connection pooling
 if settings.DATABASE_URL.startswith("sqlite"):
-    # Для SQLite используем StaticPool с оптимизациями
+    # БД в памяти живёт, пока открыто соединение, — для неё одно общее соединение (StaticPool).
+    # Для файла — пул: у каждого потока своё соединение и своя транзакция
+    in_memory = settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={
             "check_same_thread": False,  # Необходимо для SQLite
-            "timeout": 20,  # Таймаут для блокировок (20 секунд)
+            "timeout": settings.DATABASE_BUSY_TIMEOUT_SECONDS,  # Таймаут для блокировок
         },
-        poolclass=StaticPool,
+        poolclass=StaticPool if in_memory else QueuePool,
+        **({} if in_memory else {"pool_size": 10, "max_overflow": 20}),
         pool_pre_ping=True,  # Проверка соединения перед использованием
         echo=False,  # Отключить логирование SQL (экономия ресурсов)
     )
@@ -26,6 +108,8 @@ if settings.DATABASE_URL.startswith("sqlite"):
     # Оптимизация SQLite для лучшей производительности
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_conn, connection_record):
+        # Транзакции начинает событие begin ниже (драйвер sqlite3 не умеет BEGIN IMMEDIATE)
+        dbapi_conn.isolation_level = None
         cursor = dbapi_conn.cursor()
         cursor.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging для лучшей производительности
         cursor.execute("PRAGMA synchronous=NORMAL")  # Баланс между производительностью и надежностью
@@ -33,6 +117,40 @@ if settings.DATABASE_URL.startswith("sqlite"):
         cursor.execute("PRAGMA temp_store=MEMORY")  # Временные таблицы в памяти
         cursor.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped I/O
         cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def begin_sqlite_transaction(conn):
+        """
+        BEGIN IMMEDIATE для транзакций записи (write_transaction): блокировка записи
+        берётся сразу, с коротким busy_timeout, а не при первом UPDATE, когда
+        отложенную транзакцию уже нельзя повысить и SQLite возвращает SQLITE_BUSY.
+        """
+        immediate = conn.get_execution_options().get("sqlite_immediate", False)
+        busy_timeout_ms = (
+            settings.DATABASE_WRITE_BUSY_TIMEOUT_MS if immediate
+            else int(settings.DATABASE_BUSY_TIMEOUT_SECONDS * 1000)
+        )
+        _set_busy_timeout(conn, busy_timeout_ms)
+        
+        if not immediate:
+            # Чтение идёт без транзакции, как в драйвере sqlite3 по умолчанию: снимок
+            # чтения, открытый заранее, не дал бы позже начать запись (SQLITE_BUSY сразу)
+            conn.info["lazy_begin"] = True
+            return
+        conn.info["lazy_begin"] = False
+        _begin_immediate(conn)
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def begin_before_write(conn, cursor, statement, parameters, context, executemany):
+        """Отложенная транзакция начинается с BEGIN IMMEDIATE перед первой записью"""
+        if conn.info.get("lazy_begin") and statement.split(None, 1)[0].upper() not in READ_STATEMENTS:
+            conn.info["lazy_begin"] = False
+            _begin_immediate(conn)
+    
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def end_sqlite_transaction(conn):
+        conn.info["lazy_begin"] = False
 else:
     # Для PostgreSQL/MySQL используем QueuePool
     engine = create_engine(
@@ -52,11 +170,17 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
     """
     Dependency для получения сессии базы данных.
     Используется в FastAPI endpoints.
+    Подзапросы POST /batch используют общую сессию батча (её закрывает сам батч).
     """
+    shared = request.scope.get("state", {}).get("db")
+    if shared is not None:
+        yield shared
+        return
+    
     db = SessionLocal()
     try:
         yield db
@@ -64,18 +188,111 @@ def get_db():
         db.close()
 
 
+def is_busy_error(error: OperationalError) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED: БД занята другим писателем"""
+    code = getattr(error.orig, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (5, 6)
+    return "database is locked" in str(error.orig) or "database table is locked" in str(error.orig)
+
+
+def run_write_transaction(db: Session, work: Callable[[], T]) -> T:
+    """
+    Выполнить единицу работы записи в транзакции BEGIN IMMEDIATE.
+    При SQLITE_BUSY транзакция откатывается и work() повторяется целиком
+    с экспоненциальной задержкой со случайным разбросом (full jitter);
+    после исчерпания попыток — 503. work() сама делает commit, как и раньше.
+    Вложенные вызовы выполняются в транзакции внешнего.
+    """
+    if db.info.get("write_transaction"):
+        return work()
+    
+    attempts = settings.DATABASE_WRITE_RETRIES + 1
+    db.info["write_transaction"] = True
+    try:
+        for attempt in range(attempts):
+            try:
+                if db.in_transaction():
+                    _begin_write(db.connection())
+                else:
+                    db.connection(execution_options={"sqlite_immediate": True})
+                result = work()
+                write_metrics.incr("transactions")
+                return result
+            except OperationalError as e:
+                db.rollback()
+                if not is_busy_error(e):
+                    raise
+                write_metrics.incr("busy_errors")
+                if attempt + 1 == attempts:
+                    break
+                write_metrics.incr("retries")
+                backoff = min(
+                    settings.DATABASE_WRITE_RETRY_MAX_MS,
+                    settings.DATABASE_WRITE_RETRY_BASE_MS * 2 ** attempt
+                )
+                time.sleep(random.uniform(0, backoff) / 1000)
+    finally:
+        db.info.pop("write_transaction", None)
+    
+    write_metrics.incr("failures")
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database is busy, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+def write_transaction(func: Callable[..., T]) -> Callable[..., T]:
+    """Декоратор сервисной функции записи (сессия — первый аргумент), см. run_write_transaction"""
+    @functools.wraps(func)
+    def wrapper(db: Session, *args, **kwargs) -> T:
+        return run_write_transaction(db, lambda: func(db, *args, **kwargs))
+    
+    return wrapper
+
+
+def execute_returning(db: Session, stmt, model=None, pk=None):
+    """
+    Выполнить INSERT/UPDATE ... RETURNING <модель>: запись и чтение результата — один запрос,
+    без refresh после коммита. Возвращает объект или None (ни одна строка не затронута).
+    Уже загруженный в сессию объект (pk) помечается устаревшим, иначе ORM не перезапишет его поля
+    значениями из RETURNING. Результат отсоединяется от сессии: коммит не сделает его устаревшим
+    и ответ сериализуется без повторного SELECT.
+    """
+    if pk is not None:
+        existing = db.identity_map.get(identity_key(model, pk))
+        if existing is not None:
+            db.expire(existing)
+    
+    instance = db.execute(stmt, execution_options={"synchronize_session": False}).scalar_one_or_none()
+    if instance is not None:
+        db.expunge(instance)
+    return instance
+
+
 def init_db():
     """
     Инициализация базы данных.
     Создание всех таблиц.
     """
     # Импортируем все модели, чтобы SQLAlchemy знал о них
-    from app.models import user, board, task, board_member, comment, audit_log
+    from app.models import user, board, task, board_member, comment, audit_log, job, token_revocation, archive
     
     # Создание всех таблиц
     Base.metadata.create_all(bind=engine)
     # Применяем миграции для существующих БД (добавляем отсутствующие колонки)
     _run_schema_migrations()
+    # create_all() не добавляет новые индексы в уже существующие таблицы
+    _create_missing_indexes()
+
+
+def _create_missing_indexes():
+    """Создаёт индексы, объявленные в моделях, если их ещё нет в БД."""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
 
 
 def _run_schema_migrations():
@@ -104,3 +321,38 @@ def _run_schema_migrations():
                 conn.commit()
             except Exception:
                 conn.rollback()
+        if "comment_count" not in columns:
+            try:
+                conn.execute(text("ALTER TABLE tasks ADD COLUMN comment_count INTEGER DEFAULT 0 NOT NULL"))
+                # Заполняем счётчик по уже существующим комментариям
+                conn.execute(text(
+                    "UPDATE tasks SET comment_count = "
+                    "(SELECT COUNT(*) FROM task_comments WHERE task_comments.task_id = tasks.id)"
+                ))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+        if "version" not in columns:
+            try:
+                conn.execute(text("ALTER TABLE tasks ADD COLUMN version INTEGER DEFAULT 1 NOT NULL"))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+        
+        board_columns = [row[1] for row in conn.execute(text("PRAGMA table_info(boards)")).fetchall()]
+        conn.commit()
+        if board_columns and "version" not in board_columns:
+            try:
+                conn.execute(text("ALTER TABLE boards ADD COLUMN version INTEGER DEFAULT 1 NOT NULL"))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+        
+        job_columns = [row[1] for row in conn.execute(text("PRAGMA table_info(jobs)")).fetchall()]
+        conn.commit()
+        if job_columns and "heartbeat_at" not in job_columns:
+            try:
+                conn.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME"))
+                conn.commit()
+            except Exception:
+                conn.rollback()
@@ -0,0 +1,42 @@
+"""
+Загрузка досок и задач из файла NDJSON/CSV из командной строки:
+    python -m app.importer tasks.ndjson --user admin@example.com [--board-id 1] [--format csv]
+"""
+import argparse
+import json
+import sys
+
+from app.database import SessionLocal, init_db
+from app.services import import_service, user_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка досок и задач Task Management System")
+    parser.add_argument("path", help="Файл NDJSON или CSV ('-' — стандартный ввод)")
+    parser.add_argument("--user", required=True, help="Email пользователя, от имени которого идёт загрузка")
+    parser.add_argument("--format", choices=import_service.IMPORT_FORMATS, default=None)
+    parser.add_argument("--board-id", type=int, default=None, help="Доска для задач без ссылки на доску")
+    args = parser.parse_args()
+    
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        user = user_service.get_user_by_email(db, args.user)
+        if not user:
+            sys.exit(f"User not found: {args.user}")
+        
+        stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with stream:
+            result = import_service.import_data(
+                db, stream, user.id, user.role, import_format, board_id=args.board_id
+            )
+    finally:
+        db.close()
+    
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
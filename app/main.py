@@ -5,8 +5,12 @@ Task Management System API.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
 from app.database import init_db
-from app.routers import auth, users, boards, tasks, stats, search, logs, bank_cards
+from app.routers import (
+    auth, users, boards, tasks, comments, stats, search, logs, bank_cards, jobs, exports, imports, batch, archive
+)
+from app.worker import JobWorker
 
 # Создание приложения FastAPI
 app = FastAPI(
@@ -17,19 +21,6 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Настройка CORS (оптимизировано)
-# В production установите CORS_ORIGINS в .env
-import os
-cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=cors_origins if os.getenv("ENV") == "production" else ["*"],
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-    allow_headers=["*"],
-    max_age=3600,  # Кэшировать preflight запросы на 1 час (экономия ресурсов)
-)
-
 # Middleware для логирования медленных запросов (оптимизация)
 from fastapi import Request
 import time
@@ -49,15 +40,58 @@ async def log_slow_requests(request: Request, call_next):
     
     return response
 
+# Idempotency-Key: повторы изменяющих запросов получают сохранённый ответ
+from app.core.idempotency import IdempotencyMiddleware
+app.add_middleware(IdempotencyMiddleware)
+
+# Контроль допуска: под перегрузкой первыми отклоняются низкоприоритетные запросы (503)
+from app.core.admission import AdmissionMiddleware
+app.add_middleware(AdmissionMiddleware)
+
+# Ограничение частоты запросов: проверяется до остальных middleware и обработчиков
+from app.core.ratelimit import RateLimitMiddleware
+app.add_middleware(RateLimitMiddleware)
+
+# Настройка CORS (оптимизировано)
+# В production установите CORS_ORIGINS в .env
+# Добавляется последним — внешний слой: заголовки CORS получают и ответы 429/503
+# от лимитов и контроля допуска, иначе браузер не отдаст их (и Retry-After) приложению
+import os
+cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=cors_origins if os.getenv("ENV") == "production" else ["*"],
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    allow_headers=["*"],
+    expose_headers=[
+        "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "ETag", "Location", "Idempotent-Replayed"
+    ],
+    max_age=3600,  # Кэшировать preflight запросы на 1 час (экономия ресурсов)
+)
+
 # Подключение роутеров
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(boards.router)
 app.include_router(tasks.router)
+app.include_router(comments.router)
 app.include_router(stats.router)
 app.include_router(search.router)
 app.include_router(logs.router)
 app.include_router(bank_cards.router)
+app.include_router(jobs.router)
+app.include_router(exports.router)
+app.include_router(imports.router)
+app.include_router(batch.router)
+app.include_router(archive.router)
+
+# Воркеры фоновых заданий внутри процесса приложения (JOB_WORKERS=0 - только внешний воркер)
+job_worker = JobWorker(concurrency=settings.JOB_WORKERS)
+
+# Синхронизация отозванных токенов из таблицы token_revocations
+from app.services.token_service import RevocationSync
+revocation_sync = RevocationSync()
 
 
 @app.on_event("startup")
@@ -67,12 +101,10 @@ def startup_event():
     Инициализация базы данных и автоматическое заполнение тестовыми данными.
     """
     import os
-    import sys
-    import importlib.util
     from sqlalchemy.orm import Session
     from app.database import SessionLocal
     from app.models.user import User
-    from app.services import user_service
+    from app.services import user_service, seed_service
     from app.core.security import get_password_hash
     from app.core.config import settings
     
@@ -93,28 +125,11 @@ def startup_event():
         if should_fill_db and not db_exists:
             print("\n🔄 Автоматическое заполнение базы данных тестовыми данными...")
             try:
-                # Получаем путь к fill_database.py
-                fill_db_path = os.path.join(os.path.dirname(__file__), "..", "fill_database.py")
-                fill_db_path = os.path.abspath(fill_db_path)
+                fill_db_path = seed_service.FILL_DATABASE_PATH
                 
                 if os.path.exists(fill_db_path):
-                    # Импортируем модуль fill_database
-                    spec = importlib.util.spec_from_file_location("fill_database", fill_db_path)
-                    fill_db_module = importlib.util.module_from_spec(spec)
-                    
-                    # Добавляем необходимые импорты в модуль
-                    sys.path.insert(0, os.path.dirname(fill_db_path))
-                    
-                    spec.loader.exec_module(fill_db_module)
-                    
-                    # Вызываем функции заполнения БД
                     # fill_database.py уже проверяет существующих пользователей, поэтому безопасно вызывать при каждом запуске
-                    users = fill_db_module.create_users(db)
-                    boards = fill_db_module.create_boards(db, users)
-                    tasks = fill_db_module.create_tasks(db, boards, users)
-                    fill_db_module.create_board_members(db, boards, users)
-                    fill_db_module.create_comments(db, tasks, users)
-                    fill_db_module.create_audit_logs(db, users, boards, tasks)
+                    seed_service.fill_test_data(db)
                     
                     # Статистика
                     from app.models.board import Board
@@ -209,6 +224,27 @@ def startup_event():
         traceback.print_exc()
     finally:
         db.close()
+    
+    # Отозванные токены: загрузка из БД и фоновая синхронизация с другими процессами
+    revocation_sync.start()
+    
+    if job_worker.concurrency > 0:
+        job_worker.start()
+        print(f"✓ Job worker started with {job_worker.concurrency} thread(s)")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Событие остановки приложения.
+    Останавливает воркеры фоновых заданий, синхронизацию отзывов токенов
+    и дописывает очередь группового коммита.
+    """
+    from app.services.task_service import task_writes
+    
+    job_worker.stop()
+    revocation_sync.stop()
+    task_writes.stop()
 
 
 @app.get("/health", tags=["Health"])
@@ -217,6 +253,20 @@ def health_check():
     Проверка здоровья API.
     Возвращает статус работы сервиса и метрики ресурсов.
     """
+    from app.core.cache import cache
+    from app.services.board_service import public_boards_cache
+    
+    from app.core.security import verified_tokens, password_hasher, revocations
+    from app.core.admission import admission
+    from app.database import write_metrics
+    from app.services.task_service import task_writes
+    
+    caches = {
+        "app": cache.info(),
+        "public_boards": public_boards_cache.info(),
+        "verified_tokens": verified_tokens.info(),
+        "revocations": revocations.info(),
+    }
     try:
         import psutil
         import os
@@ -224,6 +274,10 @@ def health_check():
         process = psutil.Process(os.getpid())
         return {
             "status": "ok",
+            "cache": caches,
+            "password_hashing": password_hasher.info(),
+            "admission": admission.info(),
+            "database": {**write_metrics.info(), "group_commit": task_writes.info()},
             "memory": {
                 "used_mb": round(process.memory_info().rss / 1024 / 1024, 2),
                 "percent": round(psutil.virtual_memory().percent, 2),
@@ -234,7 +288,14 @@ def health_check():
         }
     except ImportError:
         # Если psutil не установлен, возвращаем базовый статус
-        return {"status": "ok", "message": "Install psutil for detailed metrics"}
+        return {
+            "status": "ok",
+            "cache": caches,
+            "password_hashing": password_hasher.info(),
+            "admission": admission.info(),
+            "database": {**write_metrics.info(), "group_commit": task_writes.info()},
+            "message": "Install psutil for detailed metrics",
+        }
 
 
 @app.get("/", tags=["Root"])
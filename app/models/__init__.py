@@ -5,6 +5,12 @@ from app.models.task import Task
 from app.models.board_member import BoardMember
 from app.models.comment import TaskComment
 from app.models.audit_log import AuditLog
+from app.models.job import Job
+from app.models.token_revocation import TokenRevocation
+from app.models.archive import ArchivedTask, ArchivedComment
 
-__all__ = ["User", "Board", "Task", "BoardMember", "TaskComment", "AuditLog"]
+__all__ = [
+    "User", "Board", "Task", "BoardMember", "TaskComment", "AuditLog", "Job", "TokenRevocation",
+    "ArchivedTask", "ArchivedComment"
+]
 
@@ -0,0 +1,46 @@
+"""
+Модели архива задач.
+Архивные таблицы повторяют tasks и task_comments (ID задач сохраняются, ID комментария —
+в comment_id), но без внешних ключей и связей: строки переносятся туда и обратно
+set-based запросами (archive_service).
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+from app.database import Base
+
+
+class ArchivedTask(Base):
+    """Задача в архиве: доска архивирована или задача давно выполнена"""
+    
+    __tablename__ = "archived_tasks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # ID задачи в tasks
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    status = Column(String, nullable=False)
+    priority = Column(String, nullable=False)
+    order = Column(Integer, default=0, nullable=False)
+    parent_task_id = Column(Integer, nullable=True)
+    board_id = Column(Integer, nullable=False, index=True)
+    created_by = Column(Integer, nullable=False, index=True)
+    assignee_id = Column(Integer, nullable=True)
+    comment_count = Column(Integer, default=0, nullable=False)
+    version = Column(Integer, default=1, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    archive_reason = Column(String, nullable=False)  # board_archived, done_expired
+
+
+class ArchivedComment(Base):
+    """Комментарий архивной задачи"""
+    
+    __tablename__ = "archived_task_comments"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    comment_id = Column(Integer, nullable=False)  # ID комментария в task_comments
+    task_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
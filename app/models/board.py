@@ -19,6 +19,7 @@ class Board(Base):
     public = Column(Boolean, default=False, nullable=False)  # Публичная доска или нет
     archived = Column(Boolean, default=False, nullable=False)  # Архивирована ли доска
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    version = Column(Integer, default=1, nullable=False)  # Версия для оптимистичных блокировок (ETag)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -13,8 +13,8 @@ class BoardMember(Base):
     __tablename__ = "board_members"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationships
     board = relationship("Board", back_populates="members")
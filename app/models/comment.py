@@ -2,7 +2,7 @@
 Модель комментария к задаче.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,6 +12,12 @@ class TaskComment(Base):
     """Комментарий к задаче"""
     
     __tablename__ = "task_comments"
+    __table_args__ = (
+        # Курсорная пагинация по (task_id, created_at, id)
+        Index("ix_task_comments_task_created", "task_id", "created_at", "id"),
+        # ID архивных комментариев не выдаются повторно (в SQLite-базах, созданных заново)
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
@@ -0,0 +1,36 @@
+"""
+Модель фоновой задачи (очередь заданий).
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+
+from app.database import Base
+
+
+class Job(Base):
+    """Фоновое задание в персистентной очереди"""
+    
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Выборка следующего задания воркером
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    type = Column(String, nullable=False)  # board.delete, user.delete, tasks.bulk_delete, ...
+    payload = Column(Text, nullable=True)  # Аргументы обработчика в JSON
+    status = Column(String, default="queued", nullable=False)  # queued, running, succeeded, failed
+    dedupe_key = Column(String, nullable=True, index=True)  # Не ставить в очередь дубликаты активных заданий
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    progress_current = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)  # Результат обработчика в JSON
+    error = Column(Text, nullable=True)
+    locked_by = Column(String, nullable=True)  # Идентификатор воркера, выполняющего задание
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Не запускать раньше (backoff)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Продление аренды выполняющим воркером
+    finished_at = Column(DateTime, nullable=True)
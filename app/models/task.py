@@ -12,6 +12,8 @@ class Task(Base):
     """Задача на доске"""
     
     __tablename__ = "tasks"
+    # AUTOINCREMENT: ID удалённых и архивных задач не выдаются повторно (в SQLite-базах, созданных заново)
+    __table_args__ = {"sqlite_autoincrement": True}
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String, nullable=False)
@@ -20,9 +22,11 @@ class Task(Base):
     priority = Column(String, default="medium", nullable=False)  # low, medium, high
     order = Column(Integer, default=0, nullable=False)  # Порядок сортировки задач
     parent_task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)  # Для подзадач
-    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)
+    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False, index=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Назначенный пользователь
+    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Назначенный пользователь
+    comment_count = Column(Integer, default=0, nullable=False)  # Денормализованный счётчик комментариев
+    version = Column(Integer, default=1, nullable=False)  # Версия для оптимистичных блокировок (ETag)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
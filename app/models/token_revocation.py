@@ -0,0 +1,22 @@
+"""
+Модель отзыва токенов.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.database import Base
+
+
+class TokenRevocation(Base):
+    """
+    Отозванный токен (jti) или все токены пользователя (jti пустой, user_id задан).
+    Запись нужна до expires_at — после этого отозванный токен истёк бы и сам.
+    """
+    
+    __tablename__ = "token_revocations"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    jti = Column(String, nullable=True, unique=True)  # Уникальность делает ротацию refresh-токена атомарной
+    user_id = Column(Integer, nullable=True, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
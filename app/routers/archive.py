@@ -0,0 +1,80 @@
+"""
+Роутер для архива задач.
+Чтение архива — через обычные эндпоинты досок и задач с archived=true.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.archive import ArchiveRestoreRequest, ArchiveRestoreResponse
+from app.services import archive_service, board_service, user_service, job_service
+from app.core.security import get_current_user_id, check_board_access
+
+router = APIRouter(prefix="/archive", tags=["Archive"])
+
+
+@router.post("/sweep", status_code=status.HTTP_202_ACCEPTED)
+def sweep_done_tasks(
+    older_than_days: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Перенести в архив выполненные задачи, не изменявшиеся дольше older_than_days
+    (по умолчанию ARCHIVE_DONE_AFTER_DAYS), фоновым заданием.
+    Только для администраторов. Прогресс: GET /jobs/{job_id}.
+    """
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user or user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can archive tasks"
+        )
+    
+    job = job_service.enqueue(
+        db, "archive.done_tasks", {"older_than_days": older_than_days},
+        user_id=current_user_id, dedupe_key="archive.done_tasks"
+    )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_service.job_location(job))
+
+
+@router.post("/restore", response_model=ArchiveRestoreResponse)
+def restore_tasks(
+    payload: ArchiveRestoreRequest,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Вернуть задачи из архива: списком task_ids или всю доску (board_id).
+    Восстанавливаются только задачи досок с правом записи; задачи архивированных досок
+    возвращаются при разархивации доски. Задачи, чей ID уже занят, остаются в архиве (conflicts).
+    """
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user or user.role == "guest":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Guests cannot restore tasks"
+        )
+    
+    if payload.task_ids is not None:
+        writable_boards = board_service.get_writable_board_ids_query(db, current_user_id, user.role)
+        return archive_service.restore_tasks(db, payload.task_ids, writable_boards)
+    
+    board = board_service.get_board_by_id(db, payload.board_id)
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    check_board_access(board, current_user_id, user.role, action="write", db=db)
+    
+    if board.archived:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Board is archived: unarchive it to restore its tasks"
+        )
+    
+    return archive_service.restore_board_tasks(db, payload.board_id, reason=None)
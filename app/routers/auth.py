@@ -1,20 +1,28 @@
 """
 Роутер для аутентификации.
 Регистрация первого админа и логин.
+
+Эндпоинты асинхронные: bcrypt выполняется в отдельном пуле (password_hasher),
+а запросы к БД — в общем пуле потоков, чтобы всплеск логинов не занимал его целиком.
 """
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.schemas.auth import RegisterAdminRequest, LoginRequest, TokenResponse
-from app.services import user_service
-from app.core.security import verify_password, create_access_token
+from app.schemas.auth import RegisterAdminRequest, LoginRequest, TokenResponse, RefreshRequest, LogoutRequest
+from app.services import user_service, token_service
+from app.core.security import (
+    create_guest_token, security, password_hasher, get_current_principal, Principal
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register-admin", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register_admin(
+async def register_admin(
     admin_data: RegisterAdminRequest,
     db: Session = Depends(get_db)
 ):
@@ -23,7 +31,7 @@ def register_admin(
     Доступно только если в системе нет ни одного пользователя.
     """
     # Проверка, что нет других пользователей
-    user_count = user_service.count_users(db)
+    user_count = await run_in_threadpool(user_service.count_users, db)
     if user_count > 0:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -38,16 +46,15 @@ def register_admin(
         password=admin_data.password
     )
     
-    user = user_service.create_user(db, user_data)
-    
-    # Создание токена
-    access_token = create_access_token(data={"sub": user.id})
+    password_hash = await password_hasher.hash(admin_data.password)
+    user = await run_in_threadpool(user_service.create_user, db, user_data, password_hash)
     
-    return TokenResponse(access_token=access_token)
+    # Создание пары токенов
+    return TokenResponse(**token_service.issue_tokens(user.id))
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: RegisterAdminRequest,
     db: Session = Depends(get_db)
 ):
@@ -64,16 +71,15 @@ def register_user(
         password=user_data.password
     )
     
-    user = user_service.create_regular_user(db, new_user_data)
-    
-    # Создание токена
-    access_token = create_access_token(data={"sub": user.id})
+    password_hash = await password_hasher.hash(user_data.password)
+    user = await run_in_threadpool(user_service.create_regular_user, db, new_user_data, password_hash)
     
-    return TokenResponse(access_token=access_token)
+    # Создание пары токенов
+    return TokenResponse(**token_service.issue_tokens(user.id))
 
 
 @router.post("/register-guest", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def register_guest(
+async def register_guest(
     user_data: RegisterAdminRequest,
     db: Session = Depends(get_db)
 ):
@@ -90,16 +96,58 @@ def register_guest(
         password=user_data.password
     )
     
-    user = user_service.create_guest_user(db, new_user_data)
+    password_hash = await password_hasher.hash(user_data.password)
+    user = await run_in_threadpool(user_service.create_guest_user, db, new_user_data, password_hash)
     
-    # Создание токена
-    access_token = create_access_token(data={"sub": user.id})
+    # Создание пары токенов
+    return TokenResponse(**token_service.issue_tokens(user.id))
+
+
+@router.post("/guest-session", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+def create_guest_session():
+    """
+    Гостевая сессия без регистрации.
+    Токен подписан и содержит роль guest; пользователь в БД не создаётся.
+    Гости могут только просматривать публичные доски и их задачи.
+    """
+    return TokenResponse(access_token=create_guest_token())
+
+
+@router.post("/guest/upgrade", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+async def upgrade_guest(
+    user_data: RegisterAdminRequest,
+    principal: Principal = Depends(get_current_principal),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Превратить гостевую сессию в обычного пользователя.
+    Нужен для действий на запись: только теперь создаётся запись в БД.
+    Гостевой токен после этого отзывается.
+    """
+    if not principal.is_guest:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only guest sessions can be upgraded"
+        )
+    
+    from app.schemas.user import UserCreate
     
-    return TokenResponse(access_token=access_token)
+    new_user_data = UserCreate(
+        username=user_data.username,
+        email=user_data.email,
+        password=user_data.password
+    )
+    
+    password_hash = await password_hasher.hash(user_data.password)
+    user = await run_in_threadpool(user_service.create_regular_user, db, new_user_data, password_hash)
+    await run_in_threadpool(token_service.revoke_token, db, credentials.credentials)
+    
+    return TokenResponse(**token_service.issue_tokens(user.id))
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
@@ -108,7 +156,7 @@ def login(
     Возвращает JWT токен.
     """
     # Поиск пользователя по email
-    user = user_service.get_user_by_email(db, login_data.email)
+    user = await run_in_threadpool(user_service.get_user_by_email, db, login_data.email)
     
     if not user:
         raise HTTPException(
@@ -117,14 +165,50 @@ def login(
         )
     
     # Проверка пароля
-    if not verify_password(login_data.password, user.password_hash):
+    valid, new_hash = await password_hasher.verify(login_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный пароль"
         )
     
-    # Создание токена
-    access_token = create_access_token(data={"sub": user.id})
+    # Хэш создан с устаревшими параметрами — сохраняем пересчитанный
+    if new_hash:
+        await run_in_threadpool(user_service.set_password_hash, db, user.id, new_hash)
     
-    return TokenResponse(access_token=access_token)
+    # Создание пары токенов
+    return TokenResponse(**token_service.issue_tokens(user.id))
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh_token(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Обмен refresh-токена на новую пару токенов.
+    Refresh-токен одноразовый: повторное использование отзывает все токены пользователя.
+    """
+    return TokenResponse(**token_service.refresh_tokens(db, payload.refresh_token))
+
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    payload: Optional[LogoutRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Выход из системы.
+    Текущий токен (и переданный refresh-токен) отзывается и больше не принимается.
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    token_service.revoke_token(db, credentials.credentials)
+    if payload is not None and payload.refresh_token:
+        token_service.revoke_token(db, payload.refresh_token)
@@ -0,0 +1,78 @@
+"""
+Роутер для пакетного выполнения запросов.
+"""
+import asyncio
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+from app.core.batch import BatchDispatcher, IN_BATCH_STATE, READ_METHODS, request_path
+from app.core.security import get_current_principal, Principal
+
+router = APIRouter(tags=["Batch"])
+
+
+def _split_groups(requests: List[BatchSubRequest]) -> List[List[int]]:
+    """Индексы подзапросов по группам: подряд идущие чтения — одна группа, каждая запись — своя"""
+    groups: List[List[int]] = []
+    for index, item in enumerate(requests):
+        is_read = item.method in READ_METHODS
+        if is_read and groups and requests[groups[-1][0]].method in READ_METHODS:
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+    return groups
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(
+    payload: BatchRequest,
+    request: Request,
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Выполнить несколько запросов к API за один запрос.
+    Подзапросы проходят через те же обработчики и проверки доступа, что и обычные,
+    с токеном самого батча (проверяется один раз).
+    Записи выполняются по порядку в одной общей сессии БД; подряд идущие чтения
+    (GET) — параллельно, каждое в своей сессии. Ответы возвращаются в порядке запроса;
+    ошибка подзапроса не прерывает остальные.
+    Каждый подзапрос списывает свою стоимость из лимита вызывающего (429 — в ответе подзапроса).
+    """
+    # Путь проверяется после декодирования (/%62atch — тоже /batch); флаг в state — на случай обхода
+    nested = request.scope.get("state", {}).get(IN_BATCH_STATE)
+    for item in payload.requests:
+        if nested or request_path(item.path).startswith("/batch"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nested batch requests are not allowed"
+            )
+    
+    dispatcher = BatchDispatcher(request.app)
+    responses: List[Dict] = [None] * len(payload.requests)
+    db = SessionLocal()
+    
+    async def run(index: int, state: Dict) -> None:
+        item = payload.requests[index]
+        response = await dispatcher.dispatch(
+            request.scope, item.method, item.path, item.body, item.headers, state=state
+        )
+        responses[index] = response.to_dict()
+    
+    try:
+        for group in _split_groups(payload.requests):
+            if len(group) > 1:
+                # Сессия SQLAlchemy не потокобезопасна: параллельным чтениям — свои сессии
+                await asyncio.gather(*(run(index, {"principal": principal}) for index in group))
+                continue
+            
+            await run(group[0], {"principal": principal, "db": db})
+            # Незавершённая транзакция подзапроса (например, после ошибки) не переходит в следующий
+            await run_in_threadpool(db.rollback)
+    finally:
+        await run_in_threadpool(db.close)
+    
+    return BatchResponse(responses=responses)
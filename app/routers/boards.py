@@ -2,75 +2,115 @@
 Роутер для работы с досками.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.schemas.board import BoardCreate, BoardUpdate, BoardResponse, BoardWithTasks
+from app.schemas.board import (
+    BoardCreate, BoardUpdate, BoardResponse, BoardWithTasks, BoardWithSummary, BoardStatsBatch
+)
 from app.schemas.task import TaskResponse
-from app.services import board_service, user_service
-from app.core.security import get_current_user_id, check_board_access
+from app.services import board_service, user_service, job_service, archive_service
+from app.core.security import (
+    get_current_user_id, get_current_principal, get_principal_role, check_board_access, check_principal_board_access,
+    Principal
+)
+from app.core.etag import make_etag, parse_if_match
+from app.core.includes import parse_include
 
 router = APIRouter(prefix="/boards", tags=["Boards"])
 
+# Максимум досок в одном запросе GET /boards/stats
+MAX_STATS_BOARDS = 100
+
 
 @router.get("/public", response_model=List[BoardResponse])
 def get_public_boards(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = 100
 ):
     """
     Получить список всех публичных досок.
     Не требует аутентификации.
+    Одинаковые конкурентные запросы объединяются, результат кэшируется на несколько секунд.
     """
-    boards = board_service.get_public_boards(db, skip=skip, limit=limit)
-    return boards
+    return board_service.get_public_boards_cached(skip=skip, limit=limit)
 
 
 @router.get("/public/{board_id}", response_model=BoardWithTasks)
-def get_public_board(
-    board_id: int,
-    db: Session = Depends(get_db)
-):
+def get_public_board(board_id: int):
     """
     Получить публичную доску по ID с задачами.
     Не требует аутентификации.
     Доступно только для публичных досок.
+    Одинаковые конкурентные запросы объединяются, результат кэшируется на несколько секунд.
     """
-    board = board_service.get_board_by_id(db, board_id)
-    
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
-        )
-    
-    if not board.public:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="This board is private. Only public boards can be accessed without authentication."
-        )
-    
-    return board
+    return board_service.get_public_board_cached(board_id)
 
 
-@router.get("/", response_model=List[BoardResponse])
+@router.get("/", response_model=List[BoardWithSummary], response_model_exclude_unset=True)
 def get_boards(
     skip: int = 0,
     limit: int = 100,
     archived: bool = False,
+    include: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить список досок пользователя.
     Возвращает только доски, где пользователь является владельцем или участником.
+    Гостевой сессии (без записи в users) возвращаются публичные доски.
     Требуется аутентификация.
     archived=true - получить только архивированные доски.
+    include=summary - добавить к каждой доске количество задач по статусам
+    (один GROUP BY на всю страницу вместо запроса /boards/{board_id}/stats на каждую доску).
+    """
+    includes = parse_include(include, ("summary",))
+    if principal.is_guest:
+        boards = board_service.get_public_boards(db, skip=skip, limit=limit, archived=archived)
+    else:
+        boards = board_service.get_all_boards(db, skip=skip, limit=limit, archived=archived, user_id=principal.user_id)
+    if "summary" not in includes:
+        return boards
+    
+    stats = board_service.get_boards_stats(db, [board.id for board in boards])
+    return [
+        BoardWithSummary(**BoardResponse.model_validate(board).model_dump(), summary=stats[board.id])
+        for board in boards
+    ]
+
+
+# Объявлен до GET /boards/{board_id}, иначе "stats" разбирается как board_id
+@router.get("/stats", response_model=BoardStatsBatch)
+def get_boards_stats(
+    ids: str = Query(..., pattern=r"^\d+(,\d+)*$"),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
     """
-    boards = board_service.get_all_boards(db, skip=skip, limit=limit, archived=archived, user_id=current_user_id)
-    return boards
+    Получить статистику по задачам сразу для нескольких досок: ids=1,2,3.
+    Доски без доступа на чтение и несуществующие возвращаются в not_found.
+    """
+    board_ids = list(dict.fromkeys(int(board_id) for board_id in ids.split(",")))
+    if len(board_ids) > MAX_STATS_BOARDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many board ids (max {MAX_STATS_BOARDS})"
+        )
+    
+    # Гостевые сессии без записи в users видят только публичные доски
+    readable = board_service.filter_readable_board_ids(
+        db, board_ids, principal.user_id, get_principal_role(principal, db)
+    )
+    
+    readable_ids = set(readable)
+    
+    return BoardStatsBatch(
+        stats=board_service.get_boards_stats(db, readable),
+        not_found=[board_id for board_id in board_ids if board_id not in readable_ids]
+    )
 
 
 @router.post("/", response_model=BoardResponse, status_code=status.HTTP_201_CREATED)
@@ -90,13 +130,17 @@ def create_board(
 @router.get("/{board_id}", response_model=BoardWithTasks)
 def get_board(
     board_id: int,
+    response: Response,
+    archived: bool = False,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить доску по ID с задачами.
     Требуется аутентификация.
     Гости могут просматривать только публичные доски.
+    Заголовок ETag — версия доски (без задач) для If-Match при изменении.
+    archived=true - доска с задачами из архива вместо рабочих.
     """
     board = board_service.get_board_by_id(db, board_id)
     
@@ -106,11 +150,18 @@ def get_board(
             detail="Board not found"
         )
     
-    # Проверяем права доступа
-    user = user_service.get_user_by_id(db, current_user_id)
-    if user:
-        check_board_access(board, current_user_id, user.role, action="read", db=db)
+    # Проверяем права доступа (гостевые сессии — без обращения к users)
+    check_principal_board_access(board, principal, action="read", db=db)
     
+    response.headers["ETag"] = make_etag(board.version)
+    if archived:
+        return BoardWithTasks(
+            **BoardResponse.model_validate(board).model_dump(),
+            tasks=[
+                TaskResponse.model_validate(task)
+                for task in archive_service.get_archived_tasks(db, board_id, limit=None)
+            ]
+        )
     return board
 
 
@@ -118,6 +169,8 @@ def get_board(
 def update_board(
     board_id: int,
     board_data: BoardUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
@@ -125,6 +178,7 @@ def update_board(
     Обновить доску.
     Требуется аутентификация.
     Гости не могут обновлять доски.
+    If-Match: ETag доски — при несовпадении версии 412 с актуальным ETag.
     """
     # Проверяем существование доски
     board = board_service.get_board_by_id(db, board_id)
@@ -139,21 +193,24 @@ def update_board(
     if user:
         check_board_access(board, current_user_id, user.role, action="write", db=db)
     
-    board = board_service.update_board(db, board_id, board_data)
+    board = board_service.update_board(db, board_id, board_data, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(board.version)
     return board
 
 
 @router.delete("/{board_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_board(
     board_id: int,
+    background: bool = False,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """
     Удалить доску.
-    Удаляются также все задачи на доске (cascade).
+    Удаляются также все задачи на доске, их комментарии и участники.
     Требуется аутентификация.
     Гости не могут удалять доски.
+    background=true - удалить фоновым заданием (202), прогресс: GET /jobs/{job_id}.
     """
     # Проверяем существование доски
     board = board_service.get_board_by_id(db, board_id)
@@ -168,6 +225,13 @@ def delete_board(
     if user:
         check_board_access(board, current_user_id, user.role, action="delete", db=db)
     
+    if background:
+        job = job_service.enqueue(
+            db, "board.delete", {"board_id": board_id},
+            user_id=current_user_id, dedupe_key=f"board.delete:{board_id}"
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_service.job_location(job))
+    
     board_service.delete_board(db, board_id)
     return None
 
@@ -240,7 +304,7 @@ def remove_board_member(
 def get_board_members(
     board_id: int,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить список участников доски.
@@ -252,6 +316,8 @@ def get_board_members(
             detail="Board not found"
         )
     
+    check_principal_board_access(board, principal, action="read", db=db)
+    
     members = board_service.get_board_members(db, board_id)
     return [{"id": m.user.id, "username": m.user.username, "email": m.user.email} for m in members]
 
@@ -265,6 +331,8 @@ def archive_board(
     """
     Архивировать доску.
     Архивированная доска скрывается из обычного списка.
+    Её задачи фоновым заданием переносятся в архив (читаются с archived=true);
+    при разархивации (PUT /boards/{board_id} с archived=false) возвращаются обратно.
     """
     board = board_service.get_board_by_id(db, board_id)
     if not board:
@@ -288,7 +356,7 @@ def archive_board(
 def get_board_stats(
     board_id: int,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить статистику по задачам на доске.
@@ -300,6 +368,8 @@ def get_board_stats(
             detail="Board not found"
         )
     
+    check_principal_board_access(board, principal, action="read", db=db)
+    
     stats = board_service.get_board_stats(db, board_id)
     return stats
 
@@ -0,0 +1,137 @@
+"""
+Роутер для работы с комментариями к задачам.
+"""
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.comment import CommentCreate, CommentResponse, CommentPage
+from app.services import comment_service, task_service, board_service, user_service
+from app.core.security import (
+    get_current_user_id, get_current_principal, get_principal_role, check_board_access, Principal
+)
+
+router = APIRouter(tags=["Comments"])
+
+
+def _get_task_with_access(db: Session, task_id: int, user_id, user_role: str, action: str = "read"):
+    """
+    Получить задачу и проверить доступ пользователя к её доске.
+    user_id — ID пользователя или sub гостевой сессии.
+    """
+    task = task_service.get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    board = board_service.get_board_by_id(db, task.board_id)
+    if board:
+        check_board_access(board, user_id, user_role, action=action, db=db)
+    
+    return task
+
+
+def _get_current_user(db: Session, current_user_id: int):
+    """Получить текущего пользователя или 401"""
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+
+@router.get("/tasks/{task_id}/comments", response_model=CommentPage)
+def get_task_comments(
+    task_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Получить комментарии задачи (от старых к новым).
+    Пагинация курсором: cursor=<next_cursor из предыдущего ответа>.
+    Гостевые сессии читают комментарии задач публичных досок.
+    """
+    _get_task_with_access(db, task_id, principal.subject, get_principal_role(principal, db))
+    
+    comments, next_cursor = comment_service.get_comments(db, task_id, cursor=cursor, limit=limit)
+    return CommentPage(
+        comments=[CommentResponse.model_validate(comment) for comment in comments],
+        next_cursor=next_cursor
+    )
+
+
+@router.post("/tasks/{task_id}/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
+def create_task_comment(
+    task_id: int,
+    comment_data: CommentCreate,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Добавить комментарий к задаче.
+    Комментировать может любой пользователь с доступом к доске, кроме гостей.
+    """
+    user = _get_current_user(db, current_user_id)
+    if user.role == "guest":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Guests cannot comment tasks"
+        )
+    _get_task_with_access(db, task_id, user.id, user.role)
+    
+    return comment_service.create_comment(db, task_id, current_user_id, comment_data.content)
+
+
+@router.delete("/tasks/{task_id}/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_task_comment(
+    task_id: int,
+    comment_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Удалить комментарий.
+    Удалить может автор комментария или администратор.
+    """
+    user = _get_current_user(db, current_user_id)
+    comment = comment_service.get_comment_by_id(db, comment_id)
+    if not comment or comment.task_id != task_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found"
+        )
+    
+    if user.role != "admin" and comment.user_id != current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only comment author or admin can delete the comment"
+        )
+    
+    comment_service.delete_comment(db, comment)
+    return None
+
+
+@router.get("/comments/latest", response_model=Dict[int, List[CommentResponse]])
+def get_latest_comments(
+    task_ids: List[int] = Query(..., max_length=500),
+    limit: int = Query(3, ge=1, le=20),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Получить последние limit комментариев для нескольких задач одним запросом.
+    Задачи, к которым у пользователя нет доступа, пропускаются.
+    Пример: /comments/latest?task_ids=1&task_ids=2&limit=3
+    """
+    accessible_ids = task_service.filter_accessible_task_ids(
+        db, list(dict.fromkeys(task_ids)), principal.user_id, get_principal_role(principal, db)
+    )
+    
+    return comment_service.get_latest_comments(db, accessible_ids, per_task=limit)
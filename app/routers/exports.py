@@ -0,0 +1,98 @@
+"""
+Роутер для потоковой выгрузки данных (NDJSON / CSV).
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import export_service, user_service
+from app.core.security import get_current_user_id
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+FORMAT_PATTERN = "^(ndjson|csv)$"
+
+
+def _get_current_user(db: Session, current_user_id: int):
+    """Получить текущего пользователя или 401"""
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
+
+
+def _streaming_response(chunks, name: str, export_format: str) -> StreamingResponse:
+    """Ответ с выгрузкой в виде файла"""
+    return StreamingResponse(
+        chunks,
+        media_type=export_service.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+
+@router.get("/tasks")
+def export_tasks(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    priority_filter: Optional[str] = Query(None, alias="priority"),
+    board_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Выгрузить задачи, доступные пользователю (для админа — все).
+    Фильтры: status, priority, board_id. format=ndjson|csv.
+    """
+    user = _get_current_user(db, current_user_id)
+    chunks = export_service.export_tasks(
+        current_user_id, user.role, format,
+        status_filter=status_filter,
+        priority_filter=priority_filter,
+        board_id=board_id
+    )
+    return _streaming_response(chunks, "tasks", format)
+
+
+@router.get("/boards")
+def export_boards(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    archived: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Выгрузить доски пользователя (для админа — все).
+    Фильтр: archived. format=ndjson|csv.
+    """
+    user = _get_current_user(db, current_user_id)
+    chunks = export_service.export_boards(current_user_id, user.role, format, archived=archived)
+    return _streaming_response(chunks, "boards", format)
+
+
+@router.get("/audit-logs")
+def export_audit_logs(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    user_id: Optional[int] = Query(None),
+    action: Optional[str] = Query(None),
+    entity: Optional[str] = Query(None, alias="entity_type"),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Выгрузить логи аудита (только для администраторов).
+    Фильтры как у GET /logs: user_id, action, entity_type. format=ndjson|csv.
+    """
+    user = _get_current_user(db, current_user_id)
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can export audit logs"
+        )
+    
+    chunks = export_service.export_audit_logs(format, user_id=user_id, action=action, entity_type=entity)
+    return _streaming_response(chunks, "audit_logs", format)
@@ -0,0 +1,41 @@
+"""
+Роутер для потоковой загрузки досок и задач (NDJSON / CSV).
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import import_service, user_service
+from app.core.security import get_current_user_id
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+
+@router.post("")
+def import_data(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    board_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Загрузить доски и задачи из файла NDJSON или CSV.
+    Строки с type=board создают доски, остальные — задачи.
+    board_id — существующая доска для задач без ссылки на доску из файла.
+    Ошибочные строки пропускаются и возвращаются в списке errors.
+    """
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    if user.role == "guest":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Guests cannot import data"
+        )
+    
+    return import_service.import_data(db, file.file, current_user_id, user.role, format, board_id=board_id)
@@ -0,0 +1,79 @@
+"""
+Роутер для фоновых заданий.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.job import JobResponse
+from app.services import job_service, user_service
+from app.core.security import get_current_user_id
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("", response_model=List[JobResponse])
+def get_jobs(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Получить список фоновых заданий.
+    Администраторы видят все задания, остальные — только свои.
+    """
+    user = user_service.get_user_by_id(db, current_user_id)
+    owner_id = None if user and user.role == "admin" else current_user_id
+    
+    return job_service.get_jobs(db, user_id=owner_id, status_filter=status_filter, skip=skip, limit=limit)
+
+
+@router.post("/seed", status_code=status.HTTP_202_ACCEPTED)
+def enqueue_seed(
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Заполнить БД тестовыми данными в фоне.
+    Только для администраторов.
+    """
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user or user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can seed the database"
+        )
+    
+    job = job_service.enqueue(db, "db.seed", user_id=current_user_id, dedupe_key="db.seed", max_attempts=1)
+    return job_service.job_location(job)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Получить состояние и прогресс фонового задания.
+    Доступно автору задания и администраторам.
+    """
+    job = job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    if job.created_by != current_user_id:
+        user = user_service.get_user_by_id(db, current_user_id)
+        if not user or user.role != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this job"
+            )
+    
+    return job
@@ -12,12 +12,16 @@ from app.models.board import Board
 from app.models.task import Task
 from app.models.user import User
 from app.core.security import get_current_user_id
+from app.core.cache import cache
 from app.services import user_service
 from app.schemas.board import BoardResponse
 from app.schemas.task import TaskResponse
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
+# Общая статистика сбрасывается при изменении досок и задач (тег "stats"), TTL — страховка
+STATS_TTL_SECONDS = 60
+
 
 @router.get("/dashboard")
 def get_dashboard_stats(
@@ -28,6 +32,10 @@ def get_dashboard_stats(
     Получить статистику для дашборда.
     Возвращает общее количество досок и задач, а также распределение задач по статусам.
     """
+    return cache.get_or_set("stats:dashboard", lambda: _dashboard_stats(db), ttl=STATS_TTL_SECONDS, tags=("stats",))
+
+
+def _dashboard_stats(db: Session) -> Dict:
     # Подсчет досок (только неархивированных)
     total_boards = db.query(Board).filter(Board.archived == False).count()
     
@@ -58,6 +66,10 @@ def get_global_task_stats(
     """
     Получить глобальную статистику по задачам.
     """
+    return cache.get_or_set("stats:tasks", lambda: _global_task_stats(db), ttl=STATS_TTL_SECONDS, tags=("stats",))
+
+
+def _global_task_stats(db: Session) -> Dict:
     boards_count = db.query(Board).count()
     tasks_total = db.query(Task).count()
     tasks_done = db.query(Task).filter(Task.status == "done").count()
@@ -2,36 +2,71 @@
 Роутер для работы с задачами.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
 from app.database import get_db
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, BulkStatusUpdate, BulkDelete, ReorderTasks, AccessibleTasksResponse
-from app.services import task_service, board_service, user_service
-from app.core.security import get_current_user_id, check_board_access
-from app.models.task import Task
-from app.models.board import Board
-from app.models.board_member import BoardMember
+from app.schemas.task import (
+    TaskCreate, TaskUpdate, TaskResponse, BulkStatusUpdate, BulkDelete, ReorderTasks,
+    AccessibleTasksResponse, BulkTaskPatch, BulkTaskPatchResponse, TaskTreeNode, TaskWithUsers
+)
+from app.services import task_service, board_service, user_service, job_service, archive_service
+from app.core.security import (
+    get_current_user_id, get_current_principal, get_principal_role, check_board_access, check_principal_board_access,
+    Principal
+)
+from app.core.etag import make_etag, parse_if_match
+from app.core.includes import parse_include
 
 router = APIRouter(tags=["Tasks"])
 
+# Связанные пользователи, которые можно встроить в список задач (include=assignee,creator)
+TASK_INCLUDES = ("assignee", "creator")
 
-@router.get("/boards/{board_id}/tasks", response_model=List[TaskResponse])
+
+def _with_users(db: Session, tasks, include: Optional[str]) -> List[TaskWithUsers]:
+    """
+    Встроить в задачи краткие данные исполнителя и создателя.
+    Все ID страницы собираются заранее и загружаются одним IN-запросом.
+    """
+    includes = parse_include(include, TASK_INCLUDES)
+    loader = user_service.user_loader(db)
+    if "assignee" in includes:
+        loader.prime(task.assignee_id for task in tasks)
+    if "creator" in includes:
+        loader.prime(task.created_by for task in tasks)
+    
+    result = []
+    for task in tasks:
+        related = {}
+        if "assignee" in includes:
+            related["assignee"] = loader.get(task.assignee_id)
+        if "creator" in includes:
+            related["creator"] = loader.get(task.created_by)
+        result.append(TaskWithUsers(**TaskResponse.model_validate(task).model_dump(), **related))
+    return result
+
+
+@router.get("/boards/{board_id}/tasks", response_model=List[TaskWithUsers], response_model_exclude_unset=True)
 def get_tasks(
     board_id: int,
     status_filter: Optional[str] = Query(None, alias="status"),
     priority_filter: Optional[str] = Query(None, alias="priority"),
     skip: int = 0,
     limit: int = 100,
+    include: Optional[str] = None,
+    archived: bool = False,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить список задач на доске.
     Поддерживает фильтрацию по status и priority.
     Требуется аутентификация.
     Гости могут просматривать задачи только на публичных досках.
+    include=assignee,creator - встроить краткие данные пользователей (id, username, avatar_url).
+    archived=true - задачи из архива (архивированная доска или давно выполненные).
     """
     # Проверка существования доски
     board = board_service.get_board_by_id(db, board_id)
@@ -41,19 +76,41 @@ def get_tasks(
             detail="Board not found"
         )
     
-    # Проверяем права доступа
-    user = user_service.get_user_by_id(db, current_user_id)
-    if user:
-        check_board_access(board, current_user_id, user.role, action="read", db=db)
+    # Проверяем права доступа (гостевые сессии — без обращения к users)
+    check_principal_board_access(board, principal, action="read", db=db)
     
-    tasks = task_service.get_tasks_by_board(
+    get_tasks_page = archive_service.get_archived_tasks if archived else task_service.get_tasks_by_board
+    tasks = get_tasks_page(
         db, board_id,
         status_filter=status_filter,
         priority_filter=priority_filter,
         skip=skip,
         limit=limit
     )
-    return tasks
+    return _with_users(db, tasks, include)
+
+
+@router.get("/boards/{board_id}/tasks/tree", response_model=List[TaskTreeNode])
+def get_board_task_tree(
+    board_id: int,
+    max_depth: int = Query(10, ge=0, le=50),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Получить иерархию задач доски (корневые задачи с вложенными подзадачами).
+    Для каждого узла возвращаются subtree_total и subtree_done.
+    """
+    board = board_service.get_board_by_id(db, board_id)
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    check_principal_board_access(board, principal, action="read", db=db)
+    
+    return task_service.get_board_task_trees(db, board_id, max_depth=max_depth)
 
 
 @router.post("/boards/{board_id}/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -83,14 +140,21 @@ def create_task(
 def get_task(
     board_id: int,
     task_id: int,
+    response: Response,
+    archived: bool = False,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить задачу по ID.
     Требуется аутентификация.
+    Заголовок ETag — версия задачи для If-Match при изменении.
+    archived=true - задача из архива (без ETag: архивную задачу изменить нельзя).
     """
-    task = task_service.get_task_by_id(db, task_id)
+    if archived:
+        task = archive_service.get_archived_task(db, task_id)
+    else:
+        task = task_service.get_task_by_id(db, task_id)
     
     if not task or task.board_id != board_id:
         raise HTTPException(
@@ -98,14 +162,63 @@ def get_task(
             detail="Task not found"
         )
     
+    # Гостевые сессии видят только задачи публичных досок
+    if principal.is_guest:
+        board = board_service.get_board_by_id(db, board_id) if archived else task.board
+        check_principal_board_access(board, principal, action="read")
+    
+    if not archived:
+        response.headers["ETag"] = make_etag(task.version)
     return task
 
 
+# Объявлен до PUT /boards/{board_id}/tasks/{task_id}, иначе "reorder" разбирается как task_id
+@router.put("/boards/{board_id}/tasks/reorder")
+def reorder_tasks(
+    board_id: int,
+    payload: ReorderTasks,
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """
+    Изменение порядка задач на доске.
+    background=true - выполнить фоновым заданием (202), прогресс: GET /jobs/{job_id}.
+    """
+    # Проверяем существование доски и доступ
+    from app.services import board_service
+    from app.core.security import check_board_access
+    from app.services import user_service
+    
+    board = board_service.get_board_by_id(db, board_id)
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    user = user_service.get_user_by_id(db, current_user_id)
+    if user:
+        check_board_access(board, current_user_id, user.role, action="write", db=db)
+    
+    if background:
+        job = job_service.enqueue(
+            db, "tasks.reorder", {"board_id": board_id, "ordered_ids": payload.ordered_ids},
+            user_id=current_user_id, dedupe_key=f"tasks.reorder:{board_id}"
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_service.job_location(job))
+    
+    task_service.reorder_tasks(db, board_id, payload.ordered_ids)
+    return {"message": "Tasks reordered successfully"}
+
+
 @router.put("/boards/{board_id}/tasks/{task_id}", response_model=TaskResponse)
 def update_task(
     board_id: int,
     task_id: int,
     task_data: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
@@ -113,6 +226,8 @@ def update_task(
     Обновить задачу.
     Требуется аутентификация.
     Любой пользователь с доступом к доске может редактировать задачи.
+    If-Match: ETag задачи — изменение применяется, только если задачу с тех пор
+    никто не изменил, иначе 412 с актуальным ETag. Без If-Match — последняя запись побеждает.
     """
     # Проверка существования задачи
     task = task_service.get_task_by_id(db, task_id)
@@ -135,7 +250,8 @@ def update_task(
         # Проверяем доступ на чтение доски (если есть доступ на чтение, можно редактировать задачи)
         check_board_access(board, current_user_id, user.role, action="read", db=db)
     
-    task = task_service.update_task(db, task_id, task_data)
+    task = task_service.update_task(db, task_id, task_data, parse_if_match(if_match))
+    response.headers["ETag"] = make_etag(task.version)
     return task
 
 
@@ -184,6 +300,31 @@ def move_task_to_board(
     return task
 
 
+@router.get("/tasks/{task_id}/tree", response_model=TaskTreeNode)
+def get_task_tree(
+    task_id: int,
+    max_depth: int = Query(10, ge=0, le=50),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    Получить задачу со всеми подзадачами (рекурсивно, до max_depth уровней).
+    Для каждого узла возвращаются subtree_total и subtree_done.
+    """
+    task = task_service.get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    board = board_service.get_board_by_id(db, task.board_id)
+    if board:
+        check_principal_board_access(board, principal, action="read", db=db)
+    
+    return task_service.get_task_tree(db, task_id, max_depth=max_depth)
+
+
 @router.put("/tasks/{task_id}/status/{new_status}", response_model=TaskResponse)
 def update_task_status(
     task_id: int,
@@ -226,14 +367,17 @@ def update_task_priority(
     return task
 
 
-@router.get("/tasks/accessible", response_model=AccessibleTasksResponse)
+@router.get("/tasks/accessible", response_model=AccessibleTasksResponse, response_model_exclude_unset=True)
 def get_accessible_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, ge=0),
+    total: str = Query("cached", pattern="^(exact|cached|none)$"),
     status_filter: Optional[str] = Query(None, alias="status"),
     priority_filter: Optional[str] = Query(None, alias="priority"),
+    include: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить все задачи, доступные текущему пользователю.
@@ -242,98 +386,47 @@ def get_accessible_tasks(
     - Задачи на досках, где пользователь является участником
     - Задачи на публичных досках
     - Задачи, назначенные на пользователя (assignee_id)
-    Для админов возвращает все задачи.
-    """
-    user = user_service.get_user_by_id(db, current_user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    
-    # Получаем ID досок, к которым у пользователя есть доступ
-    accessible_board_ids = set()
-    
-    # 1. Доски, созданные пользователем
-    user_boards = db.query(Board.id).filter(Board.created_by == current_user_id).all()
-    accessible_board_ids.update([board.id for board in user_boards])
-    
-    # 2. Доски, где пользователь является участником
-    member_boards = db.query(BoardMember.board_id).filter(
-        BoardMember.user_id == current_user_id
-    ).all()
-    accessible_board_ids.update([board.board_id for board in member_boards])
-    
-    # 3. Публичные доски (доступны всем)
-    public_boards = db.query(Board.id).filter(Board.public == True).all()
-    accessible_board_ids.update([board.id for board in public_boards])
-    
-    # 4. Для админов - все доски
-    if user.role == "admin":
-        all_boards = db.query(Board.id).all()
-        accessible_board_ids.update([board.id for board in all_boards])
-    
-    # Строим запрос для задач
-    if accessible_board_ids:
-        query = db.query(Task).filter(Task.board_id.in_(accessible_board_ids))
-    else:
-        # Если нет доступных досок, создаем пустой запрос
-        query = db.query(Task).filter(False)
-    
-    # Добавляем фильтры
-    if status_filter:
-        query = query.filter(Task.status == status_filter)
-    if priority_filter:
-        query = query.filter(Task.priority == priority_filter)
-    
-    # Также включаем задачи, назначенные на пользователя
-    assigned_query = db.query(Task).filter(Task.assignee_id == current_user_id)
-    if status_filter:
-        assigned_query = assigned_query.filter(Task.status == status_filter)
-    if priority_filter:
-        assigned_query = assigned_query.filter(Task.priority == priority_filter)
+    Для админов возвращает все задачи, для гостевой сессии — задачи публичных досок.
     
-    # Объединяем запросы: задачи на доступных досках ИЛИ назначенные на пользователя
-    if accessible_board_ids:
-        combined_query = db.query(Task).filter(
-            or_(
-                Task.board_id.in_(accessible_board_ids),
-                Task.assignee_id == current_user_id
-            )
-        )
-    else:
-        combined_query = assigned_query
-    
-    if status_filter:
-        combined_query = combined_query.filter(Task.status == status_filter)
-    if priority_filter:
-        combined_query = combined_query.filter(Task.priority == priority_filter)
-    
-    # Подсчитываем общее количество
-    total = combined_query.count()
-    
-    # Получаем задачи с пагинацией
-    tasks = combined_query.offset(skip).limit(limit).all()
+    Пагинация: cursor=<next_cursor из предыдущего ответа> (keyset) или skip.
+    total=cached|exact|none — подсчёт с кэшированием (по умолчанию), точный COUNT на каждой странице
+    или без подсчёта.
+    include=assignee,creator — встроить краткие данные пользователей.
+    """
+    tasks, total_count, next_cursor = task_service.get_accessible_tasks(
+        db,
+        principal.user_id,
+        get_principal_role(principal, db),
+        status_filter=status_filter,
+        priority_filter=priority_filter,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+        total_mode=total
+    )
     
     return AccessibleTasksResponse(
-        tasks=[TaskResponse.model_validate(task) for task in tasks],
-        total=total
+        tasks=_with_users(db, tasks, include),
+        total=total_count,
+        next_cursor=next_cursor
     )
 
 
-@router.get("/tasks/search", response_model=List[TaskResponse])
+@router.get("/tasks/search", response_model=List[TaskWithUsers], response_model_exclude_unset=True)
 def search_tasks(
     q: str = Query(..., min_length=1),
     skip: int = 0,
     limit: int = 100,
+    include: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """
     Поиск задач по тексту (title и description).
+    include=assignee,creator — встроить краткие данные пользователей.
     """
     tasks = task_service.search_tasks(db, q, skip=skip, limit=limit)
-    return tasks
+    return _with_users(db, tasks, include)
 
 
 @router.put("/boards/{board_id}/tasks/bulk/status")
@@ -350,47 +443,43 @@ def bulk_update_task_status(
     return {"updated": updated, "message": f"Updated {updated} tasks to status '{payload.new_status}'"}
 
 
-@router.post("/boards/{board_id}/tasks/bulk/delete", status_code=status.HTTP_200_OK)
-def bulk_delete_tasks(
-    board_id: int,
-    payload: BulkDelete,
+@router.patch("/tasks/bulk", response_model=BulkTaskPatchResponse)
+def bulk_patch_tasks(
+    payload: BulkTaskPatch,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """
-    Массовое удаление задач.
-    Использует POST вместо DELETE для передачи body.
+    Массовое частичное изменение задач (статус, приоритет, исполнитель, доска).
+    Задачи выбираются списком task_ids или фильтром.
+    Изменяются только задачи на досках, которые пользователь может изменять.
     """
-    deleted = task_service.bulk_delete_tasks(db, payload.task_ids)
-    return {"deleted": deleted, "message": f"Deleted {deleted} tasks"}
+    user = user_service.get_user_by_id(db, current_user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    return task_service.bulk_patch_tasks(db, payload, current_user_id, user.role)
 
 
-@router.put("/boards/{board_id}/tasks/reorder")
-def reorder_tasks(
+@router.post("/boards/{board_id}/tasks/bulk/delete", status_code=status.HTTP_200_OK)
+def bulk_delete_tasks(
     board_id: int,
-    payload: ReorderTasks,
+    payload: BulkDelete,
+    background: bool = False,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """
-    Изменение порядка задач на доске.
+    Массовое удаление задач.
+    Использует POST вместо DELETE для передачи body.
+    background=true - удалить фоновым заданием (202), прогресс: GET /jobs/{job_id}.
     """
-    # Проверяем существование доски и доступ
-    from app.services import board_service
-    from app.core.security import check_board_access
-    from app.services import user_service
-    
-    board = board_service.get_board_by_id(db, board_id)
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
-        )
+    if background:
+        job = job_service.enqueue(db, "tasks.bulk_delete", {"task_ids": payload.task_ids}, user_id=current_user_id)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_service.job_location(job))
     
-    user = user_service.get_user_by_id(db, current_user_id)
-    if user:
-        check_board_access(board, current_user_id, user.role, action="write", db=db)
-    
-    task_service.reorder_tasks(db, board_id, payload.ordered_ids)
-    return {"message": "Tasks reordered successfully"}
-
+    deleted = task_service.bulk_delete_tasks(db, payload.task_ids)
+    return {"deleted": deleted, "message": f"Deleted {deleted} tasks"}
@@ -2,14 +2,16 @@
 Роутер для работы с пользователями.
 Только для администраторов.
 """
-from typing import List
+from typing import List, Union
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.schemas.user import UserResponse, PasswordUpdate, AvatarUpdate, UserUpdate
-from app.services import user_service
-from app.core.security import get_current_user_id
+from app.schemas.user import UserResponse, GuestSessionResponse, PasswordUpdate, AvatarUpdate, UserUpdate
+from app.services import user_service, job_service
+from app.core.security import get_current_user_id, get_current_principal, password_hasher, Principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -25,20 +27,23 @@ def get_public_users(
     Не требует аутентификации.
     Используется для отображения тестовых пользователей на страницах логина/регистрации.
     """
-    users = user_service.get_all_users(db, skip=skip, limit=limit)
-    return users
+    return user_service.get_public_users(db, skip=skip, limit=limit)
 
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=Union[UserResponse, GuestSessionResponse])
 def get_current_user(
     db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id)
+    principal: Principal = Depends(get_current_principal)
 ):
     """
     Получить информацию о текущем пользователе.
     Требуется аутентификация.
+    Для гостевой сессии возвращается роль guest без ID (записи в users нет).
     """
-    user = user_service.get_user_by_id(db, current_user_id)
+    if principal.is_guest:
+        return GuestSessionResponse()
+    
+    user = user_service.get_user_by_id(db, principal.user_id)
     
     if not user:
         raise HTTPException(
@@ -86,7 +91,7 @@ def get_user(
 
 
 @router.put("/{user_id}/password")
-def update_user_password(
+async def update_user_password(
     user_id: int,
     payload: PasswordUpdate,
     db: Session = Depends(get_db),
@@ -102,17 +107,16 @@ def update_user_password(
             detail="You can only update your own password"
         )
     
-    from app.core.security import get_password_hash
-    user = user_service.get_user_by_id(db, user_id)
+    user = await run_in_threadpool(user_service.get_user_by_id, db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    user.password_hash = get_password_hash(payload.new_password)
-    db.commit()
-    db.refresh(user)
+    # bcrypt выполняется в отдельном ограниченном пуле
+    password_hash = await password_hasher.hash(payload.new_password)
+    await run_in_threadpool(user_service.set_password_hash, db, user_id, password_hash)
     
     return {"message": "Password updated successfully"}
 
@@ -159,11 +163,9 @@ def update_user_avatar(
             detail="User not found"
         )
     
-    user.avatar_url = payload.avatar_url
-    db.commit()
-    db.refresh(user)
+    user_service.set_avatar_url(db, user_id, payload.avatar_url)
     
-    return {"message": "Avatar updated successfully", "avatar_url": user.avatar_url}
+    return {"message": "Avatar updated successfully", "avatar_url": payload.avatar_url}
 
 
 @router.get("/{user_id}/avatar")
@@ -210,12 +212,14 @@ def update_user(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
+    background: bool = False,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """
     Удалить пользователя.
     Только для администраторов.
+    background=true - удалить фоновым заданием (202), прогресс: GET /jobs/{job_id}.
     """
     current_user = user_service.get_user_by_id(db, current_user_id)
     if not current_user or current_user.role != "admin":
@@ -231,6 +235,13 @@ def delete_user(
             detail="You cannot delete yourself"
         )
     
+    if background:
+        job = job_service.enqueue(
+            db, "user.delete", {"user_id": user_id},
+            user_id=current_user_id, dedupe_key=f"user.delete:{user_id}"
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_service.job_location(job))
+    
     user_service.delete_user(db, user_id)
     return None
 
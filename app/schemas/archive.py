@@ -0,0 +1,30 @@
+"""
+Pydantic схемы для архива задач.
+"""
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+# Максимум задач в одном запросе восстановления по списку ID
+MAX_RESTORE_TASKS = 1000
+
+
+class ArchiveRestoreRequest(BaseModel):
+    """
+    Схема массового восстановления из архива.
+    Задачи выбираются либо списком task_ids, либо всей доской (board_id).
+    """
+    task_ids: Optional[List[int]] = Field(None, max_length=MAX_RESTORE_TASKS)
+    board_id: Optional[int] = None
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.task_ids is None) == (self.board_id is None):
+            raise ValueError("Specify exactly one of task_ids or board_id")
+        return self
+
+
+class ArchiveRestoreResponse(BaseModel):
+    """Результат восстановления"""
+    restored: int
+    conflicts: List[int]  # ID уже занят задачей в tasks — задача осталась в архиве
+    not_found: List[int] = []  # Нет в архиве, нет доступа на запись или доска архивирована
@@ -1,6 +1,7 @@
 """
 Pydantic схемы для аутентификации.
 """
+from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -20,5 +21,17 @@ class LoginRequest(BaseModel):
 class TokenResponse(BaseModel):
     """Схема ответа с токеном"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
+    expires_in: Optional[int] = None  # Срок жизни access-токена в секундах
+
+
+class RefreshRequest(BaseModel):
+    """Схема обмена refresh-токена на новую пару токенов"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Схема выхода: refresh-токен отзывается вместе с access-токеном"""
+    refresh_token: Optional[str] = None
 
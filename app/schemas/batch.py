@@ -0,0 +1,33 @@
+"""
+Pydantic схемы для пакетного выполнения запросов (POST /batch).
+"""
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# Максимум подзапросов в одном батче
+MAX_BATCH_REQUESTS = 20
+
+
+class BatchSubRequest(BaseModel):
+    """Подзапрос: метод, путь (с query string) и JSON-тело"""
+    method: str = Field("GET", pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(..., pattern="^/")
+    body: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None  # Передаются только If-Match и Accept
+
+
+class BatchRequest(BaseModel):
+    """Схема пакетного запроса"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=MAX_BATCH_REQUESTS)
+
+
+class BatchSubResponse(BaseModel):
+    """Ответ подзапроса"""
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """Ответы подзапросов в порядке запроса"""
+    responses: List[BatchSubResponse]
@@ -4,7 +4,7 @@ Pydantic схемы для досок.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional, TYPE_CHECKING
+from typing import Dict, List, Optional, TYPE_CHECKING
 from pydantic import BaseModel, Field
 
 if TYPE_CHECKING:
@@ -35,11 +35,31 @@ class BoardResponse(BaseModel):
     archived: bool
     created_by: int
     created_at: datetime
+    version: int = 1
     
     class Config:
         from_attributes = True
 
 
+class BoardSummary(BaseModel):
+    """Количество задач доски по статусам"""
+    total: int
+    todo: int
+    in_progress: int
+    done: int
+
+
+class BoardWithSummary(BoardResponse):
+    """Доска в списке; summary — только при include=summary"""
+    summary: Optional[BoardSummary] = None
+
+
+class BoardStatsBatch(BaseModel):
+    """Статистика нескольких досок; недоступные и несуществующие — в not_found"""
+    stats: Dict[int, BoardSummary]
+    not_found: List[int] = []
+
+
 class BoardWithTasks(BoardResponse):
     """Схема доски с задачами"""
     tasks: List[TaskResponse] = []
@@ -0,0 +1,29 @@
+"""
+Pydantic схемы для комментариев к задачам.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class CommentCreate(BaseModel):
+    """Схема создания комментария"""
+    content: str = Field(..., min_length=1, max_length=5000)
+
+
+class CommentResponse(BaseModel):
+    """Схема ответа с данными комментария"""
+    id: int
+    task_id: int
+    user_id: int
+    content: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class CommentPage(BaseModel):
+    """Страница комментариев с курсором на следующую страницу"""
+    comments: List[CommentResponse]
+    next_cursor: Optional[str] = None
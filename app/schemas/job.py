@@ -0,0 +1,36 @@
+"""
+Pydantic схемы для фоновых заданий.
+"""
+import json
+from datetime import datetime
+from typing import Any, Optional
+from pydantic import BaseModel, field_validator
+
+
+class JobResponse(BaseModel):
+    """Схема ответа с состоянием фонового задания"""
+    id: int
+    type: str
+    status: str
+    attempts: int
+    max_attempts: int
+    progress_current: int
+    progress_total: Optional[int]
+    result: Optional[Any] = None
+    error: Optional[str]
+    created_by: Optional[int]
+    run_after: datetime
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    @field_validator("result", mode="before")
+    @classmethod
+    def parse_result(cls, value):
+        """Результат хранится в БД как JSON-строка"""
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+    
+    class Config:
+        from_attributes = True
@@ -2,8 +2,10 @@
 Pydantic схемы для задач.
 """
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas.user import UserSummary
 
 
 class TaskCreate(BaseModel):
@@ -34,6 +36,8 @@ class TaskResponse(BaseModel):
     board_id: int
     created_by: int
     assignee_id: Optional[int] = None
+    comment_count: int = 0
+    version: int = 1
     created_at: datetime
     updated_at: datetime
     
@@ -41,12 +45,68 @@ class TaskResponse(BaseModel):
         from_attributes = True
 
 
+class TaskWithUsers(TaskResponse):
+    """Задача в списке; assignee и creator — только при include=assignee,creator"""
+    assignee: Optional[UserSummary] = None
+    creator: Optional[UserSummary] = None
+
+
+class TaskTreeNode(TaskResponse):
+    """Узел дерева подзадач с агрегатами по поддереву (включая сам узел)"""
+    parent_task_id: Optional[int] = None
+    depth: int
+    subtree_total: int
+    subtree_done: int
+    subtasks: List["TaskTreeNode"] = []
+
+
+TaskTreeNode.model_rebuild()
+
+
 class BulkStatusUpdate(BaseModel):
     """Схема массового изменения статуса"""
     task_ids: List[int]
     new_status: str = Field(..., pattern="^(todo|in_progress|done)$")
 
 
+class BulkTaskFilter(BaseModel):
+    """Фильтр выбора задач для массового изменения"""
+    board_id: Optional[int] = None
+    status: Optional[str] = Field(None, pattern="^(todo|in_progress|done)$")
+    priority: Optional[str] = Field(None, pattern="^(low|medium|high)$")
+    assignee_id: Optional[int] = None
+    
+    @model_validator(mode="after")
+    def check_criteria(self):
+        # Пустой фильтр выбрал бы все доступные задачи — вероятнее опечатка, чем намерение
+        if all(value is None for value in (self.board_id, self.status, self.priority, self.assignee_id)):
+            raise ValueError("Filter must specify at least one criterion")
+        return self
+
+
+class BulkTaskPatch(BaseModel):
+    """
+    Схема массового частичного изменения задач.
+    Задачи выбираются либо списком task_ids, либо фильтром.
+    """
+    task_ids: Optional[List[int]] = None
+    filter: Optional[BulkTaskFilter] = None
+    changes: TaskUpdate = Field(default_factory=TaskUpdate)
+    target_board_id: Optional[int] = None  # Перенос задач на другую доску
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.task_ids is None) == (self.filter is None):
+            raise ValueError("Specify exactly one of task_ids or filter")
+        return self
+
+
+class BulkTaskPatchResponse(BaseModel):
+    """Результат массового изменения: итог по каждому ID (updated, not_found, forbidden)"""
+    updated: int
+    results: Dict[int, str]
+
+
 class BulkDelete(BaseModel):
     """Схема массового удаления"""
     task_ids: List[int]
@@ -59,5 +119,6 @@ class ReorderTasks(BaseModel):
 
 class AccessibleTasksResponse(BaseModel):
     """Схема ответа со списком доступных задач"""
-    tasks: List[TaskResponse]
-    total: int
+    tasks: List[TaskWithUsers]
+    total: Optional[int] = None  # None, если подсчёт отключён (total=none)
+    next_cursor: Optional[int] = None  # Передать как cursor для следующей страницы
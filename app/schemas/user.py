@@ -26,6 +26,24 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class GuestSessionResponse(BaseModel):
+    """Данные гостевой сессии для GET /users/me (записи в users нет)"""
+    id: Optional[int] = None
+    username: str = "guest"
+    role: str = "guest"
+    avatar_url: Optional[str] = None
+
+
+class UserSummary(BaseModel):
+    """Краткие данные пользователя для встраивания в задачи (include=assignee,creator)"""
+    id: int
+    username: str
+    avatar_url: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class PasswordUpdate(BaseModel):
     """Схема обновления пароля"""
     new_password: str = Field(..., min_length=6)
@@ -1,4 +1,12 @@
 # Services module
-from . import user_service, board_service, task_service, audit_service
+from . import (
+    job_service, user_service, board_service, task_service, audit_service,
+    comment_service, seed_service, export_service, import_service, token_service,
+    archive_service
+)
 
-__all__ = ["user_service", "board_service", "task_service", "audit_service"]
+__all__ = [
+    "job_service", "user_service", "board_service", "task_service",
+    "audit_service", "comment_service", "seed_service", "export_service", "import_service",
+    "token_service", "archive_service"
+]
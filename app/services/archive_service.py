@@ -0,0 +1,281 @@
+"""
+Сервис архива задач.
+
+Задачи архивированных досок и давно выполненные задачи переносятся из tasks
+в archived_tasks (комментарии — в archived_task_comments), чтобы не замедлять
+запросы к рабочим таблицам. Перенос и восстановление — INSERT ... SELECT и DELETE
+пачками по ARCHIVE_BATCH_SIZE, каждая пачка в своей транзакции записи.
+ID задач и комментариев сохраняются.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert, literal, select, update, String, DateTime
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.database import run_write_transaction
+from app.models.archive import ArchivedTask, ArchivedComment
+from app.models.board import Board
+from app.models.comment import TaskComment
+from app.models.task import Task
+from app.services import board_service, job_service
+
+# Общие колонки рабочих и архивных таблиц (ID комментария в архиве — comment_id)
+TASK_COLUMNS = [column.name for column in Task.__table__.columns]
+COMMENT_COLUMNS = [column.name for column in TaskComment.__table__.columns]
+ARCHIVED_COMMENT_COLUMNS = ["comment_id" if name == "id" else name for name in COMMENT_COLUMNS]
+
+ARCHIVE_REASON_BOARD = "board_archived"
+ARCHIVE_REASON_DONE = "done_expired"
+
+
+def _move_to_archive(db: Session, task_ids: List[int], reason: str) -> int:
+    """Перенести задачи и их комментарии в архив (коммит — вызывающий)"""
+    now = datetime.utcnow()
+    options = {"synchronize_session": False}
+    
+    db.execute(insert(ArchivedTask).from_select(
+        TASK_COLUMNS + ["archived_at", "archive_reason"],
+        select(
+            *(Task.__table__.c[name] for name in TASK_COLUMNS),
+            literal(now, DateTime),
+            literal(reason, String)
+        ).where(Task.id.in_(task_ids))
+    ))
+    db.execute(insert(ArchivedComment).from_select(
+        ARCHIVED_COMMENT_COLUMNS,
+        select(*(TaskComment.__table__.c[name] for name in COMMENT_COLUMNS)).where(TaskComment.task_id.in_(task_ids))
+    ))
+    db.execute(delete(TaskComment).where(TaskComment.task_id.in_(task_ids)), execution_options=options)
+    return db.execute(delete(Task).where(Task.id.in_(task_ids)), execution_options=options).rowcount
+
+
+def _move_from_archive(db: Session, task_ids: List[int]) -> int:
+    """Вернуть задачи и их комментарии из архива (коммит — вызывающий)"""
+    options = {"synchronize_session": False}
+    
+    db.execute(insert(Task).from_select(
+        TASK_COLUMNS,
+        select(*(ArchivedTask.__table__.c[name] for name in TASK_COLUMNS)).where(ArchivedTask.id.in_(task_ids))
+    ))
+    # Комментарий, чей ID уже занят (база без AUTOINCREMENT), получает новый ID:
+    # порядок комментариев задаётся created_at, на ID комментариев ничто не ссылается
+    archived_comments = ArchivedComment.task_id.in_(task_ids)
+    id_taken = ArchivedComment.comment_id.in_(select(TaskComment.id))
+    taken_ids = [row.id for row in db.query(ArchivedComment.id).filter(archived_comments, id_taken).all()]
+    db.execute(insert(TaskComment).from_select(
+        COMMENT_COLUMNS,
+        select(*(ArchivedComment.__table__.c[name] for name in ARCHIVED_COMMENT_COLUMNS))
+        .where(archived_comments, ArchivedComment.id.not_in(taken_ids))
+    ))
+    if taken_ids:
+        fresh_id_columns = [name for name in COMMENT_COLUMNS if name != "id"]
+        db.execute(insert(TaskComment).from_select(
+            fresh_id_columns,
+            select(*(ArchivedComment.__table__.c[name] for name in fresh_id_columns))
+            .where(ArchivedComment.id.in_(taken_ids))
+            .order_by(ArchivedComment.id)
+        ))
+    db.execute(delete(ArchivedComment).where(ArchivedComment.task_id.in_(task_ids)), execution_options=options)
+    return db.execute(delete(ArchivedTask).where(ArchivedTask.id.in_(task_ids)), execution_options=options).rowcount
+
+
+def _in_batches(
+    db: Session,
+    next_batch: Callable[[int], List[int]],
+    move: Callable[[List[int]], int],
+    progress: Optional[Callable[[int, int], None]] = None,
+    total: Optional[int] = None
+) -> int:
+    """
+    Переносить пачки, пока next_batch возвращает ID. Каждая пачка — своя транзакция;
+    ID выбираются внутри неё, чтобы параллельный перенос не вставил те же строки дважды.
+    """
+    moved = 0
+    while True:
+        def work():
+            batch_ids = next_batch(settings.ARCHIVE_BATCH_SIZE)
+            count = move(batch_ids) if batch_ids else 0
+            db.commit()
+            return count
+        
+        count = run_write_transaction(db, work)
+        if not count:
+            break
+        moved += count
+        if progress:
+            progress(moved, total)
+    return moved
+
+
+def archive_tasks_where(
+    db: Session,
+    condition,
+    reason: str,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Перенести в архив задачи, подходящие под условие. Возвращает число перенесённых задач.
+    Задача, чей ID уже есть в архиве (база без AUTOINCREMENT), остаётся в tasks.
+    """
+    condition = condition & Task.id.not_in(select(ArchivedTask.id))
+    total = db.query(Task).filter(condition).count()
+    moved = _in_batches(
+        db,
+        lambda size: [row.id for row in db.query(Task.id).filter(condition).limit(size).all()],
+        lambda task_ids: _move_to_archive(db, task_ids, reason),
+        progress,
+        total
+    )
+    if moved:
+        board_service.invalidate_board_caches()
+    return moved
+
+
+def archive_board_tasks(db: Session, board_id: int, progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Перенести в архив задачи доски, пока она архивирована (проверяется в каждой пачке)"""
+    board_archived = select(Board.id).where(Board.id == board_id, Board.archived == True).exists()
+    return archive_tasks_where(db, (Task.board_id == board_id) & board_archived, ARCHIVE_REASON_BOARD, progress)
+
+
+def archive_done_tasks(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """Перенести в архив задачи в статусе done, не изменявшиеся дольше older_than_days"""
+    days = older_than_days if older_than_days is not None else settings.ARCHIVE_DONE_AFTER_DAYS
+    if days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    # Задачи с подзадачами в работе остаются; выполненные подзадачи уходят раньше родителя
+    child = aliased(Task)
+    has_children = select(child.id).where(child.parent_task_id == Task.id).exists()
+    return archive_tasks_where(
+        db, (Task.status == "done") & (Task.updated_at < cutoff) & ~has_children, ARCHIVE_REASON_DONE, progress
+    )
+
+
+def restore_tasks_where(
+    db: Session,
+    condition,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict:
+    """
+    Вернуть из архива задачи, подходящие под условие.
+    Задача, чей ID уже занят в tasks (база, созданная до AUTOINCREMENT, переиспользует
+    наибольший ID после удаления), остаётся в архиве и возвращается в conflicts.
+    """
+    conflicts = [
+        row.id for row in
+        db.query(ArchivedTask.id).filter(condition, ArchivedTask.id.in_(select(Task.id))).all()
+    ]
+    restorable = condition & ArchivedTask.id.not_in(select(Task.id))
+    total = db.query(ArchivedTask).filter(restorable).count()
+    restored = _in_batches(
+        db,
+        lambda size: [row.id for row in db.query(ArchivedTask.id).filter(restorable).limit(size).all()],
+        lambda task_ids: _move_from_archive(db, task_ids),
+        progress,
+        total
+    )
+    if restored:
+        board_service.invalidate_board_caches()
+    return {"restored": restored, "conflicts": conflicts}
+
+
+def _active_board(board_id_column):
+    """Условие: задача относится к неархивированной доске"""
+    return board_id_column.in_(select(Board.id).where(Board.archived == False))
+
+
+def restore_board_tasks(
+    db: Session,
+    board_id: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+    reason: Optional[str] = ARCHIVE_REASON_BOARD
+) -> Dict:
+    """
+    Вернуть из архива задачи доски, пока она не архивирована (проверяется в каждой пачке).
+    По умолчанию — только перенесённые при архивации доски; reason=None — все.
+    """
+    condition = (ArchivedTask.board_id == board_id) & _active_board(ArchivedTask.board_id)
+    if reason is not None:
+        condition &= ArchivedTask.archive_reason == reason
+    return restore_tasks_where(db, condition, progress)
+
+
+def restore_tasks(db: Session, task_ids: List[int], writable_board_ids=None) -> Dict:
+    """
+    Вернуть из архива задачи по списку ID.
+    writable_board_ids — подзапрос досок с правом записи (None — без ограничения).
+    Задачи архивированных досок не восстанавливаются — они вернутся при разархивации доски.
+    """
+    condition = ArchivedTask.id.in_(task_ids) & _active_board(ArchivedTask.board_id)
+    if writable_board_ids is not None:
+        condition &= ArchivedTask.board_id.in_(writable_board_ids)
+    
+    eligible = {row.id for row in db.query(ArchivedTask.id).filter(condition).all()}
+    result = restore_tasks_where(db, condition)
+    result["not_found"] = [task_id for task_id in dict.fromkeys(task_ids) if task_id not in eligible]
+    return result
+
+
+def purge_archived_where(db: Session, condition) -> int:
+    """
+    Удалить архивные задачи (и их комментарии), подходящие под условие.
+    Для удаления досок и пользователей; коммит выполняет вызывающий код.
+    """
+    task_ids = select(ArchivedTask.id).where(condition)
+    options = {"synchronize_session": False}
+    db.execute(delete(ArchivedComment).where(ArchivedComment.task_id.in_(task_ids)), execution_options=options)
+    return db.execute(delete(ArchivedTask).where(condition), execution_options=options).rowcount
+
+
+def unassign_archived(db: Session, user_id: int) -> None:
+    """Снять удаляемого пользователя с архивных задач (коммит выполняет вызывающий код)"""
+    db.execute(
+        update(ArchivedTask).where(ArchivedTask.assignee_id == user_id).values(assignee_id=None),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def get_archived_tasks(
+    db: Session,
+    board_id: int,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = 100
+) -> List[ArchivedTask]:
+    """Архивные задачи доски (поля совпадают с Task, подходят для TaskResponse); limit=None — все"""
+    query = db.query(ArchivedTask).filter(ArchivedTask.board_id == board_id)
+    if status_filter:
+        query = query.filter(ArchivedTask.status == status_filter)
+    if priority_filter:
+        query = query.filter(ArchivedTask.priority == priority_filter)
+    return query.order_by(ArchivedTask.order, ArchivedTask.id).offset(skip).limit(limit).all()
+
+
+def get_archived_task(db: Session, task_id: int) -> Optional[ArchivedTask]:
+    """Получить архивную задачу по ID"""
+    return db.query(ArchivedTask).filter(ArchivedTask.id == task_id).first()
+
+
+@job_service.job_handler("archive.board")
+def _archive_board_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновый перенос задач архивированной доски"""
+    return {"board_id": payload["board_id"], "archived": archive_board_tasks(db, payload["board_id"], job.progress)}
+
+
+@job_service.job_handler("archive.restore_board")
+def _restore_board_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое восстановление задач разархивированной доски"""
+    return {"board_id": payload["board_id"], **restore_board_tasks(db, payload["board_id"], job.progress)}
+
+
+@job_service.job_handler("archive.done_tasks")
+def _archive_done_tasks_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновый перенос давно выполненных задач"""
+    return {"archived": archive_done_tasks(db, payload.get("older_than_days"), job.progress)}
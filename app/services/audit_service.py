@@ -3,11 +3,14 @@
 """
 from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import insert
 from datetime import datetime
 
 from app.models.audit_log import AuditLog
+from app.database import execute_returning, write_transaction
 
 
+@write_transaction
 def log_action(
     db: Session,
     user_id: Optional[int],
@@ -19,31 +22,26 @@ def log_action(
     """
     Записать действие в лог аудита.
     """
-    log_entry = AuditLog(
+    log_entry = execute_returning(db, insert(AuditLog).values(
         user_id=user_id,
         action=action,
         entity_type=entity_type,
         entity_id=entity_id,
         details=details
-    )
-    
-    db.add(log_entry)
+    ).returning(AuditLog))
     db.commit()
-    db.refresh(log_entry)
     
     return log_entry
 
 
-def get_logs(
+def logs_query(
     db: Session,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
-    entity_type: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100
+    entity_type: Optional[str] = None
 ):
     """
-    Получить логи аудита с фильтрацией.
+    Запрос логов аудита с фильтрацией.
     """
     query = db.query(AuditLog)
     
@@ -54,5 +52,20 @@ def get_logs(
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
     
-    return query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+    return query
+
 
+def get_logs(
+    db: Session,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+):
+    """
+    Получить логи аудита с фильтрацией.
+    """
+    query = logs_query(db, user_id=user_id, action=action, entity_type=entity_type)
+    
+    return query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
@@ -1,14 +1,28 @@
 """
 Сервис для работы с досками.
 """
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, update, select, func, literal, Integer
 from fastapi import HTTPException, status
 
 from app.models.board import Board
 from app.models.board_member import BoardMember
 from app.models.task import Task
-from app.schemas.board import BoardCreate, BoardUpdate
+from app.models.archive import ArchivedTask
+from app.schemas.board import BoardCreate, BoardUpdate, BoardResponse, BoardWithTasks
+from app.services import job_service
+from app.core.config import settings
+from app.core.singleflight import SingleFlightCache
+from app.core.cache import cache
+from app.core.etag import raise_for_version
+from app.database import execute_returning, write_transaction
+
+# Микро-кэш анонимных чтений публичных досок (объединяет конкурентные одинаковые запросы)
+public_boards_cache = SingleFlightCache(
+    ttl=settings.PUBLIC_CACHE_TTL_SECONDS,
+    stale=settings.PUBLIC_CACHE_STALE_SECONDS
+)
 
 
 def get_board_by_id(db: Session, board_id: int) -> Optional[Board]:
@@ -16,127 +30,292 @@ def get_board_by_id(db: Session, board_id: int) -> Optional[Board]:
     return db.query(Board).filter(Board.id == board_id).first()
 
 
-def get_all_boards(db: Session, skip: int = 0, limit: int = 100, archived: bool = False, user_id: Optional[int] = None) -> List[Board]:
+def user_boards_query(db: Session, archived: Optional[bool] = False, user_id: Optional[int] = None):
     """
-    Получить список досок пользователя.
-    Возвращает только доски, где пользователь является владельцем или участником.
+    Запрос досок пользователя: владелец или участник.
+    Без user_id — все доски; archived=None — без фильтра по архивации.
     """
+    query = db.query(Board)
+    if archived is not None:
+        query = query.filter(Board.archived == archived)
+    
     if user_id is None:
-        # Если user_id не указан, возвращаем все доски (для обратной совместимости)
-        query = db.query(Board).filter(Board.archived == archived)
-        return query.offset(skip).limit(limit).all()
+        return query
     
-    # Получаем доски, где пользователь является владельцем или участником
-    query = db.query(Board).filter(
-        Board.archived == archived
-    ).filter(
+    # Доски, где пользователь является владельцем или участником
+    return query.filter(
         (Board.created_by == user_id) |
         Board.id.in_(
             db.query(BoardMember.board_id).filter(BoardMember.user_id == user_id)
         )
     )
-    
+
+
+def get_all_boards(db: Session, skip: int = 0, limit: int = 100, archived: bool = False, user_id: Optional[int] = None) -> List[Board]:
+    """
+    Получить список досок пользователя.
+    Возвращает только доски, где пользователь является владельцем или участником.
+    Если user_id не указан, возвращает все доски (для обратной совместимости).
+    """
+    query = user_boards_query(db, archived=archived, user_id=user_id)
     return query.offset(skip).limit(limit).all()
 
 
-def get_public_boards(db: Session, skip: int = 0, limit: int = 100) -> List[Board]:
+def filter_readable_board_ids(db: Session, board_ids: List[int], user_id: Optional[int], user_role: str) -> List[int]:
+    """
+    Оставить из board_ids доски, доступные пользователю на чтение (один запрос).
+    user_id=None — гостевая сессия без записи в users: только публичные доски.
+    """
+    if not board_ids:
+        return []
+    query = db.query(Board.id).filter(Board.id.in_(board_ids))
+    if user_id is None:
+        query = query.filter(Board.public == True)
+    elif user_role != "admin":
+        query = query.filter(
+            (Board.created_by == user_id) |
+            (Board.public == True) |
+            Board.id.in_(
+                db.query(BoardMember.board_id).filter(BoardMember.user_id == user_id)
+            )
+        )
+    readable = {row.id for row in query.all()}
+    return [board_id for board_id in board_ids if board_id in readable]
+
+
+def get_writable_board_ids_query(db: Session, user_id: int, user_role: str):
+    """
+    Подзапрос ID досок, которые пользователь может изменять.
+    Для админов возвращает None — ограничение не требуется.
+    """
+    if user_role == "admin":
+        return None
+    return db.query(Board.id).filter(Board.created_by == user_id)
+
+
+def get_public_boards(db: Session, skip: int = 0, limit: int = 100, archived: bool = False) -> List[Board]:
     """Получить список всех публичных досок"""
     query = db.query(Board).filter(
         Board.public == True,
-        Board.archived == False
+        Board.archived == archived
     )
     return query.offset(skip).limit(limit).all()
 
 
+def _with_session(func: Callable):
+    """
+    Выполнить функцию в собственной сессии.
+    Кэшированное значение может пересчитываться в фоне, уже после завершения запроса.
+    """
+    from app.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
+
+def get_public_boards_cached(skip: int = 0, limit: int = 100) -> List[BoardResponse]:
+    """Список публичных досок через микро-кэш"""
+    def compute():
+        return _with_session(lambda db: [
+            BoardResponse.model_validate(board) for board in get_public_boards(db, skip=skip, limit=limit)
+        ])
+    
+    return public_boards_cache.get(("public_boards", skip, limit), compute, tags=("boards",))
+
+
+def get_public_board_cached(board_id: int) -> BoardWithTasks:
+    """Публичная доска с задачами через микро-кэш (404/403 не кэшируются)"""
+    def load(db: Session) -> BoardWithTasks:
+        board = get_board_by_id(db, board_id)
+        if not board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found"
+            )
+        if not board.public:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="This board is private. Only public boards can be accessed without authentication."
+            )
+        return BoardWithTasks.model_validate(board)
+    
+    return public_boards_cache.get(
+        ("public_board", board_id), lambda: _with_session(load), tags=(f"board:{board_id}",)
+    )
+
+
+def invalidate_board_caches(board_id: Optional[int] = None, list_changed: bool = False) -> None:
+    """
+    Сбросить кэши, зависящие от доски и её задач: публичное чтение, статистику доски и общую статистику.
+    list_changed — изменились поля самой доски (влияет на список публичных досок).
+    Без board_id сбрасываются данные всех досок (массовые операции).
+    """
+    if board_id is None:
+        public_boards_cache.clear()
+        cache.invalidate_tags("board_stats", "stats")
+        return
+    tags = [f"board:{board_id}"]
+    if list_changed:
+        tags.append("boards")
+    public_boards_cache.invalidate(*tags)
+    cache.invalidate_tags(f"board:{board_id}", "stats")
+
+
+@write_transaction
 def create_board(db: Session, board_data: BoardCreate, user_id: int) -> Board:
     """
     Создать новую доску.
     Автоматически добавляет создателя доски как участника.
     """
-    db_board = Board(
+    db_board = execute_returning(db, insert(Board).values(
         title=board_data.title,
         description=board_data.description,
         public=getattr(board_data, 'public', False),
         created_by=user_id
-    )
+    ).returning(Board))
     
-    db.add(db_board)
+    # Автоматически добавляем создателя доски как участника (доска новая — проверка не нужна)
+    db.execute(insert(BoardMember).values(board_id=db_board.id, user_id=user_id))
     db.commit()
-    db.refresh(db_board)
     
-    # Автоматически добавляем создателя доски как участника
-    existing_member = db.query(BoardMember).filter(
-        BoardMember.board_id == db_board.id,
-        BoardMember.user_id == user_id
-    ).first()
-    
-    if not existing_member:
-        member = BoardMember(board_id=db_board.id, user_id=user_id)
-        db.add(member)
-        db.commit()
+    invalidate_board_caches(db_board.id, list_changed=db_board.public)
     
     return db_board
 
 
-def update_board(db: Session, board_id: int, board_data: BoardUpdate) -> Board:
-    """Обновить доску"""
-    db_board = get_board_by_id(db, board_id)
+def _update_board_fields(
+    db: Session,
+    board_id: int,
+    values: Dict,
+    expected_version: Optional[int] = None
+) -> Board:
+    """UPDATE доски с RETURNING; 404, если доски нет, 412 — если версия не совпала с expected_version"""
+    if values:
+        stmt = update(Board).where(Board.id == board_id)
+        if expected_version is not None:
+            stmt = stmt.where(Board.version == expected_version)
+        db_board = execute_returning(
+            db, stmt.values(**values, version=Board.version + 1).returning(Board), Board, board_id
+        )
+    else:
+        db_board = get_board_by_id(db, board_id)
+        if db_board and expected_version is not None and db_board.version != expected_version:
+            db_board = None
     
     if not db_board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
-        )
+        if expected_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found"
+            )
+        raise_for_version(db.query(Board.version).filter(Board.id == board_id).scalar(), "Board not found")
     
-    # Обновление полей
-    update_data = board_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_board, field, value)
+    if "archived" in values:
+        # Перенос задач в архив (или обратно) — фоновым заданием, в одной транзакции с флагом
+        job_type = "archive.board" if db_board.archived else "archive.restore_board"
+        job_service.enqueue(db, job_type, {"board_id": board_id}, dedupe_key=f"{job_type}:{board_id}")
     
     db.commit()
-    db.refresh(db_board)
+    invalidate_board_caches(board_id, list_changed=True)
     
     return db_board
 
 
-def delete_board(db: Session, board_id: int) -> bool:
-    """Удалить доску"""
-    db_board = get_board_by_id(db, board_id)
+@write_transaction
+def update_board(
+    db: Session,
+    board_id: int,
+    board_data: BoardUpdate,
+    expected_version: Optional[int] = None
+) -> Board:
+    """Обновить доску (expected_version — версия из If-Match)"""
+    return _update_board_fields(db, board_id, board_data.model_dump(exclude_unset=True), expected_version)
+
+
+# Сколько хранится статистика доски (инвалидация по изменениям, TTL — страховка)
+BOARD_STATS_TTL_SECONDS = 300
+
+# Размер пачки задач при удалении доски
+DELETE_BATCH_SIZE = 1000
+
+@write_transaction
+def delete_board(
+    db: Session,
+    board_id: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+    batch_size: int = DELETE_BATCH_SIZE
+) -> bool:
+    """
+    Удалить доску со всеми задачами (включая архивные), комментариями и участниками.
+    Задачи удаляются set-based запросами пачками по batch_size,
+    каждая пачка в своей транзакции; progress(deleted, total) вызывается после каждой.
+    """
+    from app.services import task_service, archive_service
     
-    if not db_board:
+    if not db.query(Board.id).filter(Board.id == board_id).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Board not found"
         )
     
-    db.delete(db_board)
+    total = db.query(Task).filter(Task.board_id == board_id).count()
+    deleted = 0
+    while True:
+        batch_ids = [
+            row.id for row in
+            db.query(Task.id).filter(Task.board_id == board_id).limit(batch_size).all()
+        ]
+        if not batch_ids:
+            break
+        deleted += task_service.delete_tasks_where(db, Task.id.in_(batch_ids))
+        db.commit()
+        if progress:
+            progress(deleted, total)
+    
+    archive_service.purge_archived_where(db, ArchivedTask.board_id == board_id)
+    db.execute(delete(BoardMember).where(BoardMember.board_id == board_id), execution_options={"synchronize_session": False})
+    db.execute(delete(Board).where(Board.id == board_id), execution_options={"synchronize_session": False})
     db.commit()
+    invalidate_board_caches(board_id, list_changed=True)
     
     return True
 
 
+@job_service.job_handler("board.delete")
+def _delete_board_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое удаление доски с отчётом о прогрессе"""
+    delete_board(db, payload["board_id"], progress=job.progress)
+    return {"board_id": payload["board_id"]}
+
+
+@write_transaction
 def add_member(db: Session, board_id: int, user_id: int) -> BoardMember:
-    """Добавить участника на доску"""
-    # Проверяем что участник ещё не добавлен
-    existing = db.query(BoardMember).filter(
+    """Добавить участника на доску (INSERT ... SELECT WHERE NOT EXISTS ... RETURNING)"""
+    already_member = select(BoardMember.id).where(
         BoardMember.board_id == board_id,
         BoardMember.user_id == user_id
-    ).first()
+    ).exists()
+    member = execute_returning(db, insert(BoardMember).from_select(
+        ["board_id", "user_id"],
+        select(literal(board_id, Integer), literal(user_id, Integer)).where(~already_member)
+    ).returning(BoardMember))
     
-    if existing:
+    # Проверяем что участник ещё не добавлен
+    if member is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a member of this board"
         )
     
-    member = BoardMember(board_id=board_id, user_id=user_id)
-    db.add(member)
     db.commit()
-    db.refresh(member)
     
     return member
 
 
+@write_transaction
 def remove_member(db: Session, board_id: int, user_id: int) -> bool:
     """Удалить участника с доски"""
     member = db.query(BoardMember).filter(
@@ -161,24 +340,14 @@ def get_board_members(db: Session, board_id: int) -> List[BoardMember]:
     return db.query(BoardMember).filter(BoardMember.board_id == board_id).all()
 
 
+@write_transaction
 def archive_board(db: Session, board_id: int) -> Board:
-    """Архивировать доску"""
-    board = get_board_by_id(db, board_id)
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
-        )
-    
-    board.archived = True
-    db.commit()
-    db.refresh(board)
-    
-    return board
+    """Архивировать доску (задачи переносятся в архив фоновым заданием archive.board)"""
+    return _update_board_fields(db, board_id, {"archived": True})
 
 
 def get_board_stats(db: Session, board_id: int) -> Dict:
-    """Получить статистику по задачам на доске"""
+    """Получить статистику по задачам на доске (кэшируется до изменения задач доски)"""
     board = get_board_by_id(db, board_id)
     if not board:
         raise HTTPException(
@@ -186,15 +355,60 @@ def get_board_stats(db: Session, board_id: int) -> Dict:
             detail="Board not found"
         )
     
-    total = db.query(Task).filter(Task.board_id == board_id).count()
-    todo = db.query(Task).filter(Task.board_id == board_id, Task.status == "todo").count()
-    in_progress = db.query(Task).filter(Task.board_id == board_id, Task.status == "in_progress").count()
-    done = db.query(Task).filter(Task.board_id == board_id, Task.status == "done").count()
-    
-    return {
-        "total": total,
-        "todo": todo,
-        "in_progress": in_progress,
-        "done": done
+    return get_boards_stats(db, [board_id])[board_id]
+
+
+def get_boards_stats(db: Session, board_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Статистика по задачам для нескольких досок.
+    Найденные в кэше берутся из кэша, остальные считаются одним GROUP BY board_id, status.
+    Существование досок не проверяется: для доски без задач — нули.
+    """
+    stats: Dict[int, Dict] = {}
+    missing: List[int] = []
+    for board_id in dict.fromkeys(board_ids):
+        cached = cache.get(f"board_stats:{board_id}")
+        if cached is not None:
+            stats[board_id] = cached
+        else:
+            missing.append(board_id)
+    
+    if missing:
+        # Версии тегов — до подсчёта: изменение задач во время него не закэшируется как свежее
+        versions = {board_id: cache.tag_versions(_board_stats_tags(board_id)) for board_id in missing}
+        counted = _count_boards_stats(db, missing)
+        for board_id in missing:
+            if versions[board_id] is None:
+                continue
+            cache.set(
+                f"board_stats:{board_id}",
+                counted[board_id],
+                ttl=BOARD_STATS_TTL_SECONDS,
+                tags=_board_stats_tags(board_id),
+                versions=versions[board_id]
+            )
+        stats.update(counted)
+    
+    return stats
+
+
+def _board_stats_tags(board_id: int) -> Tuple[str, ...]:
+    return (f"board:{board_id}", "board_stats")
+
+
+def _count_boards_stats(db: Session, board_ids: List[int]) -> Dict[int, Dict]:
+    stats = {
+        board_id: {"total": 0, "todo": 0, "in_progress": 0, "done": 0}
+        for board_id in board_ids
     }
+    rows = db.query(Task.board_id, Task.status, func.count(Task.id)).filter(
+        Task.board_id.in_(board_ids)
+    ).group_by(Task.board_id, Task.status).all()
+    
+    for board_id, task_status, count in rows:
+        stats[board_id]["total"] += count
+        if task_status in stats[board_id]:
+            stats[board_id][task_status] = count
+    
+    return stats
 
@@ -0,0 +1,157 @@
+"""
+Сервис для работы с комментариями к задачам.
+"""
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, insert, update, select, func
+from fastapi import HTTPException, status
+
+from app.models.comment import TaskComment
+from app.models.task import Task
+from app.services import board_service
+from app.database import execute_returning, write_transaction
+
+
+def encode_cursor(comment: TaskComment) -> str:
+    """Кодирует позицию (task_id, created_at, id) в непрозрачный курсор"""
+    raw = f"{comment.task_id}|{comment.created_at.isoformat()}|{comment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """Декодирует курсор в (task_id, created_at, id)"""
+    try:
+        task_id, created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return int(task_id), datetime.fromisoformat(created_at), int(comment_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def get_comment_by_id(db: Session, comment_id: int) -> Optional[TaskComment]:
+    """Получить комментарий по ID"""
+    return db.query(TaskComment).filter(TaskComment.id == comment_id).first()
+
+
+def get_comments(
+    db: Session,
+    task_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[TaskComment], Optional[str]]:
+    """
+    Получить комментарии задачи в хронологическом порядке.
+    Keyset-пагинация по (created_at, id) внутри задачи.
+    Возвращает (комментарии, курсор следующей страницы).
+    """
+    query = db.query(TaskComment).filter(TaskComment.task_id == task_id)
+    
+    if cursor:
+        cursor_task_id, created_at, comment_id = decode_cursor(cursor)
+        if cursor_task_id != task_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor belongs to another task"
+            )
+        query = query.filter(or_(
+            TaskComment.created_at > created_at,
+            and_(TaskComment.created_at == created_at, TaskComment.id > comment_id)
+        ))
+    
+    comments = query.order_by(TaskComment.created_at, TaskComment.id).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1])
+    
+    return comments, next_cursor
+
+
+@write_transaction
+def create_comment(db: Session, task_id: int, user_id: int, content: str) -> TaskComment:
+    """
+    Создать комментарий.
+    Счётчик Task.comment_count увеличивается в той же транзакции
+    (updated_at задачи при этом не меняется).
+    """
+    comment = execute_returning(db, insert(TaskComment).values(
+        task_id=task_id, user_id=user_id, content=content
+    ).returning(TaskComment))
+    board_id = db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(comment_count=Task.comment_count + 1, updated_at=Task.updated_at)
+        .returning(Task.board_id),
+        execution_options={"synchronize_session": False}
+    ).scalar()
+    db.commit()
+    board_service.invalidate_board_caches(board_id)
+    
+    return comment
+
+
+@write_transaction
+def delete_comment(db: Session, comment: TaskComment) -> bool:
+    """
+    Удалить комментарий.
+    Счётчик Task.comment_count уменьшается в той же транзакции.
+    """
+    board_id = db.execute(
+        update(Task)
+        .where(Task.id == comment.task_id, Task.comment_count > 0)
+        .values(comment_count=Task.comment_count - 1, updated_at=Task.updated_at)
+        .returning(Task.board_id),
+        execution_options={"synchronize_session": False}
+    ).scalar()
+    db.delete(comment)
+    db.commit()
+    if board_id is not None:
+        board_service.invalidate_board_caches(board_id)
+    
+    return True
+
+
+def get_latest_comments(db: Session, task_ids: List[int], per_task: int = 3) -> Dict[int, List[TaskComment]]:
+    """
+    Получить последние per_task комментариев для каждой из задач одним запросом
+    (оконная функция ROW_NUMBER по task_id).
+    """
+    if not task_ids:
+        return {}
+    
+    ranked = select(
+        TaskComment.id.label("id"),
+        func.row_number().over(
+            partition_by=TaskComment.task_id,
+            order_by=(TaskComment.created_at.desc(), TaskComment.id.desc())
+        ).label("position")
+    ).where(TaskComment.task_id.in_(task_ids)).subquery()
+    
+    comments = db.query(TaskComment).join(ranked, ranked.c.id == TaskComment.id).filter(
+        ranked.c.position <= per_task
+    ).order_by(TaskComment.task_id, TaskComment.created_at.desc(), TaskComment.id.desc()).all()
+    
+    result: Dict[int, List[TaskComment]] = {task_id: [] for task_id in task_ids}
+    for comment in comments:
+        result[comment.task_id].append(comment)
+    
+    return result
+
+
+@write_transaction
+def recount_comment_counts(db: Session) -> None:
+    """Пересчитать Task.comment_count по таблице комментариев (после массовой вставки)"""
+    counts = select(func.count(TaskComment.id)).where(
+        TaskComment.task_id == Task.id
+    ).scalar_subquery()
+    db.execute(
+        update(Task).values(comment_count=counts, updated_at=Task.updated_at),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    board_service.invalidate_board_caches()
@@ -0,0 +1,106 @@
+"""
+Сервис потоковой выгрузки данных в NDJSON и CSV.
+Строки читаются курсором пачками (yield_per), поэтому память не растёт с объёмом выгрузки.
+"""
+import csv
+import io
+import json
+from typing import Callable, Iterator, List, Optional
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.audit_log import AuditLog
+from app.models.board import Board
+from app.models.task import Task
+from app.services import audit_service, board_service, task_service
+
+# Сколько строк читать из БД за раз и сколько строк отдавать клиенту одним куском
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _stream(build_query: Callable[[Session], object], columns: List, export_format: str) -> Iterator[str]:
+    """
+    Выполнить запрос в собственной сессии и отдать строки пачками.
+    Сессия живёт ровно столько, сколько идёт выгрузка.
+    """
+    names = [column.key for column in columns]
+    db = SessionLocal()
+    try:
+        query = build_query(db).with_entities(*columns).order_by(columns[0]).yield_per(EXPORT_BATCH_SIZE)
+        
+        buffer = io.StringIO()
+        writer = None
+        if export_format == "csv":
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+        
+        pending = 0
+        for row in query:
+            if writer is not None:
+                writer.writerow(["" if value is None else value for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(names, row)), default=str, ensure_ascii=False))
+                buffer.write("\n")
+            pending += 1
+            
+            if pending >= EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        
+        tail = buffer.getvalue()
+        if tail:
+            yield tail
+    finally:
+        db.close()
+
+
+def export_tasks(
+    user_id: int,
+    user_role: str,
+    export_format: str = "ndjson",
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    board_id: Optional[int] = None
+) -> Iterator[str]:
+    """Выгрузка задач, доступных пользователю (для админа — всех)"""
+    def build_query(db: Session):
+        query = task_service.accessible_tasks_query(db, user_id, user_role, status_filter, priority_filter)
+        if board_id is not None:
+            query = query.filter(Task.board_id == board_id)
+        return query
+    
+    return _stream(build_query, list(Task.__table__.columns), export_format)
+
+
+def export_boards(
+    user_id: int,
+    user_role: str,
+    export_format: str = "ndjson",
+    archived: Optional[bool] = None
+) -> Iterator[str]:
+    """Выгрузка досок пользователя (для админа — всех)"""
+    def build_query(db: Session):
+        owner_id = None if user_role == "admin" else user_id
+        return board_service.user_boards_query(db, archived=archived, user_id=owner_id)
+    
+    return _stream(build_query, list(Board.__table__.columns), export_format)
+
+
+def export_audit_logs(
+    export_format: str = "ndjson",
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None
+) -> Iterator[str]:
+    """Выгрузка логов аудита с фильтрацией"""
+    def build_query(db: Session):
+        return audit_service.logs_query(db, user_id=user_id, action=action, entity_type=entity_type)
+    
+    return _stream(build_query, list(AuditLog.__table__.columns), export_format)
@@ -0,0 +1,348 @@
+"""
+Сервис потоковой загрузки досок и задач из NDJSON и CSV.
+
+Каждая строка — отдельная доска или задача (поле type: board | task, по умолчанию task).
+Строки читаются по одной, проверяются пачками по схемам BoardCreate/TaskCreate
+и вставляются отдельной транзакцией на пачку. Ошибка в строке не прерывает загрузку.
+
+Поля строк:
+    board: id (исходный), title, description, public
+    task:  id (исходный), board_id (исходный ID доски из этой же загрузки),
+           parent_task_id (исходный ID задачи), title, description, status, priority,
+           assignee_email / assignee_username (исполнитель ищется среди пользователей системы)
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.models.board import Board
+from app.models.board_member import BoardMember
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.board import BoardCreate
+from app.schemas.task import TaskCreate
+from app.core.security import check_board_access
+from app.services import board_service
+from app.database import run_write_transaction
+
+# Строк в одной пачке (одна транзакция)
+IMPORT_CHUNK_SIZE = 500
+
+# Сколько ошибок возвращать в ответе (счётчик ведётся по всем)
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def _read_rows(stream: IO[bytes], import_format: str) -> Iterator[Tuple[int, Any]]:
+    """Построчно разобрать поток, возвращая (номер строки, данные или исключение разбора)"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        yield line_number, row
+
+
+def _chunks(rows: Iterator, size: int) -> Iterator[List]:
+    """Разбить поток строк на пачки"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Убрать пустые значения (пустые ячейки CSV), чтобы сработали значения по умолчанию схем"""
+    return {key: value for key, value in row.items() if key and value not in (None, "")}
+
+
+def _source_key(value: Any) -> Optional[str]:
+    """Исходный ID как ключ сопоставления (в CSV все значения строковые)"""
+    return None if value in (None, "") else str(value)
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Короткое описание ошибки валидации"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+class _Importer:
+    """Состояние одной загрузки: сопоставление исходных ID с новыми и накопленные ошибки"""
+    
+    def __init__(self, db: Session, user_id: int, user_role: str, target_board: Optional[Board]):
+        self.db = db
+        self.user_id = user_id
+        self.user_role = user_role
+        self.target_board_id = target_board.id if target_board is not None else None
+        self.board_ids: Dict[str, int] = {}  # исходный ID доски -> новый
+        self.board_owners: Dict[int, int] = {}  # ID доски -> создатель (исполнитель по умолчанию)
+        self.task_ids: Dict[str, int] = {}  # исходный ID задачи -> новый
+        self.pending_parents: List[Tuple[int, int, str]] = []  # (строка, новый ID задачи, исходный ID родителя)
+        self.users: Dict[Tuple[str, str], Optional[int]] = {}
+        self.boards_created = 0
+        self.tasks_created = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        
+        if target_board is not None:
+            self.board_owners[target_board.id] = target_board.created_by
+    
+    def error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+    
+    def resolve_user(self, field: str, value: str) -> Optional[int]:
+        """Найти пользователя по email или username (с кэшем на время загрузки)"""
+        key = (field, value)
+        if key not in self.users:
+            column = User.email if field == "email" else User.username
+            self.users[key] = self.db.query(User.id).filter(column == value).scalar()
+        return self.users[key]
+    
+    def resolve_board(self, row: Dict[str, Any]) -> int:
+        source_board = _source_key(row.get("board_id"))
+        if source_board is not None and source_board in self.board_ids:
+            return self.board_ids[source_board]
+        if self.target_board_id is not None:
+            return self.target_board_id
+        raise ValueError(f"board_id: unknown board '{source_board}'" if source_board else "board_id: board is required")
+    
+    def resolve_assignee(self, row: Dict[str, Any]) -> Optional[int]:
+        for field in ("email", "username"):
+            value = row.get(f"assignee_{field}")
+            if value:
+                assignee_id = self.resolve_user(field, value)
+                if assignee_id is None:
+                    raise ValueError(f"assignee_{field}: user '{value}' not found")
+                return assignee_id
+        return None
+    
+    def import_chunk(self, chunk: List[Tuple[int, Any]]) -> None:
+        """
+        Проверить и вставить пачку строк одной транзакцией.
+        Если БД отклонила пачку, её строки помечаются ошибкой, а сопоставления ID откатываются.
+        """
+        board_ids, task_ids, pending = dict(self.board_ids), len(self.task_ids), len(self.pending_parents)
+        errors, error_count = len(self.errors), self.error_count
+        
+        def restore():
+            self.board_ids = dict(board_ids)
+            for key in list(self.task_ids)[task_ids:]:
+                del self.task_ids[key]
+            del self.pending_parents[pending:]
+            del self.errors[errors:]
+            self.error_count = error_count
+        
+        def attempt():
+            # Повтор после SQLITE_BUSY начинает пачку с исходного состояния
+            restore()
+            self._import_chunk(chunk)
+        
+        try:
+            run_write_transaction(self.db, attempt)
+        except Exception as e:
+            self.db.rollback()
+            restore()
+            for line, _ in chunk:
+                self.error(line, f"Chunk rejected by database: {type(e).__name__}")
+    
+    def _import_chunk(self, chunk: List[Tuple[int, Any]]) -> None:
+        boards: List[Tuple[int, Optional[str], Board]] = []
+        task_rows: List[Tuple[int, Dict[str, Any]]] = []
+        
+        for line, row in chunk:
+            if isinstance(row, Exception):
+                self.error(line, f"Invalid JSON: {row}")
+                continue
+            if not isinstance(row, dict):
+                self.error(line, "Row must be an object")
+                continue
+            
+            row = _clean(row)
+            row_type = row.get("type", "task")
+            if row_type == "board":
+                try:
+                    data = BoardCreate.model_validate(row)
+                except ValidationError as e:
+                    self.error(line, _format_validation_error(e))
+                    continue
+                board = Board(
+                    title=data.title,
+                    description=data.description,
+                    public=data.public,
+                    created_by=self.user_id
+                )
+                boards.append((line, _source_key(row.get("id")), board))
+            elif row_type == "task":
+                task_rows.append((line, row))
+            else:
+                self.error(line, f"type: unknown row type '{row_type}'")
+        
+        # Доски вставляются первыми, чтобы задачи из той же пачки могли на них ссылаться
+        if boards:
+            self.db.add_all([board for _, _, board in boards])
+            self.db.flush()
+            self.db.add_all([BoardMember(board_id=board.id, user_id=self.user_id) for _, _, board in boards])
+            for _, source_id, board in boards:
+                if source_id is not None:
+                    self.board_ids[source_id] = board.id
+                self.board_owners[board.id] = board.created_by
+        
+        tasks: List[Tuple[int, Optional[str], Optional[str], Task]] = []
+        for line, row in task_rows:
+            try:
+                board_id = self.resolve_board(row)
+                assignee_id = self.resolve_assignee(row)
+                data = TaskCreate.model_validate({**row, "assignee_id": assignee_id})
+            except ValidationError as e:
+                self.error(line, _format_validation_error(e))
+                continue
+            except ValueError as e:
+                self.error(line, str(e))
+                continue
+            
+            task = Task(
+                title=data.title,
+                description=data.description,
+                status=data.status,
+                priority=data.priority,
+                board_id=board_id,
+                created_by=self.user_id,
+                assignee_id=data.assignee_id if data.assignee_id is not None else self.board_owners[board_id]
+            )
+            tasks.append((line, _source_key(row.get("id")), _source_key(row.get("parent_task_id")), task))
+        
+        if tasks:
+            self.db.add_all([task for _, _, _, task in tasks])
+            self.db.flush()
+            for line, source_id, source_parent, task in tasks:
+                if source_id is not None:
+                    self.task_ids[source_id] = task.id
+                if source_parent is not None:
+                    # Родитель может встретиться позже — связи проставляются после загрузки всех строк
+                    self.pending_parents.append((line, task.id, source_parent))
+        
+        self.db.commit()
+        self.db.expunge_all()
+        self.boards_created += len(boards)
+        self.tasks_created += len(tasks)
+    
+    def link_parents(self) -> None:
+        """
+        Второй проход: проставить parent_task_id по сопоставлению исходных ID.
+        Связь, замыкающая цикл, отклоняется с ошибкой в строке, которая его замкнула.
+        """
+        # Корни деревьев уже принятых связей (union-find со сжатием путей). У задачи один родитель,
+        # поэтому связь task -> parent замыкает цикл, только если корень дерева parent — сама task.
+        roots: Dict[int, int] = {}
+        
+        def find_root(task_id: int) -> int:
+            path = []
+            while task_id in roots:
+                path.append(task_id)
+                task_id = roots[task_id]
+            for node in path:
+                roots[node] = task_id
+            return task_id
+        
+        links = []
+        for line, task_id, source_parent in self.pending_parents:
+            parent_id = self.task_ids.get(source_parent)
+            if parent_id is None:
+                self.error(line, f"parent_task_id: unknown parent task '{source_parent}'")
+                continue
+            parent_root = find_root(parent_id)
+            if parent_root == task_id:
+                self.error(line, f"parent_task_id: parent task '{source_parent}' creates a cycle")
+                continue
+            roots[task_id] = parent_root
+            links.append({"id": task_id, "parent_task_id": parent_id})
+        
+        for values in _chunks(iter(links), IMPORT_CHUNK_SIZE):
+            run_write_transaction(self.db, lambda: self._link_chunk(values))
+    
+    def _link_chunk(self, values: List[Dict]) -> None:
+        self.db.execute(update(Task), values)
+        self.db.commit()
+
+
+def import_data(
+    db: Session,
+    stream: IO[bytes],
+    user_id: int,
+    user_role: str,
+    import_format: str = "ndjson",
+    board_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Загрузить доски и задачи из потока NDJSON/CSV.
+    board_id — существующая доска для задач без ссылки на доску из загрузки.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{import_format}'"
+        )
+    
+    target_board = None
+    if board_id is not None:
+        target_board = board_service.get_board_by_id(db, board_id)
+        if not target_board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Board not found"
+            )
+        check_board_access(target_board, user_id, user_role, "write", db)
+    
+    importer = _Importer(db, user_id, user_role, target_board)
+    try:
+        for chunk in _chunks(_read_rows(stream, import_format), IMPORT_CHUNK_SIZE):
+            importer.import_chunk(chunk)
+        importer.link_parents()
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be UTF-8 encoded"
+        )
+    except csv.Error as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid CSV: {e}"
+        )
+    finally:
+        if importer.boards_created or importer.tasks_created:
+            board_service.invalidate_board_caches()
+    
+    return {
+        "boards_created": importer.boards_created,
+        "tasks_created": importer.tasks_created,
+        "error_count": importer.error_count,
+        "errors": sorted(importer.errors, key=lambda item: item["line"]),
+        "board_ids": importer.board_ids,
+    }
@@ -0,0 +1,287 @@
+"""
+Сервис фоновых заданий.
+Персистентная очередь в таблице jobs: постановка, захват воркером,
+прогресс, повторы с экспоненциальной задержкой.
+"""
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.job import Job
+from app.database import write_transaction
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Обработчики заданий: тип -> функция(db, payload, context)
+_handlers: Dict[str, Callable] = {}
+
+
+class JobContext:
+    """Контекст выполнения задания, передаётся в обработчик"""
+    
+    def __init__(self, job_id: int, attempt: int):
+        self.job_id = job_id
+        self.attempt = attempt
+    
+    def progress(self, current: int, total: Optional[int] = None) -> None:
+        """Сохранить прогресс (в отдельной сессии, не затрагивая транзакцию обработчика)"""
+        from app.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            values = {"progress_current": current}
+            if total is not None:
+                values["progress_total"] = total
+            db.query(Job).filter(Job.id == self.job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def job_handler(job_type: str):
+    """Декоратор регистрации обработчика заданий указанного типа"""
+    def decorator(func: Callable) -> Callable:
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def get_handler(job_type: str) -> Optional[Callable]:
+    """Получить обработчик по типу задания"""
+    return _handlers.get(job_type)
+
+
+@write_transaction
+def enqueue(
+    db: Session,
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+    max_attempts: Optional[int] = None
+) -> Job:
+    """
+    Поставить задание в очередь.
+    Если есть активное задание с тем же dedupe_key, возвращается оно.
+    """
+    if job_type not in _handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+    
+    if dedupe_key:
+        existing = db.query(Job).filter(
+            Job.dedupe_key == dedupe_key,
+            Job.status.in_(ACTIVE_STATUSES)
+        ).first()
+        if existing:
+            return existing
+    
+    job = Job(
+        type=job_type,
+        payload=json.dumps(payload or {}),
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by=user_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    """Получить задание по ID"""
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def get_jobs(
+    db: Session,
+    user_id: Optional[int] = None,
+    status_filter: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Job]:
+    """Получить список заданий (новые первыми)"""
+    query = db.query(Job)
+    if user_id is not None:
+        query = query.filter(Job.created_by == user_id)
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+@write_transaction
+def claim_next_job(db: Session, worker_id: str) -> Optional[Job]:
+    """
+    Захватить следующее готовое к запуску задание.
+    Захват атомарный: UPDATE с условием status='queued', поэтому
+    несколько воркеров (в том числе в разных процессах) не возьмут одно задание.
+    """
+    now = datetime.utcnow()
+    candidate_id = db.query(Job.id).filter(
+        Job.status == "queued",
+        Job.run_after <= now
+    ).order_by(Job.run_after, Job.id).limit(1).scalar()
+    
+    if candidate_id is None:
+        return None
+    
+    claimed = db.query(Job).filter(
+        Job.id == candidate_id,
+        Job.status == "queued"
+    ).update({
+        "status": "running",
+        "locked_by": worker_id,
+        "attempts": Job.attempts + 1,
+        "started_at": now,
+        "heartbeat_at": now,
+        "error": None,
+    }, synchronize_session=False)
+    db.commit()
+    
+    if not claimed:
+        return None  # Задание перехватил другой воркер
+    return get_job(db, candidate_id)
+
+
+def _leased(job_id: int, worker_id: str):
+    """Условие: задание выполняется и аренда принадлежит воркеру"""
+    return (Job.id == job_id) & (Job.status == "running") & (Job.locked_by == worker_id)
+
+
+@write_transaction
+def complete_job(db: Session, job_id: int, worker_id: str, result: Any = None) -> bool:
+    """
+    Отметить задание как успешно выполненное.
+    False — аренда потеряна (задание вернули в очередь и, возможно, взял другой воркер):
+    его статус не меняется.
+    """
+    completed = db.query(Job).filter(_leased(job_id, worker_id)).update({
+        "status": "succeeded",
+        "result": json.dumps(result, default=str) if result is not None else None,
+        "locked_by": None,
+        "finished_at": datetime.utcnow(),
+    }, synchronize_session=False)
+    db.commit()
+    return bool(completed)
+
+
+def retry_delay(attempt: int) -> float:
+    """Задержка перед повтором: экспоненциальная с джиттером"""
+    base = settings.JOB_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+    return base + random.uniform(0, base / 2)
+
+
+@write_transaction
+def fail_job(db: Session, job: Job, worker_id: str, error: str, retryable: bool = True) -> bool:
+    """
+    Зафиксировать ошибку выполнения.
+    Если попытки не исчерпаны, задание возвращается в очередь с задержкой.
+    False — аренда потеряна, как в complete_job.
+    """
+    values = {"error": error, "locked_by": None}
+    if retryable and job.attempts < job.max_attempts:
+        values["status"] = "queued"
+        values["run_after"] = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        values["status"] = "failed"
+        values["finished_at"] = datetime.utcnow()
+    
+    failed = db.query(Job).filter(_leased(job.id, worker_id)).update(values, synchronize_session=False)
+    db.commit()
+    return bool(failed)
+
+
+@write_transaction
+def renew_lease(db: Session, job_id: int, worker_id: str) -> bool:
+    """Продлить аренду задания; False — задание уже не принадлежит воркеру"""
+    renewed = db.query(Job).filter(_leased(job_id, worker_id)).update(
+        {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    return bool(renewed)
+
+
+class LeaseKeeper:
+    """Поток, продлевающий аренду задания, пока выполняется обработчик"""
+    
+    def __init__(self, job_id: int, worker_id: str, interval: Optional[float] = None):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval if interval is not None else settings.JOB_HEARTBEAT_SECONDS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-lease-{job_id}", daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        from app.database import SessionLocal
+        
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                if not renew_lease(db, self.job_id, self.worker_id):
+                    return
+            except Exception:
+                pass  # Следующая попытка через interval; аренда истекает только через JOB_LOCK_TIMEOUT_SECONDS
+            finally:
+                db.close()
+
+
+@write_transaction
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Вернуть в очередь задания, чья аренда истекла: воркер не продлевал её
+    JOB_LOCK_TIMEOUT_SECONDS (упал или завис). Долгие задания живого воркера не трогаются.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    requeued = db.query(Job).filter(
+        Job.status == "running",
+        func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff
+    ).update({"status": "queued", "locked_by": None}, synchronize_session=False)
+    db.commit()
+    return requeued
+
+
+def run_job(db: Session, job: Job) -> bool:
+    """
+    Выполнить захваченное задание.
+    HTTPException с кодом 4xx считается окончательной ошибкой, остальные — повторяемыми.
+    False — аренда потеряна до записи результата, результат не сохранён.
+    """
+    # Воркер запоминается до обработчика: его коммиты и откат перечитывают job из БД,
+    # где locked_by к этому времени может принадлежать другому воркеру
+    worker_id = job.locked_by
+    handler = get_handler(job.type)
+    if handler is None:
+        return fail_job(db, job, worker_id, f"No handler registered for job type '{job.type}'", retryable=False)
+    
+    context = JobContext(job.id, job.attempts)
+    payload = json.loads(job.payload or "{}")
+    try:
+        with LeaseKeeper(job.id, worker_id):
+            result = handler(db, payload, context)
+    except HTTPException as e:
+        db.rollback()
+        return fail_job(db, job, worker_id, str(e.detail), retryable=e.status_code >= 500)
+    except Exception as e:
+        db.rollback()
+        return fail_job(db, job, worker_id, f"{type(e).__name__}: {e}")
+    return complete_job(db, job.id, worker_id, result)
+
+
+def job_location(job: Job) -> Dict[str, Any]:
+    """Ответ для эндпоинтов, поставивших задание в очередь (202 Accepted)"""
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
@@ -0,0 +1,67 @@
+"""
+Сервис заполнения базы данных тестовыми данными (обёртка над fill_database.py).
+"""
+import importlib.util
+import os
+import sys
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.services import job_service, board_service
+
+# Путь к скрипту fill_database.py в корне проекта
+FILL_DATABASE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "fill_database.py")
+)
+
+
+def _load_fill_database_module():
+    """Импортировать fill_database.py как модуль"""
+    spec = importlib.util.spec_from_file_location("fill_database", FILL_DATABASE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    
+    # Добавляем корень проекта в путь для импортов внутри скрипта
+    sys.path.insert(0, os.path.dirname(FILL_DATABASE_PATH))
+    
+    spec.loader.exec_module(module)
+    return module
+
+
+def fill_test_data(db: Session, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Заполнить БД тестовыми данными.
+    fill_database.py сам проверяет существующих пользователей, поэтому вызов безопасен повторно.
+    """
+    module = _load_fill_database_module()
+    steps = 6
+    
+    users = module.create_users(db)
+    if progress:
+        progress(1, steps)
+    boards = module.create_boards(db, users)
+    if progress:
+        progress(2, steps)
+    tasks = module.create_tasks(db, boards, users)
+    if progress:
+        progress(3, steps)
+    module.create_board_members(db, boards, users)
+    if progress:
+        progress(4, steps)
+    module.create_comments(db, tasks, users)
+    if progress:
+        progress(5, steps)
+    module.create_audit_logs(db, users, boards, tasks)
+    if progress:
+        progress(6, steps)
+    
+    board_service.invalidate_board_caches()
+    cache.invalidate_tags("users")
+    
+    return {"users": len(users), "boards": len(boards), "tasks": len(tasks)}
+
+
+@job_service.job_handler("db.seed")
+def _seed_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое заполнение БД тестовыми данными"""
+    return fill_test_data(db, progress=job.progress)
@@ -1,14 +1,22 @@
 """
 Сервис для работы с задачами.
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from typing import Callable, List, Optional, Dict, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import or_, insert, update, delete, exists, func, select, case, literal, Integer, String, Text
 from fastapi import HTTPException, status
 
 from app.models.task import Task
 from app.models.board import Board
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.models.board_member import BoardMember
+from app.models.comment import TaskComment
+from app.models.user import User
+from app.schemas.task import TaskCreate, TaskUpdate, BulkTaskPatch, TaskResponse, TaskTreeNode
+from app.services import board_service, job_service
+from app.core.cache import cache
+from app.core.etag import raise_for_version
+from app.core.group_commit import GroupCommitter
+from app.database import SessionLocal, execute_returning, write_transaction
 
 
 def get_task_by_id(db: Session, task_id: int) -> Optional[Task]:
@@ -38,167 +46,412 @@ def get_tasks_by_board(
     return query.offset(skip).limit(limit).all()
 
 
-def create_task(db: Session, board_id: int, task_data: TaskCreate, user_id: int) -> Task:
-    """Создать новую задачу"""
-    # Получаем доску для определения создателя доски
-    board = db.query(Board).filter(Board.id == board_id).first()
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Board not found"
+# Сколько кэшируется количество доступных задач (total=cached в GET /tasks/accessible)
+ACCESSIBLE_TOTAL_TTL_SECONDS = 30
+
+
+def accessible_tasks_query(
+    db: Session,
+    user_id: Optional[int],
+    user_role: str,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None
+):
+    """
+    Запрос задач, доступных пользователю.
+    Доступ проверяется коррелированными EXISTS внутри одного SQL-запроса:
+    своя или публичная доска, участие в доске, назначение на пользователя.
+    user_id=None — гостевая сессия без записи в users: только публичные доски.
+    """
+    query = db.query(Task)
+    
+    if user_id is None:
+        query = query.filter(exists().where(Board.id == Task.board_id, Board.public == True))
+    elif user_role != "admin":
+        board_visible = exists().where(
+            Board.id == Task.board_id,
+            or_(Board.created_by == user_id, Board.public == True)
+        )
+        is_member = exists().where(
+            BoardMember.board_id == Task.board_id,
+            BoardMember.user_id == user_id
         )
+        query = query.filter(or_(Task.assignee_id == user_id, board_visible, is_member))
     
-    # Если assignee_id не указан, назначаем создателя доски по умолчанию
-    assignee_id = task_data.assignee_id if task_data.assignee_id is not None else board.created_by
-    
-    db_task = Task(
-        title=task_data.title,
-        description=task_data.description,
-        status=task_data.status,
-        priority=task_data.priority,
-        board_id=board_id,
-        created_by=user_id,
-        assignee_id=assignee_id
+    if status_filter:
+        query = query.filter(Task.status == status_filter)
+    if priority_filter:
+        query = query.filter(Task.priority == priority_filter)
+    
+    return query
+
+
+def filter_accessible_task_ids(db: Session, task_ids: List[int], user_id: Optional[int], user_role: str) -> List[int]:
+    """Оставить из task_ids только задачи, доступные пользователю (один запрос)"""
+    if not task_ids:
+        return []
+    query = accessible_tasks_query(db, user_id, user_role).filter(Task.id.in_(task_ids))
+    accessible = {row.id for row in query.with_entities(Task.id).all()}
+    return [task_id for task_id in task_ids if task_id in accessible]
+
+
+def _count_accessible_tasks(query, cache_key: Tuple) -> int:
+    """Количество доступных задач с кэшированием на ACCESSIBLE_TOTAL_TTL_SECONDS"""
+    return cache.get_or_set(
+        "accessible_total:" + ":".join(str(part) for part in cache_key),
+        lambda: query.order_by(None).with_entities(func.count(Task.id)).scalar(),
+        ttl=ACCESSIBLE_TOTAL_TTL_SECONDS
     )
+
+
+def get_accessible_tasks(
+    db: Session,
+    user_id: Optional[int],
+    user_role: str,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    cursor: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    total_mode: str = "cached"
+) -> Tuple[List[Task], Optional[int], Optional[int]]:
+    """
+    Получить задачи, доступные пользователю.
+    Keyset-пагинация по Task.id: cursor — ID последней задачи предыдущей страницы.
+    total_mode: exact — точный COUNT, cached — COUNT с кэшированием, none — без подсчёта.
+    Возвращает (задачи, total, next_cursor).
+    """
+    query = accessible_tasks_query(db, user_id, user_role, status_filter, priority_filter)
     
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    total = None
+    if total_mode == "exact":
+        total = query.count()
+    elif total_mode == "cached":
+        total = _count_accessible_tasks(query, (user_id, user_role, status_filter, priority_filter))
     
-    return db_task
+    page_query = query.order_by(Task.id)
+    if cursor is not None:
+        page_query = page_query.filter(Task.id > cursor)
+    elif skip:
+        page_query = page_query.offset(skip)
+    
+    # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+    tasks = page_query.limit(limit + 1).all()
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = tasks[-1].id
+    
+    return tasks, total, next_cursor
 
 
-def update_task(db: Session, task_id: int, task_data: TaskUpdate) -> Task:
-    """Обновить задачу"""
-    db_task = get_task_by_id(db, task_id)
+def get_task_trees(db: Session, roots_condition, max_depth: int = 10) -> List[TaskTreeNode]:
+    """
+    Получить деревья подзадач одним запросом с рекурсивными CTE.
+    roots_condition — условие выбора корневых задач.
+    Для каждого узла в SQL считаются subtree_total и subtree_done
+    (в пределах max_depth, включая сам узел).
+    """
+    # Обход иерархии вниз от корней с ограничением глубины
+    tree = select(
+        Task.id.label("id"),
+        Task.parent_task_id.label("parent_id"),
+        literal(0).label("depth")
+    ).where(roots_condition).cte("task_tree", recursive=True)
+    child = aliased(Task)
+    tree = tree.union_all(
+        select(child.id, child.parent_task_id, tree.c.depth + 1)
+        .join(tree, child.parent_task_id == tree.c.id)
+        .where(tree.c.depth < max_depth)
+    )
     
-    if not db_task:
+    # Замыкание (предок, потомок) по строкам найденного дерева: шаг — только к строке
+    # следующего уровня, поэтому рекурсия ограничена max_depth и при циклах в parent_task_id
+    closure = select(
+        tree.c.id.label("ancestor_id"),
+        tree.c.id.label("descendant_id"),
+        tree.c.depth.label("descendant_depth")
+    ).cte("task_closure", recursive=True)
+    closure = closure.union_all(
+        select(closure.c.ancestor_id, tree.c.id, tree.c.depth)
+        .join(tree, (tree.c.parent_id == closure.c.descendant_id) & (tree.c.depth == closure.c.descendant_depth + 1))
+    )
+    
+    # При цикле задача встречается в дереве несколько раз — потомки считаются без повторов
+    descendant = aliased(Task)
+    rollup = select(
+        closure.c.ancestor_id.label("task_id"),
+        func.count(closure.c.descendant_id.distinct()).label("total"),
+        func.count(case((descendant.status == "done", descendant.id)).distinct()).label("done")
+    ).join(descendant, descendant.id == closure.c.descendant_id).group_by(closure.c.ancestor_id).subquery()
+    
+    rows = db.execute(
+        select(Task, tree.c.depth, rollup.c.total, rollup.c.done)
+        .join(tree, tree.c.id == Task.id)
+        .join(rollup, rollup.c.task_id == Task.id)
+        .order_by(tree.c.depth, Task.order, Task.id)
+    ).all()
+    
+    # Сборка вложенной структуры; строки упорядочены по глубине
+    nodes: Dict[int, TaskTreeNode] = {}
+    roots: List[TaskTreeNode] = []
+    for task, depth, total, done in rows:
+        if task.id in nodes:
+            continue  # Цикл в parent_task_id: задача уже добавлена на меньшей глубине
+        node = TaskTreeNode(
+            **TaskResponse.model_validate(task).model_dump(),
+            parent_task_id=task.parent_task_id,
+            depth=depth,
+            subtree_total=total,
+            subtree_done=done or 0
+        )
+        nodes[task.id] = node
+        parent = nodes.get(task.parent_task_id) if depth > 0 else None
+        if parent is not None:
+            parent.subtasks.append(node)
+        else:
+            roots.append(node)
+    
+    return roots
+
+
+def get_task_tree(db: Session, task_id: int, max_depth: int = 10) -> TaskTreeNode:
+    """Получить дерево подзадач задачи"""
+    trees = get_task_trees(db, Task.id == task_id, max_depth=max_depth)
+    if not trees:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    return trees[0]
+
+
+def get_board_task_trees(db: Session, board_id: int, max_depth: int = 10) -> List[TaskTreeNode]:
+    """Получить деревья подзадач для всех корневых задач доски"""
+    return get_task_trees(
+        db,
+        (Task.board_id == board_id) & (Task.parent_task_id.is_(None)),
+        max_depth=max_depth
+    )
+
+
+@write_transaction
+def create_task(db: Session, board_id: int, task_data: TaskCreate, user_id: int) -> Task:
+    """
+    Создать новую задачу.
+    Один INSERT ... SELECT ... RETURNING: строка вставляется, только если доска существует,
+    исполнитель по умолчанию — создатель доски.
+    """
+    # Если assignee_id не указан, назначаем создателя доски по умолчанию
+    assignee_id = (
+        literal(task_data.assignee_id, Integer) if task_data.assignee_id is not None else Board.created_by
+    )
+    
+    db_task = execute_returning(db, insert(Task).from_select(
+        ["title", "description", "status", "priority", "board_id", "created_by", "assignee_id"],
+        select(
+            literal(task_data.title, String),
+            literal(task_data.description, Text),
+            literal(task_data.status, String),
+            literal(task_data.priority, String),
+            Board.id,
+            literal(user_id, Integer),
+            assignee_id
+        ).where(Board.id == board_id)
+    ).returning(Task))
+    
+    if db_task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    
+    db.commit()
+    board_service.invalidate_board_caches(board_id)
     
-    # Обновление полей
+    return db_task
+
+
+@write_transaction
+def update_task(db: Session, task_id: int, task_data: TaskUpdate, expected_version: Optional[int] = None) -> Task:
+    """
+    Обновить задачу (UPDATE ... RETURNING, без чтения до и после).
+    expected_version (из If-Match) проверяется в WHERE того же UPDATE:
+    если задачу успели изменить — 412.
+    """
     update_data = task_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
+    if update_data:
+        stmt = update(Task).where(Task.id == task_id)
+        if expected_version is not None:
+            stmt = stmt.where(Task.version == expected_version)
+        db_task = execute_returning(
+            db, stmt.values(**update_data, version=Task.version + 1).returning(Task), Task, task_id
+        )
+    else:
+        db_task = get_task_by_id(db, task_id)
+        if db_task and expected_version is not None and db_task.version != expected_version:
+            db_task = None
+    
+    if not db_task:
+        if expected_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        raise_for_version(db.query(Task.version).filter(Task.id == task_id).scalar(), "Task not found")
     
     db.commit()
-    db.refresh(db_task)
+    board_service.invalidate_board_caches(db_task.board_id)
     
     return db_task
 
 
+def delete_tasks_where(db: Session, condition) -> int:
+    """
+    Удалить задачи, подходящие под условие, set-based запросами (без загрузки в память).
+    Удаляет комментарии задач, отвязывает подзадачи (parent_task_id = NULL)
+    и удаляет сами задачи. Коммит выполняет вызывающий код.
+    """
+    task_ids = select(Task.id).where(condition)
+    
+    db.execute(
+        delete(TaskComment).where(TaskComment.task_id.in_(task_ids)),
+        execution_options={"synchronize_session": False}
+    )
+    db.execute(
+        update(Task).where(Task.parent_task_id.in_(task_ids)).values(parent_task_id=None),
+        execution_options={"synchronize_session": False}
+    )
+    result = db.execute(
+        delete(Task).where(condition),
+        execution_options={"synchronize_session": False}
+    )
+    
+    return result.rowcount
+
+
+@write_transaction
 def delete_task(db: Session, task_id: int) -> bool:
     """Удалить задачу"""
-    db_task = get_task_by_id(db, task_id)
+    board_id = db.query(Task.board_id).filter(Task.id == task_id).scalar()
+    deleted = delete_tasks_where(db, Task.id == task_id)
     
-    if not db_task:
+    if not deleted:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    db.delete(db_task)
     db.commit()
+    board_service.invalidate_board_caches(board_id)
     
     return True
 
 
+@write_transaction
 def move_task(db: Session, task_id: int, target_board_id: int) -> Task:
-    """Перенести задачу на другую доску"""
-    task = get_task_by_id(db, task_id)
-    if not task:
+    """
+    Перенести задачу на другую доску (UPDATE ... RETURNING, без refresh после коммита).
+    Существование целевой доски проверяется в WHERE того же UPDATE.
+    """
+    source_board_id = db.query(Task.board_id).filter(Task.id == task_id).scalar()
+    if source_board_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    target_board = db.query(Board).filter(Board.id == target_board_id).first()
-    if not target_board:
+    target_exists = select(Board.id).where(Board.id == target_board_id).exists()
+    task = execute_returning(
+        db,
+        update(Task).where(Task.id == task_id, target_exists)
+        .values(board_id=target_board_id, version=Task.version + 1).returning(Task),
+        Task, task_id
+    )
+    if task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Target board not found"
         )
     
-    task.board_id = target_board_id
     db.commit()
-    db.refresh(task)
+    board_service.invalidate_board_caches(source_board_id)
+    board_service.invalidate_board_caches(target_board_id)
     
     return task
 
 
+# Задач в одном UPDATE при изменении порядка (параметров: две на WHEN и одна в IN)
+REORDER_CHUNK_SIZE = 500
+
+# Смена статуса и приоритета — частые мелкие записи (канбан): выполняются групповым коммитом
+task_writes = GroupCommitter(lambda: SessionLocal(expire_on_commit=False), name="task-group-commit")
+
+VALID_STATUSES = ["todo", "in_progress", "done"]
+VALID_PRIORITIES = ["low", "medium", "high"]
+
+# Переходы статуса для next-status (done остаётся done)
+STATUS_FLOW = {
+    "todo": "in_progress",
+    "in_progress": "done",
+    "done": "done"
+}
+
+
+def _update_task_fields(task_id: int, **values) -> Callable[[Session], Task]:
+    """Операция группового коммита: UPDATE ... RETURNING одной задачи"""
+    def op(db: Session) -> Task:
+        task = db.execute(
+            update(Task).where(Task.id == task_id).values(**values, version=Task.version + 1).returning(Task),
+            execution_options={"synchronize_session": False}
+        ).scalar_one_or_none()
+        if task is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        return task
+    
+    return op
+
+
+def _write_task_fields(db: Session, task_id: int, **values) -> Task:
+    task = task_writes.execute(db, _update_task_fields(task_id, **values))
+    board_service.invalidate_board_caches(task.board_id)
+    return task
+
+
 def update_task_status(db: Session, task_id: int, new_status: str) -> Task:
     """Изменить статус задачи"""
-    valid_statuses = ["todo", "in_progress", "done"]
-    if new_status not in valid_statuses:
+    if new_status not in VALID_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {valid_statuses}"
+            detail=f"Invalid status. Must be one of: {VALID_STATUSES}"
         )
     
-    task = get_task_by_id(db, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    task.status = new_status
-    db.commit()
-    db.refresh(task)
-    
-    return task
+    return _write_task_fields(db, task_id, status=new_status)
 
 
 def get_next_status(current_status: str) -> str:
     """Получить следующий статус"""
-    status_flow = {
-        "todo": "in_progress",
-        "in_progress": "done",
-        "done": "done"  # Остаётся на done
-    }
-    return status_flow.get(current_status, "todo")
+    return STATUS_FLOW.get(current_status, "todo")
 
 
 def update_task_to_next_status(db: Session, task_id: int) -> Task:
-    """Изменить статус задачи на следующий"""
-    task = get_task_by_id(db, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    next_status = get_next_status(task.status)
-    task.status = next_status
-    db.commit()
-    db.refresh(task)
-    
-    return task
+    """Изменить статус задачи на следующий (переход вычисляется в том же UPDATE)"""
+    return _write_task_fields(db, task_id, status=case(STATUS_FLOW, value=Task.status, else_="todo"))
 
 
 def update_task_priority(db: Session, task_id: int, new_priority: str) -> Task:
     """Изменить приоритет задачи"""
-    valid_priorities = ["low", "medium", "high"]
-    if new_priority not in valid_priorities:
+    if new_priority not in VALID_PRIORITIES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid priority. Must be one of: {valid_priorities}"
-        )
-    
-    task = get_task_by_id(db, task_id)
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
+            detail=f"Invalid priority. Must be one of: {VALID_PRIORITIES}"
         )
     
-    task.priority = new_priority
-    db.commit()
-    db.refresh(task)
-    
-    return task
+    return _write_task_fields(db, task_id, priority=new_priority)
 
 
 def search_tasks(db: Session, query: str, skip: int = 0, limit: int = 100) -> List[Task]:
@@ -214,40 +467,175 @@ def search_tasks(db: Session, query: str, skip: int = 0, limit: int = 100) -> Li
     return tasks
 
 
+@write_transaction
 def bulk_update_status(db: Session, task_ids: List[int], new_status: str) -> int:
     """Массовое изменение статуса задач"""
-    valid_statuses = ["todo", "in_progress", "done"]
-    if new_status not in valid_statuses:
+    if new_status not in VALID_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {valid_statuses}"
+            detail=f"Invalid status. Must be one of: {VALID_STATUSES}"
         )
     
     updated = db.query(Task).filter(Task.id.in_(task_ids)).update(
-        {"status": new_status},
+        {"status": new_status, "version": Task.version + 1},
         synchronize_session=False
     )
     db.commit()
+    board_service.invalidate_board_caches()
     
     return updated
 
 
+def _check_bulk_assignee(db: Session, assignee_id: int, target_board_id: Optional[int], conditions) -> None:
+    """Исполнитель должен существовать и быть участником каждой доски, на которой окажутся задачи"""
+    if not db.query(User.id).filter(User.id == assignee_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignee not found"
+        )
+    
+    if target_board_id is not None:
+        board_ids = select(literal(target_board_id, Integer))
+    else:
+        board_ids = select(Task.board_id).where(*conditions).distinct()
+    is_member = exists().where(BoardMember.board_id == Board.id, BoardMember.user_id == assignee_id)
+    foreign_boards = [
+        row.id for row in
+        db.query(Board.id).filter(
+            Board.id.in_(board_ids),
+            Board.created_by != assignee_id,
+            ~is_member
+        ).order_by(Board.id).all()
+    ]
+    if foreign_boards:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Assignee is not a member of boards: {foreign_boards}"
+        )
+
+
+@write_transaction
+def bulk_patch_tasks(db: Session, payload: BulkTaskPatch, user_id: int, user_role: str) -> Dict:
+    """
+    Массовое частичное изменение задач одним UPDATE.
+    Изменяются только задачи на досках, которые пользователь может изменять.
+    Возвращает итог по каждому ID: updated, not_found или forbidden.
+    """
+    # Поля, которые нельзя обнулить (NOT NULL в БД)
+    values = {
+        field: value
+        for field, value in payload.changes.model_dump(exclude_unset=True).items()
+        if value is not None or field in ("description", "assignee_id")
+    }
+    
+    if payload.target_board_id is not None:
+        target_board = db.query(Board).filter(Board.id == payload.target_board_id).first()
+        if not target_board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Target board not found"
+            )
+        if user_role != "admin" and target_board.created_by != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to move tasks to the target board"
+            )
+        values["board_id"] = payload.target_board_id
+    
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No changes specified"
+        )
+    
+    conditions = []
+    task_ids: List[int] = []
+    if payload.task_ids is not None:
+        task_ids = list(dict.fromkeys(payload.task_ids))
+        if not task_ids:
+            return {"updated": 0, "results": {}}
+        conditions.append(Task.id.in_(task_ids))
+    else:
+        task_filter = payload.filter
+        if task_filter.board_id is not None:
+            conditions.append(Task.board_id == task_filter.board_id)
+        if task_filter.status:
+            conditions.append(Task.status == task_filter.status)
+        if task_filter.priority:
+            conditions.append(Task.priority == task_filter.priority)
+        if task_filter.assignee_id is not None:
+            conditions.append(Task.assignee_id == task_filter.assignee_id)
+    
+    # Ограничиваем изменение досками, доступными на запись
+    writable_boards = board_service.get_writable_board_ids_query(db, user_id, user_role)
+    if writable_boards is not None:
+        conditions.append(Task.board_id.in_(writable_boards))
+    
+    if values.get("assignee_id") is not None:
+        _check_bulk_assignee(db, values["assignee_id"], payload.target_board_id, conditions)
+    
+    stmt = update(Task).where(*conditions)
+    updated_ids = db.execute(
+        stmt.values(**values, version=Task.version + 1).returning(Task.id),
+        execution_options={"synchronize_session": False}
+    ).scalars().all()
+    
+    results = {task_id: "updated" for task_id in updated_ids}
+    
+    # Для явно переданных ID различаем несуществующие и недоступные задачи
+    skipped_ids = [task_id for task_id in task_ids if task_id not in results]
+    if skipped_ids:
+        existing_ids = {
+            row.id for row in db.query(Task.id).filter(Task.id.in_(skipped_ids)).all()
+        }
+        for task_id in skipped_ids:
+            results[task_id] = "forbidden" if task_id in existing_ids else "not_found"
+    
+    db.commit()
+    if updated_ids:
+        board_service.invalidate_board_caches()
+    
+    return {"updated": len(updated_ids), "results": results}
+
+
+@write_transaction
 def bulk_delete_tasks(db: Session, task_ids: List[int]) -> int:
-    """Массовое удаление задач"""
-    deleted = db.query(Task).filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+    """Массовое удаление задач (вместе с комментариями)"""
+    deleted = delete_tasks_where(db, Task.id.in_(task_ids))
     db.commit()
+    board_service.invalidate_board_caches()
     
     return deleted
 
 
+@write_transaction
 def reorder_tasks(db: Session, board_id: int, ordered_ids: List[int]) -> bool:
     """Изменение порядка задач на доске"""
-    # Обновляем порядок для каждой задачи
-    for index, task_id in enumerate(ordered_ids):
-        task = get_task_by_id(db, task_id)
-        if task and task.board_id == board_id:
-            task.order = index
+    # Один UPDATE ... SET order = CASE id ... на REORDER_CHUNK_SIZE задач; задачи других досок не меняются.
+    # При повторе ID действует последняя позиция
+    positions = {task_id: index for index, task_id in enumerate(ordered_ids)}
+    task_ids = list(positions)
+    for start in range(0, len(task_ids), REORDER_CHUNK_SIZE):
+        chunk = task_ids[start:start + REORDER_CHUNK_SIZE]
+        db.execute(
+            update(Task).where(Task.board_id == board_id, Task.id.in_(chunk))
+            .values(order=case({task_id: positions[task_id] for task_id in chunk}, value=Task.id)),
+            execution_options={"synchronize_session": False}
+        )
     
     db.commit()
+    board_service.invalidate_board_caches(board_id)
     return True
 
+
+@job_service.job_handler("tasks.bulk_delete")
+def _bulk_delete_tasks_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое массовое удаление задач"""
+    return {"deleted": bulk_delete_tasks(db, payload["task_ids"])}
+
+
+@job_service.job_handler("tasks.reorder")
+def _reorder_tasks_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое изменение порядка задач"""
+    reorder_tasks(db, payload["board_id"], payload["ordered_ids"])
+    return {"board_id": payload["board_id"], "count": len(payload["ordered_ids"])}
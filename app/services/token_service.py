@@ -0,0 +1,216 @@
+"""
+Сервис токенов: выдача пары access/refresh, ротация refresh-токена и отзыв.
+
+Отзывы пишутся в таблицу token_revocations и сразу попадают в структуру
+security.revocations текущего процесса; остальные процессы подтягивают их
+фоновой синхронизацией (RevocationSync) раз в REVOCATION_SYNC_SECONDS.
+"""
+import calendar
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token, create_refresh_token, decode_access_token, decode_refresh_token,
+    token_jti, revocations
+)
+from app.models.token_revocation import TokenRevocation
+from app.database import write_transaction
+
+# Отзыв пользователя действует, пока жив самый долгоживущий токен (refresh)
+USER_REVOCATION_TTL = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+# Последняя прочитанная запись token_revocations (для инкрементальной синхронизации)
+_last_synced_id = 0
+_sync_lock = threading.Lock()
+
+
+def _timestamp(value: datetime) -> float:
+    """UTC datetime -> Unix-время с долями секунды (iat токенов тоже с долями)"""
+    return calendar.timegm(value.timetuple()) + value.microsecond / 1e6
+
+
+def issue_tokens(user_id: int) -> Dict:
+    """Выдать пару access/refresh-токенов"""
+    return {
+        "access_token": create_access_token(data={"sub": user_id}),
+        "refresh_token": create_refresh_token(user_id),
+        "token_type": "bearer",
+        "expires_in": settings.JWT_EXPIRE_MINUTES * 60,
+    }
+
+
+@write_transaction
+def _store_revocation(db: Session, jti: Optional[str], user_id: Optional[int], expires_at: datetime) -> TokenRevocation:
+    revocation = TokenRevocation(jti=jti, user_id=user_id, expires_at=expires_at)
+    db.add(revocation)
+    db.commit()
+    return revocation
+
+
+def revoke_token(db: Session, token: str) -> None:
+    """Отозвать токен (access или refresh)"""
+    payload = decode_access_token(token)
+    jti = token_jti(payload, token)
+    if revocations.is_revoked(jti, None, 0):
+        return
+    
+    sub = payload.get("sub")
+    try:
+        _store_revocation(
+            db, jti,
+            sub if isinstance(sub, int) else None,
+            datetime.utcfromtimestamp(payload["exp"])
+        )
+    except IntegrityError:
+        db.rollback()  # Уже отозван (в том числе другим процессом)
+    revocations.add(jti, float(payload["exp"]))
+
+
+def revoke_user(db: Session, user_id: int) -> None:
+    """Отозвать все ранее выданные токены пользователя"""
+    revocation = _store_revocation(db, None, user_id, datetime.utcnow() + USER_REVOCATION_TTL)
+    revocations.add_user(user_id, _timestamp(revocation.revoked_at))
+
+
+def refresh_tokens(db: Session, refresh_token: str) -> Dict:
+    """
+    Обменять refresh-токен на новую пару (ротация: старый refresh-токен отзывается).
+    Повторное использование уже обменянного refresh-токена считается утечкой —
+    отзываются все токены пользователя.
+    """
+    payload = decode_refresh_token(refresh_token)
+    user_id = payload["sub"]
+    jti = token_jti(payload, refresh_token)
+    
+    # Без sub проверяется только точное множество jti: токен уже обменян или отозван
+    if revocations.is_revoked(jti, None, 0):
+        _reject_reused_refresh_token(db, user_id)
+    if revocations.is_revoked(jti, user_id, float(payload.get("iat", 0))):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    
+    try:
+        # Уникальный jti: из двух одновременных обменов одного токена пройдёт только один
+        _store_revocation(db, jti, user_id, datetime.utcfromtimestamp(payload["exp"]))
+    except IntegrityError:
+        db.rollback()
+        _reject_reused_refresh_token(db, user_id)
+    revocations.add(jti, float(payload["exp"]))
+    
+    from app.services import user_service
+    
+    if not user_service.get_user_by_id(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    return issue_tokens(user_id)
+
+
+def _reject_reused_refresh_token(db: Session, user_id: int) -> None:
+    revoke_user(db, user_id)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token has already been used"
+    )
+
+
+def load_revocations(db: Session) -> None:
+    """
+    Полностью пересобрать структуру отзывов из таблицы (при запуске и периодически).
+    Истёкшие записи при этом удаляются.
+    """
+    global _last_synced_id
+    
+    now = datetime.utcnow()
+    with _sync_lock:
+        db.query(TokenRevocation).filter(TokenRevocation.expires_at <= now).delete(synchronize_session=False)
+        db.commit()
+        
+        rows = db.query(
+            TokenRevocation.id, TokenRevocation.jti, TokenRevocation.user_id,
+            TokenRevocation.revoked_at, TokenRevocation.expires_at
+        ).all()
+        revocations.rebuild(
+            tokens=[(row.jti, _timestamp(row.expires_at)) for row in rows if row.jti],
+            users=[(row.user_id, _timestamp(row.revoked_at)) for row in rows if not row.jti],
+            user_ttl=USER_REVOCATION_TTL.total_seconds()
+        )
+        _last_synced_id = max((row.id for row in rows), default=_last_synced_id)
+
+
+def sync_revocations(db: Session) -> int:
+    """Подтянуть отзывы, записанные после последней синхронизации (в том числе другими процессами)"""
+    global _last_synced_id
+    
+    with _sync_lock:
+        rows = db.query(
+            TokenRevocation.id, TokenRevocation.jti, TokenRevocation.user_id,
+            TokenRevocation.revoked_at, TokenRevocation.expires_at
+        ).filter(TokenRevocation.id > _last_synced_id).order_by(TokenRevocation.id).all()
+        
+        for row in rows:
+            if row.jti:
+                revocations.add(row.jti, _timestamp(row.expires_at))
+            else:
+                revocations.add_user(row.user_id, _timestamp(row.revoked_at))
+            _last_synced_id = row.id
+    
+    return len(rows)
+
+
+class RevocationSync:
+    """Фоновый поток синхронизации отзывов; раз в час — полная пересборка с очисткой"""
+    
+    REBUILD_INTERVAL = 3600
+    
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else settings.REVOCATION_SYNC_SECONDS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        from app.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            load_revocations(db)
+        finally:
+            db.close()
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="revocation-sync", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _loop(self) -> None:
+        from app.database import SessionLocal
+        
+        last_rebuild = time.monotonic()
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                if time.monotonic() - last_rebuild >= self.REBUILD_INTERVAL:
+                    load_revocations(db)
+                    last_rebuild = time.monotonic()
+                else:
+                    sync_revocations(db)
+            except Exception as e:
+                db.rollback()
+                print(f"⚠ Revocation sync failed: {e}")
+            finally:
+                db.close()
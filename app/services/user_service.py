@@ -1,13 +1,22 @@
 """
 Сервис для работы с пользователями.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import delete, update, select
 from fastapi import HTTPException, status
 
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.models.board import Board
+from app.models.board_member import BoardMember
+from app.models.task import Task
+from app.models.archive import ArchivedTask
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserSummary
 from app.core.security import get_password_hash
+from app.core.cache import cache
+from app.core.dataloader import DataLoader
+from app.services import job_service, board_service, token_service
+from app.database import write_transaction
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -30,12 +39,41 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 
+# Сколько хранится публичный список пользователей (инвалидация по изменениям, TTL — страховка)
+PUBLIC_USERS_TTL_SECONDS = 300
+
+
+def get_public_users(db: Session, skip: int = 0, limit: int = 100) -> List[Dict]:
+    """Публичный список пользователей (кэшируется до изменения пользователей)"""
+    return cache.get_or_set(
+        f"users:public:{skip}:{limit}",
+        lambda: [
+            UserResponse.model_validate(user).model_dump(mode="json")
+            for user in get_all_users(db, skip=skip, limit=limit)
+        ],
+        ttl=PUBLIC_USERS_TTL_SECONDS,
+        tags=("users",)
+    )
+
+
+def get_user_summaries(db: Session, user_ids: List[int]) -> Dict[int, UserSummary]:
+    """Краткие данные пользователей по списку ID (один IN-запрос)"""
+    rows = db.query(User.id, User.username, User.avatar_url).filter(User.id.in_(user_ids)).all()
+    return {row.id: UserSummary.model_validate(row) for row in rows}
+
+
+def user_loader(db: Session) -> DataLoader:
+    """Пакетный загрузчик кратких данных пользователей на время запроса"""
+    return DataLoader(lambda user_ids: get_user_summaries(db, user_ids))
+
+
 def count_users(db: Session) -> int:
     """Подсчитать количество пользователей"""
     return db.query(User).count()
 
 
-def create_user(db: Session, user_data: UserCreate) -> User:
+@write_transaction
+def create_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
     """
     Создать нового пользователя-админа.
     Проверяет уникальность email и username.
@@ -60,18 +98,20 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash or get_password_hash(user_data.password),
         role="admin"
     )
     
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    cache.invalidate_tags("users")
     
     return db_user
 
 
-def create_regular_user(db: Session, user_data: UserCreate) -> User:
+@write_transaction
+def create_regular_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
     """
     Создать нового обычного пользователя (не админа).
     Проверяет уникальность email и username.
@@ -96,18 +136,20 @@ def create_regular_user(db: Session, user_data: UserCreate) -> User:
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash or get_password_hash(user_data.password),
         role="user"  # Обычный пользователь, не админ
     )
     
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    cache.invalidate_tags("users")
     
     return db_user
 
 
-def create_guest_user(db: Session, user_data: UserCreate) -> User:
+@write_transaction
+def create_guest_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
     """
     Создать нового гостя (пользователь с ограниченными правами).
     Гости могут только просматривать публичные доски.
@@ -133,17 +175,40 @@ def create_guest_user(db: Session, user_data: UserCreate) -> User:
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash or get_password_hash(user_data.password),
         role="guest"  # Гость с ограниченными правами
     )
     
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    cache.invalidate_tags("users")
     
     return db_user
 
 
+@write_transaction
+def set_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    """Сохранить новый хэш пароля (смена пароля или обновление параметров хэширования)"""
+    db.query(User).filter(User.id == user_id).update(
+        {"password_hash": password_hash},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+@write_transaction
+def set_avatar_url(db: Session, user_id: int, avatar_url: str) -> None:
+    """Сохранить URL аватара"""
+    db.query(User).filter(User.id == user_id).update(
+        {"avatar_url": avatar_url},
+        synchronize_session=False
+    )
+    db.commit()
+    cache.invalidate_tags("users")
+
+
+@write_transaction
 def update_user(db: Session, user_id: int, user_data: UserUpdate) -> User:
     """
     Обновить данные пользователя.
@@ -186,23 +251,54 @@ def update_user(db: Session, user_id: int, user_data: UserUpdate) -> User:
     
     db.commit()
     db.refresh(user)
+    cache.invalidate_tags("users")
     
     return user
 
 
+@write_transaction
 def delete_user(db: Session, user_id: int) -> bool:
     """
     Удалить пользователя.
+    Set-based запросами удаляются его доски (с задачами и участниками),
+    созданные им задачи (включая архивные) и членство в досках;
+    назначенные задачи остаются без исполнителя.
     """
-    user = get_user_by_id(db, user_id)
-    if not user:
+    from app.services import task_service, archive_service
+    
+    if not db.query(User.id).filter(User.id == user_id).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    db.delete(user)
+    user_boards = select(Board.id).where(Board.created_by == user_id)
+    options = {"synchronize_session": False}
+    
+    task_service.delete_tasks_where(db, Task.board_id.in_(user_boards))
+    task_service.delete_tasks_where(db, Task.created_by == user_id)
+    db.execute(update(Task).where(Task.assignee_id == user_id).values(assignee_id=None), execution_options=options)
+    archive_service.purge_archived_where(
+        db, ArchivedTask.board_id.in_(user_boards) | (ArchivedTask.created_by == user_id)
+    )
+    archive_service.unassign_archived(db, user_id)
+    db.execute(
+        delete(BoardMember).where((BoardMember.user_id == user_id) | BoardMember.board_id.in_(user_boards)),
+        execution_options=options
+    )
+    db.execute(delete(Board).where(Board.created_by == user_id), execution_options=options)
+    db.execute(delete(User).where(User.id == user_id), execution_options=options)
     db.commit()
+    token_service.revoke_user(db, user_id)
+    board_service.invalidate_board_caches()
+    cache.invalidate_tags("users")
     
     return True
 
+
+
+@job_service.job_handler("user.delete")
+def _delete_user_job(db: Session, payload: Dict, job: job_service.JobContext):
+    """Фоновое удаление пользователя"""
+    delete_user(db, payload["user_id"])
+    return {"user_id": payload["user_id"]}
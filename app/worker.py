@@ -0,0 +1,128 @@
+"""
+Воркер фоновых заданий.
+
+Запускается внутри приложения (JOB_WORKERS > 0) или отдельным процессом:
+    python -m app.worker --concurrency 2
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from app.core.config import settings
+from app.database import SessionLocal, init_db
+from app.services import job_service
+
+
+class JobWorker:
+    """Пул потоков, выбирающих задания из персистентной очереди"""
+    
+    def __init__(self, concurrency: int = 1, poll_interval: Optional[float] = None, name: Optional[str] = None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval if poll_interval is not None else settings.JOB_POLL_INTERVAL
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    def start(self) -> None:
+        """Запустить потоки воркера"""
+        self._stop.clear()
+        self._requeue_stale()
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._loop,
+                args=(f"{self.name}#{index}",),
+                name=f"job-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Остановить потоки (текущие задания дорабатывают до конца или до таймаута)"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def run_once(self, worker_id: Optional[str] = None) -> bool:
+        """Выполнить одно задание из очереди. Возвращает False, если очередь пуста."""
+        db = SessionLocal()
+        try:
+            job = job_service.claim_next_job(db, worker_id or self.name)
+            if job is None:
+                return False
+            job_service.run_job(db, job)
+            return True
+        finally:
+            db.close()
+    
+    def _requeue_stale(self) -> None:
+        db = SessionLocal()
+        try:
+            job_service.requeue_stale_jobs(db)
+        finally:
+            db.close()
+    
+    def _enqueue_archive_sweep(self) -> None:
+        """Поставить перенос давно выполненных задач в архив (активное задание не дублируется)"""
+        db = SessionLocal()
+        try:
+            job_service.enqueue(db, "archive.done_tasks", dedupe_key="archive.done_tasks")
+        finally:
+            db.close()
+    
+    def _loop(self, worker_id: str) -> None:
+        last_stale_check = time.monotonic()
+        last_archive_sweep = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                has_work = self.run_once(worker_id)
+            except Exception:
+                traceback.print_exc()
+                has_work = False
+            
+            if time.monotonic() - last_stale_check > settings.JOB_LOCK_TIMEOUT_SECONDS:
+                last_stale_check = time.monotonic()
+                self._requeue_stale()
+            
+            if (
+                settings.ARCHIVE_DONE_AFTER_DAYS > 0
+                and time.monotonic() - last_archive_sweep > settings.ARCHIVE_SWEEP_INTERVAL_SECONDS
+            ):
+                last_archive_sweep = time.monotonic()
+                try:
+                    self._enqueue_archive_sweep()
+                except Exception:
+                    traceback.print_exc()
+            
+            if not has_work:
+                self._stop.wait(self.poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воркер фоновых заданий Task Management System")
+    parser.add_argument("--concurrency", type=int, default=max(settings.JOB_WORKERS, 1))
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL)
+    args = parser.parse_args()
+    
+    init_db()
+    # Регистрация обработчиков заданий
+    import app.services  # noqa: F401
+    
+    worker = JobWorker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    worker.start()
+    print(f"✓ Job worker {worker.name} started with {args.concurrency} thread(s)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping job worker...")
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
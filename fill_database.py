@@ -23,6 +23,7 @@ from app.models.board_member import BoardMember
 from app.models.comment import TaskComment
 from app.models.audit_log import AuditLog
 from app.core.security import get_password_hash
+from app.services import comment_service
 
 
 def create_users(db):
@@ -366,6 +367,8 @@ def create_comments(db, tasks, users):
     if new_comments:
         db.bulk_save_objects(new_comments)
         db.commit()
+        # bulk_save_objects обходит сервис, поэтому пересчитываем Task.comment_count
+        comment_service.recount_comment_counts(db)
         print(f"   ✓ Создано {len(new_comments)} комментариев")
 
 
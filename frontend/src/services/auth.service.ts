@@ -24,6 +24,7 @@ export const authService = {
 
   logout(): void {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     // Очищаем флаг редиректа при явном выходе
     sessionStorage.removeItem('auth_redirect_in_progress');
@@ -2,6 +2,7 @@ import { create } from 'zustand';
 import { persist } from 'zustand/middleware';
 import { User } from '@/types';
 import { authService } from '@/services/auth.service';
+import { saveTokens } from '@/utils/api';
 
 interface AuthState {
   user: User | null;
@@ -29,8 +30,8 @@ export const useAuthStore = create<AuthState>()(
         try {
           const tokenResponse = await authService.login({ email, password });
           
-          // Сохраняем токен ПЕРЕД вызовом getCurrentUser
-          localStorage.setItem('token', tokenResponse.access_token);
+          // Сохраняем токены ПЕРЕД вызовом getCurrentUser
+          saveTokens(tokenResponse);
           
           // Устанавливаем токен в store перед запросом пользователя
           set({
@@ -60,8 +61,8 @@ export const useAuthStore = create<AuthState>()(
             password,
           });
           
-          // Сохраняем токен ПЕРЕД вызовом getCurrentUser
-          localStorage.setItem('token', tokenResponse.access_token);
+          // Сохраняем токены ПЕРЕД вызовом getCurrentUser
+          saveTokens(tokenResponse);
           
           // Устанавливаем токен в store перед запросом пользователя
           set({
@@ -128,6 +129,7 @@ export const useAuthStore = create<AuthState>()(
               isLoading: false,
             });
             localStorage.removeItem('token');
+            localStorage.removeItem('refresh_token');
           }
         } else {
           set({ isLoading: false });
@@ -28,7 +28,9 @@ export interface RegisterRequest {
 
 export interface TokenResponse {
   access_token: string;
+  refresh_token?: string | null;
   token_type: string;
+  expires_in?: number | null;
 }
 
 // Board types
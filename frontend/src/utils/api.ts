@@ -1,4 +1,5 @@
 import axios, { AxiosError, AxiosInstance, InternalAxiosRequestConfig } from 'axios';
+import { TokenResponse } from '@/types';
 
 // Определяем baseURL в зависимости от окружения
 // В продакшн (Docker) используем /api, который проксируется nginx к backend
@@ -58,17 +59,67 @@ api.interceptors.request.use(
   }
 );
 
+// Сохранить пару токенов из ответа входа/регистрации/обновления
+export const saveTokens = (tokens: TokenResponse) => {
+  localStorage.setItem('token', tokens.access_token);
+  if (tokens.refresh_token) {
+    localStorage.setItem('refresh_token', tokens.refresh_token);
+  }
+};
+
+// Access-токен живёт недолго (JWT_EXPIRE_MINUTES): при 401 он один раз обновляется
+// через POST /auth/refresh, и запрос повторяется. Параллельные запросы ждут одно обновление
+let refreshPromise: Promise<string | null> | null = null;
+
+const refreshAccessToken = (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+  if (!refreshPromise) {
+    // Отдельный запрос без интерцепторов: ошибка обновления не должна запускать новое обновление
+    refreshPromise = axios
+      .post<TokenResponse>(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        saveTokens(response.data);
+        return response.data.access_token;
+      })
+      .catch(() => {
+        localStorage.removeItem('refresh_token');
+        return null;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
+type RetriableRequestConfig = InternalAxiosRequestConfig & { _retried?: boolean };
+
 // Response interceptor - handle 401 errors
 let isRedirecting = false;
 
 api.interceptors.response.use(
   (response) => response,
-  (error: AxiosError) => {
+  async (error: AxiosError) => {
+    const config = error.config as RetriableRequestConfig | undefined;
+    const isAuthRequest = config?.url?.includes('/auth/');
+    if (error.response?.status === 401 && config && !config._retried && !isAuthRequest) {
+      config._retried = true;
+      const token = await refreshAccessToken();
+      if (token) {
+        config.headers.Authorization = `Bearer ${token}`;
+        return api(config);
+      }
+    }
+
     if (error.response?.status === 401) {
       const isLoginRequest = error.config?.url?.includes('/auth/login');
       if (!isLoginRequest) {
         // Не редиректить при неудачном входе — показываем ошибку на странице логина
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
         window.location.href = '/login';
       }
@@ -99,8 +150,9 @@ api.interceptors.response.use(
       if (!isRedirecting && !isOnLoginPage) {
         isRedirecting = true;
 
-        // Очищаем токен и данные пользователя
+        // Очищаем токены и данные пользователя
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
 
         // Используем sessionStorage для предотвращения множественных редиректов
@@ -0,0 +1,99 @@
+"""
+Общие фикстуры API-тестов: приложение на временной SQLite-базе и TestClient.
+Переменные окружения задаются до импорта app — настройки читаются при импорте.
+"""
+import os
+import tempfile
+import uuid
+
+_tmp_dir = tempfile.mkdtemp(prefix="tms-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ["JOB_WORKERS"] = "0"  # Задания выполняются тестами явно (JobWorker.run_once)
+os.environ["PASSWORD_BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_AUTH_BURST"] = "100000"
+os.environ["RATE_LIMIT_BURST"] = "100000"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    """Сессия БД; зависит от client — таблицы создаются при запуске приложения"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def register(client):
+    """Зарегистрировать пользователя с уникальным именем; возвращает (заголовки, id)"""
+    def _register(role: str = "user"):
+        name = f"u{uuid.uuid4().hex[:10]}"
+        path = {"user": "/auth/register", "guest": "/auth/register-guest"}[role]
+        response = client.post(path, json={"username": name, "email": f"{name}@example.com", "password": "secret1"})
+        assert response.status_code == 201, response.text
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        user_id = client.get("/users/me", headers=headers).json()["id"]
+        return headers, user_id
+    
+    return _register
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post("/auth/login", json={"email": settings.ADMIN_EMAIL, "password": settings.ADMIN_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def board(client, register):
+    """Доска нового пользователя: (заголовки владельца, id владельца, id доски)"""
+    headers, user_id = register()
+    response = client.post("/boards/", json={"title": "Board"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return headers, user_id, response.json()["id"]
+
+
+@pytest.fixture
+def statements():
+    """SQL-операторы, выполненные за время теста (before_cursor_execute)"""
+    from sqlalchemy import event
+    from app.database import engine
+    
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def middleware(client):
+    """Экземпляр middleware приложения по классу (стек собирается при запуске приложения)"""
+    def find(middleware_class):
+        layer = app.middleware_stack
+        while layer is not None:
+            if isinstance(layer, middleware_class):
+                return layer
+            layer = getattr(layer, "app", None)
+        raise LookupError(middleware_class.__name__)
+    
+    return find
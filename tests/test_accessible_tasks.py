@@ -0,0 +1,41 @@
+"""
+GET /tasks/accessible: подсчёт total.
+"""
+
+
+def _count_statements(statements):
+    return [sql for sql in statements if "count(" in sql.lower()]
+
+
+def test_default_total_is_cached(client, board, statements):
+    headers, _, board_id = board
+    for i in range(3):
+        client.post(f"/boards/{board_id}/tasks", json={"title": f"T{i}"}, headers=headers)
+    
+    first = client.get("/tasks/accessible?limit=1", headers=headers).json()
+    statements.clear()
+    second = client.get(f"/tasks/accessible?limit=1&cursor={first['next_cursor']}", headers=headers).json()
+    
+    assert first["total"] == second["total"] == 3
+    assert _count_statements(statements) == []
+
+
+def test_exact_total_is_opt_in(client, board, statements):
+    headers, _, board_id = board
+    client.post(f"/boards/{board_id}/tasks", json={"title": "T"}, headers=headers)
+    client.get("/tasks/accessible?total=exact", headers=headers)
+    statements.clear()
+    
+    response = client.get("/tasks/accessible?total=exact", headers=headers).json()
+    
+    assert response["total"] == 1
+    assert len(_count_statements(statements)) == 1
+
+
+def test_total_none_skips_count(client, board, statements):
+    headers, _, _ = board
+    
+    response = client.get("/tasks/accessible?total=none", headers=headers).json()
+    
+    assert "total" not in response or response["total"] is None
+    assert _count_statements(statements) == []
@@ -0,0 +1,122 @@
+"""
+Контроль допуска: сброс низкоприоритетных запросов, очередь с таймаутом, передача места
+ожидающему, отмена ожидания и AIMD-подстройка предела; 503 приложения с заголовками CORS.
+"""
+import asyncio
+import time
+
+from app.core.admission import AdmissionClass, AdmissionMiddleware
+
+
+def _class(max_in_flight: int = 2, target: float = 0.1) -> AdmissionClass:
+    return AdmissionClass("test", target, max_in_flight)
+
+
+def _overload(admission_class: AdmissionClass) -> None:
+    admission_class.latency = admission_class.target_latency * 10
+    admission_class._last_observed = time.monotonic()
+
+
+def test_low_priority_is_shed_when_overloaded_or_full():
+    async def scenario():
+        overloaded = _class()
+        _overload(overloaded)
+        assert not await overloaded.acquire(False, 1.0, 10)
+        assert await overloaded.acquire(True, 1.0, 10)  # Высокий приоритет перегрузка не отсекает
+        
+        full = _class(max_in_flight=1)
+        assert await full.acquire(True, 1.0, 10)
+        assert not await full.acquire(False, 1.0, 10)  # Низкий приоритет не ждёт в очереди
+        return overloaded, full
+    
+    overloaded, full = asyncio.run(scenario())
+    
+    assert (overloaded.stats["shed"], full.stats["shed"]) == (1, 1)
+
+
+def test_queue_timeout_rejects_and_leaves_queue():
+    async def scenario():
+        admission_class = _class(max_in_flight=1)
+        assert await admission_class.acquire(True, 1.0, 10)
+        admitted = await admission_class.acquire(True, 0.05, 10)
+        return admission_class, admitted
+    
+    admission_class, admitted = asyncio.run(scenario())
+    
+    assert not admitted
+    assert admission_class.stats["timeouts"] == 1
+    assert (admission_class.in_flight, len(admission_class._waiters)) == (1, 0)
+
+
+def test_full_queue_sheds_high_priority():
+    async def scenario():
+        admission_class = _class(max_in_flight=1)
+        assert await admission_class.acquire(True, 1.0, 0)
+        return await admission_class.acquire(True, 1.0, 0)
+    
+    assert asyncio.run(scenario()) is False
+
+
+def test_release_hands_slot_to_waiter():
+    async def scenario():
+        admission_class = _class(max_in_flight=1)
+        assert await admission_class.acquire(True, 1.0, 10)
+        waiter = asyncio.ensure_future(admission_class.acquire(True, 1.0, 10))
+        await asyncio.sleep(0)
+        assert len(admission_class._waiters) == 1
+        admission_class.release(0.01)
+        return admission_class, await waiter
+    
+    admission_class, admitted = asyncio.run(scenario())
+    
+    assert admitted
+    assert admission_class.in_flight == 1
+    assert admission_class.stats["waited"] == 1
+
+
+def test_cancelled_waiter_leaves_queue_without_slot():
+    async def scenario():
+        admission_class = _class(max_in_flight=1)
+        assert await admission_class.acquire(True, 1.0, 10)
+        waiter = asyncio.ensure_future(admission_class.acquire(True, 5.0, 10))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return admission_class
+    
+    admission_class = asyncio.run(scenario())
+    
+    assert (admission_class.in_flight, len(admission_class._waiters)) == (1, 0)
+
+
+def test_limit_halves_on_slow_responses_and_grows_back_by_one():
+    admission_class = _class(max_in_flight=8)
+    
+    admission_class._observe(1.0)
+    assert admission_class.limit == 4
+    admission_class._observe(1.0)
+    assert admission_class.limit == 4  # Повторное уменьшение — не раньше DECREASE_COOLDOWN_SECONDS
+    
+    limits = []
+    for _ in range(100):
+        admission_class._observe(0.0)
+        limits.append(admission_class.limit)
+    
+    assert not admission_class.overloaded
+    grown = [limit for limit in limits if limit > 4]
+    assert grown[:4] == [5, 6, 7, 8]
+    assert max(limits) == 8
+
+
+def test_app_503_carries_cors_headers(client, middleware, monkeypatch):
+    controller = middleware(AdmissionMiddleware).controller
+    read_class = controller.classes["read"]
+    monkeypatch.setattr(read_class, "latency", read_class.target_latency * 10)
+    monkeypatch.setattr(read_class, "_last_observed", time.monotonic())
+    
+    response = client.get("/stats/dashboard", headers={"Origin": "http://localhost:5173"})
+    
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.headers["access-control-allow-origin"] in ("*", "http://localhost:5173")
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
@@ -0,0 +1,145 @@
+"""
+Архив задач: перенос при архивации доски и возврат при разархивации (фоновыми заданиями),
+архивация давно выполненных задач, конфликты ID комментариев и задач при восстановлении,
+чтение архива через archived=true.
+"""
+from datetime import datetime, timedelta
+
+from app.models.archive import ArchivedTask
+from app.models.comment import TaskComment
+from app.models.task import Task
+from app.services import archive_service
+from app.worker import JobWorker
+
+
+def _run_jobs(db):
+    """Выполнить все задания очереди в текущем потоке (JOB_WORKERS=0 в тестах)"""
+    worker = JobWorker(name="test-worker")
+    while worker.run_once():
+        pass
+    db.expire_all()
+
+
+def _create_task(client, headers, board_id, title="T", **fields):
+    response = client.post(f"/boards/{board_id}/tasks", json={"title": title, **fields}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _comment(client, headers, task_id, content):
+    response = client.post(f"/tasks/{task_id}/comments", json={"content": content}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _archive_board(client, db, headers, board_id):
+    assert client.put(f"/boards/{board_id}", json={"archived": True}, headers=headers).status_code == 200
+    _run_jobs(db)
+
+
+def test_board_archive_moves_tasks_and_unarchive_restores_them(client, db, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    comment_ids = [_comment(client, headers, task_id, "first"), _comment(client, headers, task_id, "second")]
+    
+    _archive_board(client, db, headers, board_id)
+    
+    assert client.get(f"/boards/{board_id}/tasks", headers=headers).json() == []
+    archived = client.get(f"/boards/{board_id}/tasks?archived=true", headers=headers).json()
+    assert [task["id"] for task in archived] == [task_id]
+    single = client.get(f"/boards/{board_id}/tasks/{task_id}?archived=true", headers=headers)
+    assert single.status_code == 200 and "etag" not in single.headers
+    assert client.get(f"/boards/{board_id}/tasks/{task_id}", headers=headers).status_code == 404
+    board_page = client.get(f"/boards/{board_id}?archived=true", headers=headers).json()
+    assert [task["id"] for task in board_page["tasks"]] == [task_id]
+    assert db.query(ArchivedTask.archive_reason).filter(ArchivedTask.id == task_id).scalar() == "board_archived"
+    
+    assert client.put(f"/boards/{board_id}", json={"archived": False}, headers=headers).status_code == 200
+    _run_jobs(db)
+    
+    assert [task["id"] for task in client.get(f"/boards/{board_id}/tasks", headers=headers).json()] == [task_id]
+    assert client.get(f"/boards/{board_id}/tasks?archived=true", headers=headers).json() == []
+    comments = client.get(f"/tasks/{task_id}/comments", headers=headers).json()["comments"]
+    assert [(comment["id"], comment["content"]) for comment in comments] == list(zip(comment_ids, ["first", "second"]))
+
+
+def test_done_sweep_keeps_parents_with_open_children(client, db, board):
+    headers, _, board_id = board
+    open_parent = _create_task(client, headers, board_id, "open parent", status="done")
+    open_child = _create_task(client, headers, board_id, "open child")
+    done_parent = _create_task(client, headers, board_id, "done parent", status="done")
+    done_child = _create_task(client, headers, board_id, "done child", status="done")
+    fresh = _create_task(client, headers, board_id, "fresh", status="done")
+    for parent_id, child_id in ((open_parent, open_child), (done_parent, done_child)):
+        db.query(Task).filter(Task.id == child_id).update({"parent_task_id": parent_id}, synchronize_session=False)
+    old = datetime.utcnow() - timedelta(days=30)
+    db.query(Task).filter(Task.id.in_([open_parent, open_child, done_parent, done_child])).update(
+        {"updated_at": old}, synchronize_session=False
+    )
+    db.commit()
+    
+    archive_service.archive_done_tasks(db, older_than_days=7)
+    
+    remaining = {task["id"] for task in client.get(f"/boards/{board_id}/tasks", headers=headers).json()}
+    archived = {task["id"] for task in client.get(f"/boards/{board_id}/tasks?archived=true", headers=headers).json()}
+    assert remaining == {open_parent, open_child, fresh}
+    assert archived == {done_parent, done_child}
+
+
+def test_restore_gives_taken_comment_ids_fresh_ids(client, db, board):
+    headers, user_id, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    kept_id = _comment(client, headers, task_id, "kept id")
+    taken_id = _comment(client, headers, task_id, "taken id")
+    other_board = client.post("/boards/", json={"title": "Other"}, headers=headers).json()["id"]
+    other_task = _create_task(client, headers, other_board)
+    _archive_board(client, db, headers, board_id)
+    # Старая база без AUTOINCREMENT выдаёт освободившийся ID новому комментарию
+    db.add(TaskComment(id=taken_id, task_id=other_task, user_id=user_id, content="squatter"))
+    db.commit()
+    
+    assert client.put(f"/boards/{board_id}", json={"archived": False}, headers=headers).status_code == 200
+    _run_jobs(db)
+    
+    comments = client.get(f"/tasks/{task_id}/comments", headers=headers).json()["comments"]
+    assert [comment["content"] for comment in comments] == ["kept id", "taken id"]
+    assert comments[0]["id"] == kept_id
+    assert comments[1]["id"] not in (kept_id, taken_id)
+    assert db.query(TaskComment.content).filter(TaskComment.id == taken_id).scalar() == "squatter"
+
+
+def test_restore_tasks_reports_not_found_and_conflicts(client, db, board, register):
+    headers, user_id, board_id = board
+    restorable, conflicting, archived_board_task = (
+        _create_task(client, headers, board_id, title, status="done") for title in ("a", "b", "c")
+    )
+    archived_board = client.post("/boards/", json={"title": "Archived"}, headers=headers).json()["id"]
+    _archive_board(client, db, headers, archived_board)
+    foreign_headers, _ = register()
+    foreign_board = client.post("/boards/", json={"title": "Foreign"}, headers=foreign_headers).json()["id"]
+    foreign = _create_task(client, foreign_headers, foreign_board, status="done")
+    all_ids = [restorable, conflicting, archived_board_task, foreign]
+    db.query(Task).filter(Task.id.in_(all_ids)).update(
+        {"updated_at": datetime.utcnow() - timedelta(days=30)}, synchronize_session=False
+    )
+    db.commit()
+    archive_service.archive_done_tasks(db, older_than_days=7)
+    # ID архивной задачи занят в tasks (база без AUTOINCREMENT)
+    db.add(Task(id=conflicting, title="squatter", board_id=board_id, created_by=user_id))
+    db.commit()
+    # Задача на архивированной доске восстанавливается только разархивацией доски
+    db.query(ArchivedTask).filter(ArchivedTask.id == archived_board_task).update(
+        {"board_id": archived_board}, synchronize_session=False
+    )
+    db.commit()
+    
+    response = client.post("/archive/restore", json={"task_ids": all_ids + [999999]}, headers=headers)
+    
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "restored": 1,
+        "conflicts": [conflicting],
+        "not_found": [archived_board_task, foreign, 999999],
+    }
+    assert client.get(f"/boards/{board_id}/tasks/{restorable}", headers=headers).json()["title"] == "a"
+    assert db.query(ArchivedTask).filter(ArchivedTask.id == conflicting).count() == 1
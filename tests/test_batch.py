@@ -0,0 +1,77 @@
+"""
+POST /batch: запрет вложенных батчей (в том числе через %XX в пути),
+списание стоимости подзапросов из лимита вызывающего и сброс низкоприоритетных подзапросов.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.admission import admission
+from app.core.batch import BatchDispatcher
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.mark.parametrize("path", ["/batch", "/%62atch", "/%62%61tch?x=1"])
+def test_nested_batch_is_rejected(client, register, path):
+    headers, _ = register()
+    
+    response = client.post(
+        "/batch",
+        json={"requests": [{"method": "POST", "path": path, "body": {"requests": [{"path": "/boards/"}]}}]},
+        headers=headers
+    )
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Nested batch requests are not allowed"
+
+
+def test_batch_dispatched_from_batch_is_rejected_by_state_flag(client, register):
+    headers, _ = register()
+    parent_scope = {"type": "http", "headers": [(b"authorization", headers["Authorization"].encode())]}
+    
+    response = asyncio.run(BatchDispatcher(app).dispatch(
+        parent_scope, "POST", "/batch", {"requests": [{"path": "/boards/"}]}
+    ))
+    
+    assert response.status == 400
+    assert response.to_dict()["body"]["detail"] == "Nested batch requests are not allowed"
+
+
+def test_sub_requests_are_charged_against_caller_bucket(client, register, monkeypatch):
+    headers, _ = register()
+    # Лимиты подзапросов читаются при каждом батче; ведро вызывающего общее с middleware приложения
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 12.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_SECOND", 0.001)
+    
+    response = client.post(
+        "/batch",
+        json={"requests": [{"path": "/search?q=a"}, {"path": "/search?q=b"}, {"path": "/search?q=c"}]},
+        headers=headers
+    )
+    
+    assert response.status_code == 200, response.text
+    statuses = sorted(item["status"] for item in response.json()["responses"])
+    assert statuses == [200, 200, 429]  # /search стоит 5: ведро на 12 пропускает два
+    limited = next(item for item in response.json()["responses"] if item["status"] == 429)
+    assert int(limited["headers"]["retry-after"]) >= 1
+
+
+def test_low_priority_sub_requests_are_shed_when_overloaded(client, register, monkeypatch):
+    headers, _ = register()
+    read_class = admission.classes["read"]
+    monkeypatch.setattr(read_class, "latency", read_class.target_latency * 10)
+    monkeypatch.setattr(read_class, "_last_observed", time.monotonic())
+    
+    response = client.post(
+        "/batch",
+        json={"requests": [{"method": "POST", "path": "/boards/", "body": {"title": "B"}}, {"path": "/stats/dashboard"}]},
+        headers=headers
+    )
+    
+    assert response.status_code == 200, response.text
+    created, stats = response.json()["responses"]
+    assert created["status"] == 201
+    assert stats["status"] == 503
+    assert "retry-after" in stats["headers"]
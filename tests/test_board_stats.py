@@ -0,0 +1,95 @@
+"""
+Статистика досок: get_boards_stats, GET /boards/?include=summary и GET /boards/stats?ids=.
+Счётчики по статусам и один сгруппированный запрос на всю страницу досок.
+"""
+from app.services import board_service
+
+ZERO = {"total": 0, "todo": 0, "in_progress": 0, "done": 0}
+
+
+def _grouped(statements):
+    return [sql for sql in statements if "FROM tasks" in sql and "GROUP BY" in sql]
+
+
+def _task_reads(statements):
+    return [sql for sql in statements if "FROM tasks" in sql]
+
+
+def _boards_with_tasks(client, headers, layouts):
+    """Доски с задачами в заданных статусах; возвращает {board_id: ожидаемая статистика}"""
+    expected = {}
+    for statuses in layouts:
+        board_id = client.post("/boards/", json={"title": "B"}, headers=headers).json()["id"]
+        for task_status in statuses:
+            response = client.post(
+                f"/boards/{board_id}/tasks", json={"title": "T", "status": task_status}, headers=headers
+            )
+            assert response.status_code == 201, response.text
+        expected[board_id] = {**ZERO, "total": len(statuses)}
+        for task_status in statuses:
+            expected[board_id][task_status] += 1
+    return expected
+
+
+def test_get_boards_stats_counts_in_one_query_then_from_cache(client, db, register, statements):
+    headers, _ = register()
+    expected = _boards_with_tasks(client, headers, [["todo", "todo", "done"], ["in_progress"], []])
+    statements.clear()
+    
+    assert board_service.get_boards_stats(db, list(expected)) == expected
+    assert len(_task_reads(statements)) == 1 and len(_grouped(statements)) == 1
+    
+    statements.clear()
+    assert board_service.get_boards_stats(db, list(expected)) == expected
+    assert _task_reads(statements) == []
+
+
+def test_board_list_summary_is_one_grouped_query(client, register, statements):
+    headers, _ = register()
+    expected = _boards_with_tasks(client, headers, [["todo", "done", "done"], ["in_progress", "todo"], [], ["done"]])
+    statements.clear()
+    
+    response = client.get("/boards/?include=summary", headers=headers)
+    
+    assert response.status_code == 200, response.text
+    assert {board["id"]: board["summary"] for board in response.json()} == expected
+    assert len(_task_reads(statements)) == 1 and len(_grouped(statements)) == 1
+    assert all("summary" not in board for board in client.get("/boards/", headers=headers).json())
+
+
+def test_summary_follows_task_changes(client, register):
+    headers, _ = register()
+    board_id, = _boards_with_tasks(client, headers, [["todo"]])
+    task_id = client.get(f"/boards/{board_id}/tasks", headers=headers).json()[0]["id"]
+    assert client.get("/boards/?include=summary", headers=headers).json()[0]["summary"]["todo"] == 1
+    
+    assert client.put(f"/tasks/{task_id}/status/done", headers=headers).status_code == 200
+    
+    summary = client.get("/boards/?include=summary", headers=headers).json()[0]["summary"]
+    assert summary == {**ZERO, "total": 1, "done": 1}
+
+
+def test_stats_batch_counts_and_not_found(client, register, statements):
+    headers, _ = register()
+    expected = _boards_with_tasks(client, headers, [["todo", "in_progress"], ["done"], []])
+    foreign_headers, _ = register()
+    foreign, = _boards_with_tasks(client, foreign_headers, [["todo"]])
+    ids = list(expected) + [foreign, 999999]
+    statements.clear()
+    
+    response = client.get(f"/boards/stats?ids={','.join(map(str, ids + ids[:1]))}", headers=headers)
+    
+    assert response.status_code == 200, response.text
+    assert {int(board_id): stats for board_id, stats in response.json()["stats"].items()} == expected
+    assert response.json()["not_found"] == [foreign, 999999]
+    assert len(_grouped(statements)) == 1
+
+
+def test_stats_batch_limits(client, register):
+    headers, _ = register()
+    
+    too_many = client.get(f"/boards/stats?ids={','.join(str(i) for i in range(1, 102))}", headers=headers)
+    malformed = client.get("/boards/stats?ids=1,,2", headers=headers)
+    
+    assert too_many.status_code == 400
+    assert malformed.status_code == 422
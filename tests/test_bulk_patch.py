@@ -0,0 +1,64 @@
+"""
+PATCH /tasks/bulk: выбор задач фильтром и проверка исполнителя.
+"""
+
+
+def _create_tasks(client, headers, board_id, count=2):
+    return [
+        client.post(f"/boards/{board_id}/tasks", json={"title": f"T{i}"}, headers=headers).json()["id"]
+        for i in range(count)
+    ]
+
+
+def test_empty_filter_is_rejected(client, board):
+    headers, _, board_id = board
+    _create_tasks(client, headers, board_id)
+    
+    response = client.patch("/tasks/bulk", json={"filter": {}, "changes": {"priority": "high"}}, headers=headers)
+    
+    assert response.status_code == 422
+    tasks = client.get(f"/boards/{board_id}/tasks", headers=headers).json()
+    assert all(task["priority"] == "medium" for task in tasks)
+
+
+def test_filter_updates_matching_tasks(client, board):
+    headers, _, board_id = board
+    task_ids = _create_tasks(client, headers, board_id)
+    
+    response = client.patch(
+        "/tasks/bulk",
+        json={"filter": {"board_id": board_id}, "changes": {"priority": "high"}},
+        headers=headers
+    )
+    
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == len(task_ids)
+
+
+def test_unknown_assignee_is_rejected(client, board):
+    headers, _, board_id = board
+    task_ids = _create_tasks(client, headers, board_id)
+    
+    response = client.patch(
+        "/tasks/bulk", json={"task_ids": task_ids, "changes": {"assignee_id": 999999}}, headers=headers
+    )
+    
+    assert response.status_code == 404
+
+
+def test_assignee_must_be_board_member(client, board, register):
+    headers, _, board_id = board
+    task_ids = _create_tasks(client, headers, board_id)
+    _, outsider_id = register()
+    
+    response = client.patch(
+        "/tasks/bulk", json={"task_ids": task_ids, "changes": {"assignee_id": outsider_id}}, headers=headers
+    )
+    assert response.status_code == 400
+    
+    assert client.post(f"/boards/{board_id}/members/{outsider_id}", headers=headers).status_code == 201
+    response = client.patch(
+        "/tasks/bulk", json={"task_ids": task_ids, "changes": {"assignee_id": outsider_id}}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == len(task_ids)
@@ -0,0 +1,146 @@
+"""
+Бэкенды кэша: вытеснение LRU, TTL, инвалидация по тегам.
+RedisCache проверяется на минимальном RESP-сервере (GET/SET/DEL/INCR) в этом же процессе.
+"""
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app.core.cache import sqlite as sqlite_cache
+from app.core.cache.memory import MemoryCache
+from app.core.cache.redis import RedisCache
+from app.core.cache.sqlite import SQLiteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    
+    cache.set("c", 3)
+    
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.info()["evictions"] == 1
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_cache, "TOUCH_INTERVAL", 0)
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1  # Обращение делает "a" свежее "b"
+    time.sleep(0.01)
+    cache.set("c", 3)
+    
+    cache._purge()
+    
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.info()["evictions"] == 1
+
+
+def test_sqlite_cache_keeps_tags_and_expires_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=1)
+    cache.set("board", {"id": 1}, tags=("boards",))
+    cache.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    
+    cache._purge()
+    
+    assert cache.get("short") is None
+    assert cache.get("board") == {"id": 1}
+    cache.invalidate_tags("boards")
+    assert cache.get("board") is None
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Подмножество команд Redis, которое использует RedisCache"""
+    
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+    
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+    
+    def handle(self):
+        data, expires = self.server.data, self.server.expires
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            command, key = args[0].upper(), args[1] if len(args) > 1 else None
+            if key in expires and expires[key] <= time.monotonic():
+                data.pop(key, None)
+                expires.pop(key, None)
+            if command == "GET":
+                reply = self._bulk(data.get(key))
+            elif command == "SET":
+                data[key] = args[2]
+                expires.pop(key, None)
+                if len(args) == 5 and args[3].upper() == "PX":
+                    expires[key] = time.monotonic() + int(args[4]) / 1000
+                reply = b"+OK\r\n"
+            elif command == "DEL":
+                removed = sum(data.pop(name, None) is not None for name in args[1:])
+                reply = b":%d\r\n" % removed
+            elif command == "INCR":
+                data[key] = str(int(data.get(key, "0")) + 1)
+                reply = b":%s\r\n" % data[key].encode()
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+            self.wfile.flush()
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.data, server.expires = {}, {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_cache_round_trip_and_tags(resp_server):
+    host, port = resp_server.server_address
+    cache = RedisCache(f"redis://{host}:{port}/0")
+    
+    cache.set("stats", {"total": 3}, tags=("stats",))
+    cache.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    
+    assert cache.get("stats") == {"total": 3}
+    assert cache.get("short") is None
+    cache.invalidate_tags("stats")
+    assert cache.get("stats") is None
+    assert cache.info()["errors"] == 0
+
+
+def test_invalidation_during_compute_is_not_stored_as_fresh():
+    cache = MemoryCache()
+    
+    def compute():
+        cache.invalidate_tags("stats")  # Данные изменились, пока считали значение
+        return {"total": 1}
+    
+    assert cache.get_or_set("stats:dashboard", compute, tags=("stats",)) == {"total": 1}
+    assert cache.get("stats:dashboard") is None
+    assert cache.get_or_set("stats:dashboard", lambda: {"total": 2}, tags=("stats",)) == {"total": 2}
+    assert cache.get("stats:dashboard") == {"total": 2}
@@ -0,0 +1,114 @@
+"""
+Комментарии: счётчик Task.comment_count при создании и удалении, устойчивость курсора
+между страницами, последние комментарии нескольких задач (/comments/latest, ROW_NUMBER).
+"""
+from datetime import datetime
+
+from app.models.comment import TaskComment
+
+
+def _create_task(client, headers, board_id):
+    return client.post(f"/boards/{board_id}/tasks", json={"title": "T"}, headers=headers).json()["id"]
+
+
+def _comment(client, headers, task_id, content):
+    response = client.post(f"/tasks/{task_id}/comments", json={"content": content}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _task(client, headers, board_id, task_id):
+    return client.get(f"/boards/{board_id}/tasks/{task_id}", headers=headers).json()
+
+
+def _page(client, headers, task_id, cursor=None, limit=2):
+    params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+    response = client.get(f"/tasks/{task_id}/comments", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_create_and_delete_update_comment_count(client, board, register):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    updated_at = _task(client, headers, board_id, task_id)["updated_at"]
+    first, second = _comment(client, headers, task_id, "a"), _comment(client, headers, task_id, "b")
+    
+    task = _task(client, headers, board_id, task_id)
+    assert task["comment_count"] == 2
+    assert task["updated_at"] == updated_at  # Комментарий не меняет updated_at задачи
+    
+    stranger_headers, _ = register()
+    assert client.delete(f"/tasks/{task_id}/comments/{first}", headers=stranger_headers).status_code == 403
+    assert client.delete(f"/tasks/{task_id}/comments/{first}", headers=headers).status_code == 204
+    assert client.delete(f"/tasks/{task_id}/comments/{first}", headers=headers).status_code == 404
+    
+    assert _task(client, headers, board_id, task_id)["comment_count"] == 1
+    assert [comment["id"] for comment in _page(client, headers, task_id)["comments"]] == [second]
+
+
+def test_cursor_pages_are_stable_under_inserts_and_deletes(client, db, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    ids = [_comment(client, headers, task_id, str(i)) for i in range(5)]
+    # Одинаковый created_at: порядок внутри него задаёт id
+    db.query(TaskComment).filter(TaskComment.id.in_(ids[1:4])).update(
+        {"created_at": datetime(2024, 1, 1)}, synchronize_session=False
+    )
+    db.query(TaskComment).filter(TaskComment.id == ids[0]).update(
+        {"created_at": datetime(2023, 1, 1)}, synchronize_session=False
+    )
+    db.commit()
+    
+    first = _page(client, headers, task_id)
+    seen = [comment["id"] for comment in first["comments"]]
+    assert seen == ids[:2]
+    # Между страницами удаляется уже показанный комментарий и добавляется новый
+    assert client.delete(f"/tasks/{task_id}/comments/{ids[0]}", headers=headers).status_code == 204
+    added = _comment(client, headers, task_id, "new")
+    
+    cursor = first["next_cursor"]
+    while cursor:
+        page = _page(client, headers, task_id, cursor)
+        seen += [comment["id"] for comment in page["comments"]]
+        cursor = page["next_cursor"]
+    
+    assert seen == ids + [added]
+
+
+def test_foreign_or_broken_cursor_is_400(client, board):
+    headers, _, board_id = board
+    task_id, other_id = _create_task(client, headers, board_id), _create_task(client, headers, board_id)
+    for i in range(3):
+        _comment(client, headers, other_id, str(i))
+    foreign_cursor = _page(client, headers, other_id)["next_cursor"]
+    
+    foreign = client.get(f"/tasks/{task_id}/comments", params={"cursor": foreign_cursor}, headers=headers)
+    broken = client.get(f"/tasks/{task_id}/comments", params={"cursor": "not-a-cursor"}, headers=headers)
+    
+    assert (foreign.status_code, foreign.json()["detail"]) == (400, "Cursor belongs to another task")
+    assert (broken.status_code, broken.json()["detail"]) == (400, "Invalid cursor")
+
+
+def test_latest_comments_per_task_in_one_query(client, board, register, statements):
+    headers, _, board_id = board
+    busy, quiet, empty = (_create_task(client, headers, board_id) for _ in range(3))
+    busy_ids = [_comment(client, headers, busy, str(i)) for i in range(5)]
+    quiet_id = _comment(client, headers, quiet, "only")
+    stranger_headers, _ = register()
+    private_board = client.post("/boards/", json={"title": "Private"}, headers=stranger_headers).json()["id"]
+    hidden = _create_task(client, stranger_headers, private_board)
+    _comment(client, stranger_headers, hidden, "secret")
+    statements.clear()
+    
+    response = client.get(
+        "/comments/latest",
+        params={"task_ids": [busy, quiet, empty, hidden, busy], "limit": 3},
+        headers=headers
+    )
+    
+    assert response.status_code == 200, response.text
+    latest = {int(task_id): [comment["id"] for comment in comments] for task_id, comments in response.json().items()}
+    assert latest == {busy: busy_ids[::-1][:3], quiet: [quiet_id], empty: []}
+    assert len([sql for sql in statements if "FROM task_comments" in sql]) == 1
+    assert len([sql for sql in statements if "row_number()" in sql.lower()]) == 1
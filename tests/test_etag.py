@@ -0,0 +1,124 @@
+"""
+Оптимистичные блокировки: PUT задачи и доски с If-Match (совпадающий, устаревший, слабый,
+нераспознанный, "*") и увеличение version всеми путями изменения задачи.
+"""
+import pytest
+
+
+def _create_task(client, headers, board_id, title="T"):
+    response = client.post(f"/boards/{board_id}/tasks", json={"title": title}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _task(client, headers, board_id, task_id):
+    response = client.get(f"/boards/{board_id}/tasks/{task_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_task_put_with_matching_if_match_bumps_version(client, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    etag = _task(client, headers, board_id, task_id).headers["etag"]
+    
+    response = client.put(
+        f"/boards/{board_id}/tasks/{task_id}", json={"title": "New"}, headers={**headers, "If-Match": etag}
+    )
+    
+    assert response.status_code == 200, response.text
+    assert etag == '"1"'
+    assert response.headers["etag"] == '"2"'
+    assert response.json()["version"] == 2
+
+
+def test_task_put_with_stale_if_match_is_412_with_current_etag(client, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    stale = _task(client, headers, board_id, task_id).headers["etag"]
+    client.put(f"/boards/{board_id}/tasks/{task_id}", json={"title": "Other"}, headers=headers)
+    
+    response = client.put(
+        f"/boards/{board_id}/tasks/{task_id}", json={"title": "Mine"}, headers={**headers, "If-Match": stale}
+    )
+    
+    assert response.status_code == 412
+    assert response.headers["etag"] == '"2"'
+    assert _task(client, headers, board_id, task_id).json()["title"] == "Other"
+
+
+@pytest.mark.parametrize("if_match", ['W/"1"', "1", '"abc"', "garbage", '""'])
+def test_task_put_with_weak_or_garbage_if_match_is_412(client, board, if_match):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    
+    response = client.put(
+        f"/boards/{board_id}/tasks/{task_id}", json={"title": "New"}, headers={**headers, "If-Match": if_match}
+    )
+    
+    assert response.status_code == 412
+    assert _task(client, headers, board_id, task_id).json()["version"] == 1
+
+
+def test_task_put_with_star_if_match_matches_any_version(client, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    client.put(f"/boards/{board_id}/tasks/{task_id}", json={"title": "Other"}, headers=headers)
+    
+    response = client.put(
+        f"/boards/{board_id}/tasks/{task_id}", json={"title": "New"}, headers={**headers, "If-Match": "*"}
+    )
+    
+    assert response.status_code == 200, response.text
+    assert response.headers["etag"] == '"3"'
+
+
+def test_board_put_if_match(client, board):
+    headers, _, board_id = board
+    etag = client.get(f"/boards/{board_id}", headers=headers).headers["etag"]
+    
+    matching = client.put(f"/boards/{board_id}", json={"title": "A"}, headers={**headers, "If-Match": etag})
+    stale = client.put(f"/boards/{board_id}", json={"title": "B"}, headers={**headers, "If-Match": etag})
+    weak = client.put(f"/boards/{board_id}", json={"title": "C"}, headers={**headers, "If-Match": 'W/"2"'})
+    star = client.put(f"/boards/{board_id}", json={"title": "D"}, headers={**headers, "If-Match": "*"})
+    
+    assert matching.status_code == 200, matching.text
+    assert matching.headers["etag"] == '"2"'
+    assert (stale.status_code, stale.headers["etag"]) == (412, '"2"')
+    assert weak.status_code == 412
+    assert (star.status_code, star.headers["etag"]) == (200, '"3"')
+    assert client.get(f"/boards/{board_id}", headers=headers).json()["title"] == "D"
+
+
+def test_every_task_write_path_bumps_version(client, board):
+    headers, _, board_id = board
+    task_id = _create_task(client, headers, board_id)
+    target_id = client.post("/boards/", json={"title": "Target"}, headers=headers).json()["id"]
+    
+    def version(current_board_id=board_id):
+        return _task(client, headers, current_board_id, task_id).json()["version"]
+    
+    steps = [
+        lambda: client.put(f"/tasks/{task_id}/status/in_progress", headers=headers),
+        lambda: client.put(f"/tasks/{task_id}/next-status", headers=headers),
+        lambda: client.put(f"/tasks/{task_id}/priority/high", headers=headers),
+        lambda: client.put(
+            f"/boards/{board_id}/tasks/bulk/status",
+            json={"task_ids": [task_id], "new_status": "todo"},
+            headers=headers
+        ),
+        lambda: client.patch(
+            "/tasks/bulk", json={"task_ids": [task_id], "changes": {"priority": "low"}}, headers=headers
+        ),
+    ]
+    expected = version()
+    for step in steps:
+        response = step()
+        assert response.status_code == 200, response.text
+        expected += 1
+        assert version() == expected
+    
+    moved = client.put(f"/boards/{board_id}/tasks/{task_id}/move-to/{target_id}", headers=headers)
+    
+    assert moved.status_code == 200, moved.text
+    assert version(target_id) == expected + 1
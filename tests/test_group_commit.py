@@ -0,0 +1,48 @@
+"""
+Групповой коммит: операция, не дождавшаяся очереди, отменяется и не выполняется;
+операция, которую пачка уже взяла в работу, дожидается коммита.
+"""
+import threading
+import time
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.group_commit import GroupCommitter
+from app.database import SessionLocal
+
+
+def test_timed_out_write_is_cancelled_and_running_write_is_awaited(db, monkeypatch):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_WAIT_SECONDS", 0.1)
+    committer = GroupCommitter(SessionLocal, max_batch=1, max_delay=0, enabled=True, name="test-group-commit")
+    executed = []
+    started = threading.Event()
+    
+    def slow(session):
+        started.set()
+        time.sleep(0.4)
+        executed.append("slow")
+        return "slow"
+    
+    def quick(session):
+        executed.append("quick")
+        return "quick"
+    
+    results = {}
+    
+    def run(name, op):
+        try:
+            results[name] = committer.execute(db, op)
+        except HTTPException as e:
+            results[name] = e.status_code
+    
+    slow_thread = threading.Thread(target=run, args=("slow", slow))
+    slow_thread.start()
+    assert started.wait(5)
+    run("quick", quick)  # Очередь занята пачкой slow дольше таймаута
+    slow_thread.join(5)
+    committer.stop()
+    
+    assert results == {"slow": "slow", "quick": 503}
+    assert executed == ["slow"]
+    assert committer.info()["cancelled"] == 1
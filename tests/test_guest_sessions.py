@@ -0,0 +1,114 @@
+"""
+Гостевые сессии без записи в users: выдача токена, чтение публичных досок, задач и комментариев,
+403 на запись и закрытые доски, переход в обычного пользователя через /auth/guest/upgrade.
+"""
+import uuid
+
+import pytest
+
+from app.models.user import User
+
+
+@pytest.fixture
+def guest(client):
+    """Заголовки гостевой сессии"""
+    response = client.post("/auth/guest-session")
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def boards(client, board):
+    """Публичная и приватная доски одного владельца с задачей и комментарием на каждой"""
+    headers, _, private_id = board
+    public_id = client.post("/boards/", json={"title": "Public", "public": True}, headers=headers).json()["id"]
+    tasks = {}
+    for board_id in (public_id, private_id):
+        task_id = client.post(f"/boards/{board_id}/tasks", json={"title": "T"}, headers=headers).json()["id"]
+        assert client.post(f"/tasks/{task_id}/comments", json={"content": "c"}, headers=headers).status_code == 201
+        tasks[board_id] = task_id
+    return headers, public_id, private_id, tasks
+
+
+def test_guest_session_issues_token_without_user_row(client, db):
+    users_before = db.query(User).count()
+    
+    response = client.post("/auth/guest-session")
+    
+    assert response.status_code == 201
+    assert response.json()["refresh_token"] is None
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/users/me", headers=headers).json() == {
+        "id": None, "username": "guest", "role": "guest", "avatar_url": None
+    }
+    assert db.query(User).count() == users_before
+
+
+def test_guest_reads_public_boards_tasks_and_comments(client, guest, boards):
+    _, public_id, private_id, tasks = boards
+    public_task = tasks[public_id]
+    
+    listed = {item["id"] for item in client.get("/boards/?include=summary", headers=guest).json()}
+    assert public_id in listed and private_id not in listed
+    
+    stats = client.get(f"/boards/stats?ids={public_id},{private_id}", headers=guest).json()
+    assert set(stats["stats"]) == {str(public_id)}
+    assert stats["not_found"] == [private_id]
+    assert client.get(f"/boards/{public_id}/stats", headers=guest).json()["total"] == 1
+    assert client.get(f"/boards/{public_id}/members", headers=guest).status_code == 200
+    
+    accessible = {task["id"] for task in client.get("/tasks/accessible", headers=guest).json()["tasks"]}
+    assert public_task in accessible and tasks[private_id] not in accessible
+    
+    comments = client.get(f"/tasks/{public_task}/comments", headers=guest)
+    assert comments.status_code == 200
+    assert [comment["content"] for comment in comments.json()["comments"]] == ["c"]
+    
+    latest = client.get(f"/comments/latest?task_ids={public_task}&task_ids={tasks[private_id]}", headers=guest)
+    assert set(latest.json()) == {str(public_task)}
+
+
+def test_guest_cannot_read_private_board(client, guest, boards):
+    _, _, private_id, tasks = boards
+    
+    assert client.get(f"/boards/{private_id}/stats", headers=guest).status_code == 403
+    assert client.get(f"/boards/{private_id}/members", headers=guest).status_code == 403
+    assert client.get(f"/tasks/{tasks[private_id]}/comments", headers=guest).status_code == 403
+
+
+def test_guest_write_is_forbidden(client, guest, boards):
+    _, public_id, _, tasks = boards
+    
+    writes = [
+        client.post("/boards/", json={"title": "B"}, headers=guest),
+        client.post(f"/boards/{public_id}/tasks", json={"title": "T"}, headers=guest),
+        client.post(f"/tasks/{tasks[public_id]}/comments", json={"content": "c"}, headers=guest),
+    ]
+    
+    for response in writes:
+        assert response.status_code == 403
+        assert response.json()["detail"].startswith("Guest sessions are read-only")
+
+
+def test_guest_upgrade_creates_user_and_revokes_guest_token(client, guest):
+    name = f"g{uuid.uuid4().hex[:10]}"
+    
+    response = client.post(
+        "/auth/guest/upgrade",
+        json={"username": name, "email": f"{name}@example.com", "password": "secret1"},
+        headers=guest
+    )
+    
+    assert response.status_code == 201, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    me = client.get("/users/me", headers=headers).json()
+    assert (me["username"], me["role"]) == (name, "user")
+    assert client.post("/boards/", json={"title": "Mine"}, headers=headers).status_code == 201
+    assert client.get("/boards/", headers=guest).status_code == 401
+    
+    again = client.post(
+        "/auth/guest/upgrade",
+        json={"username": name, "email": f"{name}@example.com", "password": "secret1"},
+        headers=headers
+    )
+    assert again.status_code == 400
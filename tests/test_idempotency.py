@@ -0,0 +1,118 @@
+"""
+Idempotency-Key: повтор после обновления токена и потоковые запросы.
+"""
+import json
+import uuid
+
+
+def _register_with_refresh(client):
+    name = f"u{uuid.uuid4().hex[:10]}"
+    tokens = client.post(
+        "/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "secret1"}
+    ).json()
+    return tokens["access_token"], tokens["refresh_token"]
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_retry_after_token_refresh_is_replayed(client):
+    access, refresh = _register_with_refresh(client)
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+    
+    first = client.post("/boards/", json={"title": "Once"}, headers={**_bearer(access), **key})
+    refreshed = client.post("/auth/refresh", json={"refresh_token": refresh}).json()["access_token"]
+    retry = client.post("/boards/", json={"title": "Once"}, headers={**_bearer(refreshed), **key})
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers.get("idempotent-replayed") == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    boards = client.get("/boards/", headers=_bearer(refreshed)).json()
+    assert [board["title"] for board in boards] == ["Once"]
+
+
+def test_key_is_scoped_to_user(client, register):
+    first_headers, _ = register()
+    second_headers, _ = register()
+    key = {"Idempotency-Key": uuid.uuid4().hex}
+    
+    first = client.post("/boards/", json={"title": "A"}, headers={**first_headers, **key})
+    second = client.post("/boards/", json={"title": "A"}, headers={**second_headers, **key})
+    
+    assert second.headers.get("idempotent-replayed") is None
+    assert second.json()["id"] != first.json()["id"]
+
+
+def test_different_body_with_same_key_is_rejected(client, register):
+    headers, _ = register()
+    headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+    
+    assert client.post("/boards/", json={"title": "A"}, headers=headers).status_code == 201
+    assert client.post("/boards/", json={"title": "B"}, headers=headers).status_code == 422
+
+
+def test_streaming_import_is_replayed(client, board):
+    headers, _, board_id = board
+    # Повтор отправляет те же байты: multipart с фиксированной границей
+    boundary = "tms-test-boundary"
+    rows = "\n".join(json.dumps({"title": f"T{i}"}) for i in range(50))
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="t.ndjson"\r\n'
+        "Content-Type: application/x-ndjson\r\n\r\n"
+        f"{rows}\r\n--{boundary}--\r\n"
+    ).encode()
+    headers = {
+        **headers,
+        "Idempotency-Key": uuid.uuid4().hex,
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+    }
+    
+    first = client.post(f"/import?board_id={board_id}", content=body, headers=headers)
+    retry = client.post(f"/import?board_id={board_id}", content=body, headers=headers)
+    
+    assert first.status_code == 200, first.text
+    assert first.json()["tasks_created"] == 50
+    assert retry.headers.get("idempotent-replayed") == "true"
+    assert len(client.get(f"/boards/{board_id}/tasks?limit=1000", headers=headers).json()) == 50
+
+
+def test_body_is_passed_through_in_chunks():
+    import asyncio
+    
+    from app.core.idempotency import IdempotencyMiddleware
+    
+    chunks = [b"a" * 10, b"b" * 10, b"c" * 10]
+    seen = []
+    
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            seen.append(message["body"])
+            if not message["more_body"]:
+                break
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    
+    async def run():
+        messages = [
+            {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+            for index, chunk in enumerate(chunks)
+        ]
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            pass
+        
+        scope = {
+            "type": "http", "method": "POST", "path": "/import", "query_string": b"",
+            "headers": [(b"idempotency-key", b"chunked")],
+        }
+        await IdempotencyMiddleware(app)(scope, receive, send)
+    
+    asyncio.run(run())
+    
+    assert seen == chunks
@@ -0,0 +1,59 @@
+"""
+POST /import: связи parent_task_id между строками загрузки.
+"""
+import json
+
+from app.models.task import Task
+
+
+def _import(client, headers, board_id, rows):
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    response = client.post(
+        f"/import?board_id={board_id}", files={"file": ("tasks.ndjson", body)}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _parents(db, board_id):
+    return dict(db.query(Task.title, Task.parent_task_id).filter(Task.board_id == board_id).all())
+
+
+def test_parent_links(client, board, db):
+    headers, _, board_id = board
+    result = _import(client, headers, board_id, [
+        {"id": "2", "parent_task_id": "1", "title": "child"},
+        {"id": "1", "title": "root"},
+    ])
+    
+    assert result["error_count"] == 0
+    ids = dict(db.query(Task.title, Task.id).filter(Task.board_id == board_id).all())
+    assert _parents(db, board_id) == {"root": None, "child": ids["root"]}
+
+
+def test_two_task_cycle_is_rejected(client, board, db):
+    headers, _, board_id = board
+    result = _import(client, headers, board_id, [
+        {"id": "1", "parent_task_id": "2", "title": "a"},
+        {"id": "2", "parent_task_id": "1", "title": "b"},
+    ])
+    
+    assert result["error_count"] == 1
+    assert result["errors"][0]["line"] == 2
+    assert "cycle" in result["errors"][0]["error"]
+    parents = _parents(db, board_id)
+    assert parents["b"] is None and parents["a"] is not None
+
+
+def test_longer_cycle_and_self_parent_are_rejected(client, board, db):
+    headers, _, board_id = board
+    result = _import(client, headers, board_id, [
+        {"id": "1", "parent_task_id": "2", "title": "a"},
+        {"id": "2", "parent_task_id": "3", "title": "b"},
+        {"id": "3", "parent_task_id": "1", "title": "c"},
+        {"id": "4", "parent_task_id": "4", "title": "d"},
+    ])
+    
+    assert [error["line"] for error in result["errors"]] == [3, 4]
+    parents = _parents(db, board_id)
+    assert parents["c"] is None and parents["d"] is None
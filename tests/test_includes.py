@@ -0,0 +1,71 @@
+"""
+include=assignee,creator: пользователи страницы задач загружаются одним IN-запросом (DataLoader),
+поэтому число запросов не зависит от числа задач; неизвестный include — 400.
+"""
+import pytest
+
+from app.models.task import Task
+
+
+def _board_with_assigned_tasks(client, db, headers, assignee_ids):
+    board_id = client.post("/boards/", json={"title": "B"}, headers=headers).json()["id"]
+    task_ids = [
+        client.post(f"/boards/{board_id}/tasks", json={"title": f"T{i}"}, headers=headers).json()["id"]
+        for i in range(len(assignee_ids))
+    ]
+    for task_id, assignee_id in zip(task_ids, assignee_ids):
+        db.query(Task).filter(Task.id == task_id).update({"assignee_id": assignee_id}, synchronize_session=False)
+    db.commit()
+    return board_id
+
+
+def _selects(statements):
+    # Без PRAGMA, которые соединение выполняет при выдаче из пула
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def _user_batches(statements):
+    return [sql for sql in statements if "FROM users" in sql and " IN (" in sql]
+
+
+def test_statement_count_does_not_grow_with_tasks(client, db, register, statements):
+    headers, owner_id = register()
+    assignees = [register()[1] for _ in range(5)]
+    single = _board_with_assigned_tasks(client, db, headers, assignees[:1])
+    many = _board_with_assigned_tasks(client, db, headers, assignees)
+    
+    counts = {}
+    for board_id in (single, many):
+        statements.clear()
+        response = client.get(f"/boards/{board_id}/tasks?include=assignee,creator", headers=headers)
+        assert response.status_code == 200, response.text
+        counts[board_id] = (len(_selects(statements)), len(_user_batches(statements)))
+        tasks = response.json()
+    
+    assert counts[single] == counts[many]
+    assert counts[many][1] == 1
+    assert [task["assignee"]["id"] for task in tasks] == assignees
+    assert {task["creator"]["id"] for task in tasks} == {owner_id}
+    assert set(tasks[0]["assignee"]) == {"id", "username", "avatar_url"}
+
+
+def test_without_include_users_are_not_loaded(client, db, register, statements):
+    headers, _ = register()
+    board_id = _board_with_assigned_tasks(client, db, headers, [register()[1]])
+    statements.clear()
+    
+    tasks = client.get(f"/boards/{board_id}/tasks", headers=headers).json()
+    
+    assert _user_batches(statements) == []
+    assert "assignee" not in tasks[0] and "creator" not in tasks[0]
+
+
+@pytest.mark.parametrize("path", ["/boards/{board_id}/tasks", "/tasks/accessible", "/tasks/search?q=T", "/boards/"])
+def test_unknown_include_is_400(client, board, path):
+    headers, _, board_id = board
+    separator = "&" if "?" in path else "?"
+    
+    response = client.get(f"{path.format(board_id=board_id)}{separator}include=assignee,owner", headers=headers)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown include: ")
@@ -0,0 +1,118 @@
+"""
+Очередь заданий: аренда выполняемого задания, возврат зависших заданий в очередь;
+результат воркера, потерявшего аренду, не записывается.
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.job import Job
+from app.services import job_service
+
+
+@job_service.job_handler("test.sleep")
+def _sleep_job(db, payload, job):
+    time.sleep(payload["seconds"])
+    return {"slept": payload["seconds"]}
+
+
+def _running_job(db, started_ago: float, heartbeat_ago: float) -> Job:
+    job = job_service.enqueue(db, "test.sleep", {"seconds": 0})
+    claimed = job_service.claim_next_job(db, "worker-a")
+    assert claimed.id == job.id
+    now = datetime.utcnow()
+    db.query(Job).filter(Job.id == job.id).update({
+        "started_at": now - timedelta(seconds=started_ago),
+        "heartbeat_at": now - timedelta(seconds=heartbeat_ago),
+    })
+    db.commit()
+    return claimed
+
+
+def test_long_running_job_with_fresh_lease_is_not_requeued(db):
+    job = _running_job(db, started_ago=settings.JOB_LOCK_TIMEOUT_SECONDS * 3, heartbeat_ago=1)
+    
+    job_service.requeue_stale_jobs(db)
+    
+    db.expire_all()
+    assert job_service.get_job(db, job.id).status == "running"
+    db.query(Job).filter(Job.id == job.id).update({"status": "failed"})
+    db.commit()
+
+
+def test_expired_lease_is_requeued(db):
+    timeout = settings.JOB_LOCK_TIMEOUT_SECONDS
+    job = _running_job(db, started_ago=timeout * 3, heartbeat_ago=timeout + 1)
+    
+    assert job_service.requeue_stale_jobs(db) >= 1
+    
+    db.expire_all()
+    requeued = job_service.get_job(db, job.id)
+    assert (requeued.status, requeued.locked_by) == ("queued", None)
+    db.query(Job).filter(Job.id == job.id).update({"status": "failed"})
+    db.commit()
+
+
+def test_running_job_renews_its_lease(db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.05)
+    job_service.enqueue(db, "test.sleep", {"seconds": 0.5})
+    job = job_service.claim_next_job(db, "worker-b")
+    claimed_at = job.heartbeat_at
+    
+    job_service.run_job(db, job)
+    
+    db.expire_all()
+    finished = job_service.get_job(db, job.id)
+    assert finished.status == "succeeded"
+    assert finished.heartbeat_at > claimed_at + timedelta(seconds=0.3)
+
+
+def test_lease_is_not_renewed_for_another_worker(db):
+    job = _running_job(db, started_ago=0, heartbeat_ago=0)
+    
+    assert not job_service.renew_lease(db, job.id, "worker-other")
+    assert job_service.renew_lease(db, job.id, "worker-a")
+    db.query(Job).filter(Job.id == job.id).update({"status": "failed"})
+    db.commit()
+
+
+@job_service.job_handler("test.lose_lease")
+def _lose_lease_job(db, payload, job):
+    # Аренда истекла, задание вернули в очередь и захватил другой воркер
+    db.query(Job).filter(Job.id == job.job_id).update({"status": "running", "locked_by": "worker-thief"})
+    db.commit()
+    if payload.get("fail"):
+        raise RuntimeError("boom")
+    return {"done": True}
+
+
+def test_complete_and_fail_require_the_lease(db):
+    job = _running_job(db, started_ago=0, heartbeat_ago=0)
+    
+    assert not job_service.complete_job(db, job.id, "worker-other", {"done": True})
+    assert not job_service.fail_job(db, job, "worker-other", "boom")
+    db.expire_all()
+    current = job_service.get_job(db, job.id)
+    assert (current.status, current.locked_by) == ("running", "worker-a")
+    
+    assert job_service.complete_job(db, job.id, "worker-a", {"done": True})
+    assert not job_service.fail_job(db, job, "worker-a", "late failure")
+    db.expire_all()
+    assert job_service.get_job(db, job.id).status == "succeeded"
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_result_of_lost_lease_is_not_recorded(db, fail):
+    job = job_service.enqueue(db, "test.lose_lease", {"fail": fail})
+    claimed = job_service.claim_next_job(db, "worker-a")
+    assert claimed.id == job.id
+    
+    assert job_service.run_job(db, claimed) is False
+    
+    db.expire_all()
+    stolen = job_service.get_job(db, job.id)
+    assert (stolen.status, stolen.locked_by, stolen.result, stolen.error) == ("running", "worker-thief", None, None)
+    db.query(Job).filter(Job.id == job.id).update({"status": "failed", "locked_by": None})
+    db.commit()
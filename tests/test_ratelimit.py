@@ -0,0 +1,81 @@
+"""
+Ограничение частоты: 429 с Retry-After, стоимость маршрутов и общее ведро в SQLite.
+Middleware оборачивает отдельное маленькое приложение со своими лимитами —
+лимиты основного приложения в тестах подняты (conftest).
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.ratelimit import (
+    BucketLimit, MemoryRateLimitBackend, RateLimitMiddleware, SQLiteRateLimitBackend
+)
+
+
+def _limited_client(backend=None, capacity: float = 5, rate: float = 0.5) -> TestClient:
+    inner = FastAPI()
+    
+    @inner.get("/tasks/")
+    def tasks():
+        return []
+    
+    @inner.get("/search")
+    def search():
+        return []
+    
+    @inner.get("/health")
+    def health():
+        return {"status": "ok"}
+    
+    limits = {"api": BucketLimit(rate, capacity), "auth": BucketLimit(rate, capacity)}
+    app = RateLimitMiddleware(inner, backend=backend or MemoryRateLimitBackend(), limits=limits, enabled=True)
+    return TestClient(app)
+
+
+def test_exhausted_bucket_returns_429_with_retry_after():
+    client = _limited_client()
+    
+    responses = [client.get("/tasks/") for _ in range(5)]
+    limited = client.get("/tasks/")
+    
+    assert [response.status_code for response in responses] == [200] * 5
+    assert responses[-1].headers["x-ratelimit-remaining"] == "0"
+    assert limited.status_code == 429
+    assert limited.json() == {"detail": "Too many requests"}
+    assert limited.headers["retry-after"] == "2"  # 1 токен при пополнении 0.5/с
+    assert limited.headers["x-ratelimit-limit"] == "5"
+
+
+def test_route_cost_is_charged_and_exempt_paths_are_free():
+    client = _limited_client()
+    
+    assert client.get("/search").status_code == 200  # Стоит 5 — всё ведро
+    assert client.get("/health").status_code == 200
+    limited = client.get("/tasks/")
+    
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "2"
+
+
+def test_sqlite_backend_shares_buckets_between_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    first = _limited_client(SQLiteRateLimitBackend(path), capacity=2)
+    second = _limited_client(SQLiteRateLimitBackend(path), capacity=2)
+    
+    assert first.get("/tasks/").status_code == 200
+    assert second.get("/tasks/").status_code == 200
+    assert first.get("/tasks/").status_code == 429
+
+
+def test_app_429_carries_cors_headers(client, middleware, monkeypatch):
+    limiter = middleware(RateLimitMiddleware)
+    monkeypatch.setattr(limiter, "backend", MemoryRateLimitBackend())
+    monkeypatch.setattr(limiter, "limits", {"api": BucketLimit(0.001, 1), "auth": BucketLimit(0.001, 1)})
+    origin = {"Origin": "http://localhost:5173"}
+    
+    assert client.get("/boards/public", headers=origin).status_code != 429
+    limited = client.get("/boards/public", headers=origin)
+    
+    assert limited.status_code == 429
+    assert limited.headers["access-control-allow-origin"] in ("*", "http://localhost:5173")
+    exposed = {name.strip().lower() for name in limited.headers["access-control-expose-headers"].split(",")}
+    assert {"retry-after", "x-ratelimit-limit", "x-ratelimit-remaining", "etag"} <= exposed
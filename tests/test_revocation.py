@@ -0,0 +1,39 @@
+"""
+Отзыв токенов: повторное использование refresh-токена отзывает все токены пользователя,
+но токены, выданные сразу после отзыва (в ту же секунду), остаются действительными.
+"""
+from app.core.revocation import RevocationFilter
+
+
+def _login(client, email):
+    response = client.post("/auth/login", json={"email": email, "password": "secret1"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_login_right_after_refresh_reuse_gets_working_token(client, register):
+    headers, user_id = register()
+    email = client.get("/users/me", headers=headers).json()["email"]
+    tokens = _login(client, email)
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    
+    reused = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    fresh = _login(client, email)
+    
+    assert reused.status_code == 401
+    assert reused.json()["detail"] == "Refresh token has already been used"
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {fresh['access_token']}"})
+    assert me.status_code == 200, me.text
+    old = client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert old.status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": fresh["refresh_token"]}).status_code == 200
+
+
+def test_user_revocation_rejects_only_earlier_tokens():
+    revocations = RevocationFilter(capacity=100)
+    revocations.add_user(7, 1000.5)
+    
+    assert revocations.is_revoked("a", 7, 1000.0)
+    assert revocations.is_revoked("b", 7, 1000.4)
+    assert not revocations.is_revoked("c", 7, 1000.6)
+    assert not revocations.is_revoked("d", 8, 1000.0)
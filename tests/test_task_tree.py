@@ -0,0 +1,57 @@
+"""
+Деревья подзадач (рекурсивные CTE): агрегаты и циклы в parent_task_id.
+"""
+import threading
+
+from sqlalchemy import update
+
+from app.models.task import Task
+from app.services import task_service
+
+
+def _create_tasks(client, headers, board_id, count):
+    return [
+        client.post(f"/boards/{board_id}/tasks", json={"title": f"T{i}"}, headers=headers).json()["id"]
+        for i in range(count)
+    ]
+
+
+def _set_parents(db, parents):
+    for task_id, parent_id in parents.items():
+        db.execute(update(Task).where(Task.id == task_id).values(parent_task_id=parent_id))
+    db.commit()
+
+
+def test_tree_aggregates(client, board, db):
+    headers, _, board_id = board
+    root, child, grandchild = _create_tasks(client, headers, board_id, 3)
+    _set_parents(db, {child: root, grandchild: child})
+    client.put(f"/tasks/{grandchild}/status/done", headers=headers)
+    
+    tree = client.get(f"/tasks/{root}/tree", headers=headers).json()
+    
+    assert (tree["subtree_total"], tree["subtree_done"]) == (3, 1)
+    assert tree["subtasks"][0]["id"] == child
+    assert tree["subtasks"][0]["subtasks"][0]["id"] == grandchild
+
+
+def test_cycle_terminates(client, board, db):
+    headers, _, board_id = board
+    first, second = _create_tasks(client, headers, board_id, 2)
+    _set_parents(db, {first: second, second: first})
+    
+    result = {}
+    
+    def load():
+        result["tree"] = task_service.get_task_tree(db, first, max_depth=3)
+    
+    worker = threading.Thread(target=load, daemon=True)
+    worker.start()
+    worker.join(10)
+    
+    assert not worker.is_alive(), "tree query did not terminate on a parent_task_id cycle"
+    tree = result["tree"]
+    assert tree.id == first
+    assert (tree.subtree_total, tree.subtree_done) == (2, 0)
+    assert [node.id for node in tree.subtasks] == [second]
+    assert tree.subtasks[0].subtasks == []
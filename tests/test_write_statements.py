@@ -0,0 +1,84 @@
+"""
+Число запросов к БД у операций записи (before_cursor_execute, см. фикстуру statements):
+без COMMIT перед транзакцией записи, без SELECT после UPDATE ... RETURNING,
+изменение порядка задач — один UPDATE.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models.task import Task
+
+
+@pytest.fixture
+def commits():
+    """Число коммитов соединений за время теста"""
+    counter = []
+    
+    def record(conn):
+        counter.append(1)
+    
+    event.listen(engine, "commit", record)
+    yield counter
+    event.remove(engine, "commit", record)
+
+
+def _create_tasks(client, headers, board_id, count):
+    return [
+        client.post(f"/boards/{board_id}/tasks", json={"title": f"T{i}"}, headers=headers).json()["id"]
+        for i in range(count)
+    ]
+
+
+def _task_updates(statements):
+    return [sql for sql in statements if sql.lstrip().upper().startswith("UPDATE TASKS")]
+
+
+def test_move_task_is_single_update_returning_and_single_commit(client, board, statements, commits):
+    headers, _, board_id = board
+    target_id = client.post("/boards/", json={"title": "Target"}, headers=headers).json()["id"]
+    task_id, = _create_tasks(client, headers, board_id, 1)
+    statements.clear()
+    commits.clear()
+    
+    response = client.put(f"/boards/{board_id}/tasks/{task_id}/move-to/{target_id}", headers=headers)
+    
+    assert response.status_code == 200, response.text
+    assert (response.json()["board_id"], response.json()["version"]) == (target_id, 2)
+    updates = _task_updates(statements)
+    assert len(updates) == 1 and "RETURNING" in updates[0]
+    after_update = statements[statements.index(updates[0]) + 1:]
+    assert not [sql for sql in after_update if sql.lstrip().upper().startswith("SELECT")]
+    assert statements.count("BEGIN IMMEDIATE") == 1
+    assert len(commits) == 1
+
+
+def test_move_task_to_missing_board_is_404(client, board):
+    headers, _, board_id = board
+    task_id, = _create_tasks(client, headers, board_id, 1)
+    
+    response = client.put(f"/boards/{board_id}/tasks/{task_id}/move-to/999999", headers=headers)
+    
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Target board not found"
+    assert client.get(f"/boards/{board_id}/tasks/{task_id}", headers=headers).json()["board_id"] == board_id
+
+
+def test_reorder_is_one_update_and_skips_other_boards(client, db, board, statements):
+    headers, _, board_id = board
+    other_board_id = client.post("/boards/", json={"title": "Other"}, headers=headers).json()["id"]
+    first, second, third = _create_tasks(client, headers, board_id, 3)
+    foreign, = _create_tasks(client, headers, other_board_id, 1)
+    statements.clear()
+    
+    response = client.put(
+        f"/boards/{board_id}/tasks/reorder",
+        json={"ordered_ids": [third, foreign, first, second]},
+        headers=headers
+    )
+    
+    assert response.status_code == 200, response.text
+    assert len(_task_updates(statements)) == 1
+    assert not [sql for sql in statements if "FROM tasks" in sql]  # Задачи не читаются по одной
+    orders = dict(db.query(Task.id, Task.order).filter(Task.id.in_([first, second, third, foreign])).all())
+    assert orders == {third: 0, first: 2, second: 3, foreign: 0}
@@ -0,0 +1,110 @@
+"""
+Транзакции записи (run_write_transaction): повтор при SQLITE_BUSY, 503 после исчерпания
+попыток, счётчики write_metrics и отложенный BEGIN для чтения.
+Занятость БД создаёт отдельное соединение sqlite3, держащее BEGIN IMMEDIATE.
+"""
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.database import run_write_transaction, write_metrics
+from app.models.task import Task
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_WRITE_BUSY_TIMEOUT_MS", 20)
+    monkeypatch.setattr(settings, "DATABASE_WRITE_RETRIES", 2)
+    monkeypatch.setattr(settings, "DATABASE_WRITE_RETRY_BASE_MS", 1.0)
+    monkeypatch.setattr(settings, "DATABASE_WRITE_RETRY_MAX_MS", 5.0)
+
+
+@pytest.fixture
+def locker(client):
+    """Стороннее соединение с блокировкой записи на тестовой БД"""
+    connection = sqlite3.connect(settings.DATABASE_URL[len("sqlite:///"):], isolation_level=None, check_same_thread=False)
+    connection.execute("BEGIN IMMEDIATE")
+    yield connection
+    if connection.in_transaction:
+        connection.execute("ROLLBACK")
+    connection.close()
+
+
+def _counters():
+    return dict(write_metrics.info())
+
+
+def _delta(before, after, *names):
+    return {name: after[name] - before[name] for name in names}
+
+
+def _touch_tasks(db):
+    db.query(Task).filter(Task.id == -1).update({"title": "x"}, synchronize_session=False)
+    db.commit()
+    return "done"
+
+
+def test_busy_database_is_retried_then_503(db, locker, fast_retries):
+    before = _counters()
+    calls = []
+    
+    def work():
+        calls.append(1)
+        return _touch_tasks(db)
+    
+    with pytest.raises(HTTPException) as error:
+        run_write_transaction(db, work)
+    
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+    # BEGIN IMMEDIATE падает до work(): сама работа не выполнялась ни разу
+    assert calls == []
+    assert _delta(before, _counters(), "busy_errors", "retries", "failures", "transactions") == {
+        "busy_errors": 3, "retries": 2, "failures": 1, "transactions": 0
+    }
+    assert "write_transaction" not in db.info
+
+
+def test_write_succeeds_once_lock_is_released(db, locker, fast_retries, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_WRITE_RETRIES", 50)
+    monkeypatch.setattr(settings, "DATABASE_WRITE_RETRY_MAX_MS", 20.0)
+    before = _counters()
+    release = threading.Timer(0.1, locker.execute, args=("COMMIT",))
+    release.start()
+    
+    assert run_write_transaction(db, lambda: _touch_tasks(db)) == "done"
+    
+    release.join()
+    delta = _delta(before, _counters(), "busy_errors", "retries", "failures", "transactions")
+    assert delta["busy_errors"] >= 1
+    assert delta["retries"] == delta["busy_errors"]
+    assert (delta["failures"], delta["transactions"]) == (0, 1)
+
+
+def test_nested_call_joins_outer_transaction(db):
+    before = _counters()
+    
+    result = run_write_transaction(db, lambda: run_write_transaction(db, lambda: _touch_tasks(db)))
+    
+    assert result == "done"
+    assert _delta(before, _counters(), "transactions")["transactions"] == 1
+
+
+def test_read_does_not_hold_a_snapshot_before_write(client, db, board, fast_retries):
+    headers, _, board_id = board
+    task_id = client.post(f"/boards/{board_id}/tasks", json={"title": "Before"}, headers=headers).json()["id"]
+    # Чтение в сессии (как проверки доступа в роутере) не начинает транзакцию SQLite...
+    assert db.query(Task.title).filter(Task.id == task_id).scalar() == "Before"
+    # ...поэтому чужой коммит после него не делает последующую запись SQLITE_BUSY
+    assert client.put(f"/tasks/{task_id}/priority/high", headers=headers).status_code == 200
+    
+    def rename():
+        db.query(Task).filter(Task.id == task_id).update({"title": "After"}, synchronize_session=False)
+        db.commit()
+    
+    run_write_transaction(db, rename)
+    
+    assert db.query(Task.title, Task.priority).filter(Task.id == task_id).one() == ("After", "high")